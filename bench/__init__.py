@@ -0,0 +1 @@
+# Benchmark and load-test suite (see docs/006_runbooks/20_benchmarks.md)
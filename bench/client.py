@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+Response = Tuple[int, bytes, Dict[str, str]]
+
+
+class InProcessTransport:
+    """
+    Drive an ASGI app directly (no sockets). Runs the app's lifespan so
+    background services start exactly as under uvicorn.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._lifespan_in: asyncio.Queue = asyncio.Queue()
+        self._lifespan_out: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "InProcessTransport":
+        async def receive() -> Dict[str, Any]:
+            return await self._lifespan_in.get()
+
+        async def send(message: Dict[str, Any]) -> None:
+            await self._lifespan_out.put(message)
+
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.create_task(self.app(scope, receive, send))
+        await self._lifespan_in.put({"type": "lifespan.startup"})
+        msg = await self._lifespan_out.get()
+        if msg["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"lifespan startup failed: {msg}")
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self._lifespan_in.put({"type": "lifespan.shutdown"})
+        await self._lifespan_out.get()
+        if self._lifespan_task is not None:
+            await self._lifespan_task
+
+    def _scope(self, method: str, target: str, headers: Dict[str, str], body_len: int) -> Dict[str, Any]:
+        path, _, query = target.partition("?")
+        raw = [(k.lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in headers.items()]
+        raw.append((b"host", b"bench.local"))
+        if "content-length" not in headers:
+            raw.append((b"content-length", str(body_len).encode()))
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": raw,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench.local", 80),
+        }
+
+    async def request(
+        self, method: str, target: str, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        headers = headers or {}
+        sent = False
+        done = asyncio.Event()
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        status = 0
+        out_headers: Dict[str, str] = {}
+        chunks: List[bytes] = []
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for k, v in message.get("headers", []):
+                    out_headers[k.decode("latin-1")] = v.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.app(self._scope(method, target, headers, len(body)), receive, send)
+        finally:
+            done.set()
+        return status, b"".join(chunks), out_headers
+
+    async def sse(self, target: str, stop: asyncio.Event) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield decoded `data:` payloads until stop is set.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await stop.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.body" and message.get("body"):
+                await queue.put(message["body"])
+
+        task = asyncio.create_task(self.app(self._scope("GET", target, {}, 0), receive, send))
+        buf = b""
+        try:
+            while not stop.is_set():
+                getter = asyncio.create_task(queue.get())
+                stopper = asyncio.create_task(stop.wait())
+                finished, _ = await asyncio.wait({getter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in finished:
+                    getter.cancel()
+                    break
+                stopper.cancel()
+                buf += getter.result()
+                while b"\n\n" in buf:
+                    frame, buf = buf.split(b"\n\n", 1)
+                    for line in frame.split(b"\n"):
+                        if line.startswith(b"data: "):
+                            yield json.loads(line[6:])
+        finally:
+            stop.set()
+            try:
+                await asyncio.wait_for(task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                task.cancel()
+
+
+class HttpTransport:
+    """
+    Minimal HTTP/1.1 keep-alive client on asyncio streams (no extra deps),
+    for driving a local uvicorn process.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 64) -> None:
+        u = urlsplit(base_url)
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or 80
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._sem = asyncio.Semaphore(pool_size)
+
+    async def __aenter__(self) -> "HttpTransport":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        for _, w in self._idle:
+            w.close()
+        self._idle.clear()
+
+    async def _conn(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self._idle:
+            return self._idle.pop()
+        return await asyncio.open_connection(self.host, self.port)
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        return status, headers
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts: List[bytes] = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).strip().split(b";")[0], 16)
+                if size == 0:
+                    await reader.readuntil(b"\r\n")
+                    return b"".join(parts)
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        n = int(headers.get("content-length", "0"))
+        return await reader.readexactly(n) if n else b""
+
+    def _head(self, method: str, target: str, headers: Dict[str, str], body_len: int) -> bytes:
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for k, v in headers.items():
+            if k.lower() not in ("host", "content-length", "connection"):
+                lines.append(f"{k}: {v}")
+        lines.append(f"Content-Length: {body_len}")
+        lines.append("Connection: keep-alive")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def request(
+        self, method: str, target: str, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        async with self._sem:
+            reader, writer = await self._conn()
+            try:
+                writer.write(self._head(method, target, headers or {}, len(body)) + body)
+                await writer.drain()
+                status, out_headers = await self._read_head(reader)
+                data = await self._read_body(reader, out_headers)
+            except BaseException:
+                # Also on cancellation (a caller's timeout): the connection
+                # is mid-response and cannot go back to the pool.
+                writer.close()
+                raise
+            if out_headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+            return status, data, out_headers
+
+    async def sse(self, target: str, stop: asyncio.Event) -> AsyncIterator[Dict[str, Any]]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(self._head("GET", target, {"accept": "text/event-stream"}, 0))
+            await writer.drain()
+            _, headers = await self._read_head(reader)
+            chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+            buf = b""
+            while not stop.is_set():
+                read = asyncio.create_task(
+                    reader.readuntil(b"\r\n") if chunked else reader.read(65536)
+                )
+                stopper = asyncio.create_task(stop.wait())
+                finished, _ = await asyncio.wait({read, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                if read not in finished:
+                    read.cancel()
+                    break
+                stopper.cancel()
+                if chunked:
+                    size = int(read.result().strip().split(b";")[0], 16)
+                    if size == 0:
+                        break
+                    buf += await reader.readexactly(size)
+                    await reader.readexactly(2)
+                else:
+                    chunk = read.result()
+                    if not chunk:
+                        break
+                    buf += chunk
+                while b"\n\n" in buf:
+                    frame, buf = buf.split(b"\n\n", 1)
+                    for line in frame.split(b"\n"):
+                        if line.startswith(b"data: "):
+                            yield json.loads(line[6:])
+        finally:
+            writer.close()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Metric name suffix -> direction. "higher" means bigger is better.
+_DIRECTIONS = {
+    "throughput_rps": "higher",
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "p99_ms": "lower",
+    "median_ms": "lower",
+    "ready_ms": "lower",
+    "first_ack_ms": "lower",
+    "rss_bytes": "lower",
+    "peak_rss_bytes": "lower",
+}
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    throughput_pct: float = 15.0
+    latency_pct: float = 25.0
+    rss_pct: float = 20.0
+    # ignore latency moves smaller than this (timer noise on tiny numbers)
+    latency_floor_ms: float = 1.0
+
+
+@dataclass(frozen=True)
+class Finding:
+    metric: str
+    baseline: float
+    current: float
+    change_pct: float
+    regression: bool
+
+
+def _flatten(obj: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from _flatten(v, f"{prefix}.{k}" if prefix else str(k))
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix, float(obj)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], t: Thresholds = Thresholds()) -> List[Finding]:
+    """
+    Compare scenario results against a stored baseline. Only metrics present
+    in both and listed in _DIRECTIONS are judged.
+    """
+    base = dict(_flatten(baseline.get("scenarios", {})))
+    findings: List[Finding] = []
+    for key, cur in _flatten(current.get("scenarios", {})):
+        leaf = key.rsplit(".", 1)[-1]
+        direction = _DIRECTIONS.get(leaf)
+        if direction is None or key not in base:
+            continue
+        old = base[key]
+        if old == 0:
+            continue
+        change = (cur - old) / old * 100.0
+        if leaf == "throughput_rps":
+            regression = change < -t.throughput_pct
+        elif leaf.endswith("rss_bytes"):
+            regression = change > t.rss_pct
+        else:
+            regression = change > t.latency_pct and (cur - old) > t.latency_floor_ms
+        findings.append(Finding(key, old, cur, round(change, 1), regression))
+    return findings
+
+
+def format_report(findings: List[Finding]) -> str:
+    lines = []
+    for f in sorted(findings, key=lambda f: (not f.regression, f.metric)):
+        flag = "REGRESSION" if f.regression else "ok"
+        lines.append(f"{flag:<10} {f.metric:<55} {f.baseline:>14.3f} -> {f.current:>14.3f} ({f.change_pct:+.1f}%)")
+    return "\n".join(lines)
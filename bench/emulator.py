@@ -0,0 +1,733 @@
+"""
+Local DocuSign emulator for client and ingest benchmarks (no demo account,
+no rate limits we do not choose, runs in CI).
+
+    python -m bench.emulator --port 8090 --envelopes 500
+    python -m bench.emulator --port 8090 \\
+        --faults '{"rest": {"latency": "lognormal", "latency_ms": 80, "latency_max_ms": 900, "rate_429": 0.05}}'
+    python -m bench.emulator --connect-target http://127.0.0.1:8000 --connect-rate 50 --connect-count 5000
+    python -m bench.emulator --write-key /tmp/emulator-key.pem   # throwaway RSA key, then exit
+
+Point the gateway at it:
+
+    DS_AUTH_BASE_URL=http://127.0.0.1:8090 DS_INTEGRATION_KEY=emulator \\
+    DS_USER_ID=emulator DS_PRIVATE_KEY_PATH=/tmp/emulator-key.pem
+
+Serves what the gateway calls: POST /oauth/token (JWT bearer grant; the
+assertion is decoded, not verified), GET /oauth/userinfo (base_uri points
+back here), GET /restapi/v2.1/accounts/{id}, .../envelopes/{id} (ETag,
+If-None-Match -> 304) and .../envelopes?envelope_ids=...|from_date=....
+Envelopes live in memory; the Connect sender updates an envelope before it
+delivers the event, so REST reads agree with what the gateway ingested.
+
+Faults are set per route group (oauth, userinfo, rest; "*" for all):
+latency (fixed | uniform | lognormal), 429 with Retry-After (random rate or
+a token bucket like DocuSign's API limits), 5xx and timeouts (no answer for
+timeout_s). Runtime control: GET /_emulator/stats, PUT /_emulator/faults,
+POST /_emulator/reset.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from bench.payloads import LIFECYCLE, PayloadMix, connect_stream
+from bench.stats import summarize
+
+WEBHOOK_PATH = "/webhooks/docusign"
+REST_PREFIX = "/restapi/v2.1/accounts"
+GROUPS = ("oauth", "userinfo", "rest")
+LATENCY_KINDS = ("fixed", "uniform", "lognormal")
+_Z99 = 2.3263  # 99th percentile of the standard normal
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# -- faults -------------------------------------------------------------------
+
+
+@dataclass
+class Faults:
+    """
+    Injected behaviour for one route group. Rates are per-request
+    probabilities, rolled in order timeout, 429, 5xx; the sampled latency
+    delays every answer except a timeout.
+    """
+
+    latency: str = "fixed"  # fixed | uniform | lognormal
+    latency_ms: float = 0.0  # fixed value; uniform low; lognormal median
+    latency_max_ms: float = 0.0  # uniform high; lognormal p99
+    rate_429: float = 0.0
+    retry_after_s: int = 1
+    rate_5xx: float = 0.0
+    rate_timeout: float = 0.0
+    timeout_s: float = 30.0
+    limit_per_s: float = 0.0  # token bucket; 0 = unlimited
+    burst: float = 0.0  # bucket size; defaults to limit_per_s
+
+    def latency_s(self, rng: random.Random) -> float:
+        if self.latency == "uniform":
+            ms = rng.uniform(self.latency_ms, max(self.latency_ms, self.latency_max_ms))
+        elif self.latency == "lognormal" and self.latency_ms > 0:
+            sigma = math.log(max(self.latency_max_ms, self.latency_ms) / self.latency_ms) / _Z99
+            ms = self.latency_ms * math.exp(sigma * rng.gauss(0.0, 1.0))
+        else:
+            ms = self.latency_ms
+        return min(max(ms, 0.0), 60_000.0) / 1000.0
+
+
+def parse_faults(spec: Dict[str, Any]) -> Dict[str, Faults]:
+    """
+    {"*": {...}, "rest": {...}} -> Faults per group; every group starts from
+    "*". Raises ValueError on unknown groups, fields or latency kinds.
+    """
+    unknown_groups = set(spec) - set(GROUPS) - {"*"}
+    if unknown_groups:
+        raise ValueError(f"unknown fault group(s) {sorted(unknown_groups)}; expected *, {', '.join(GROUPS)}")
+    known = {f.name for f in fields(Faults)}
+    out: Dict[str, Faults] = {}
+    for group in GROUPS:
+        merged = {**(spec.get("*") or {}), **(spec.get(group) or {})}
+        unknown = set(merged) - known
+        if unknown:
+            raise ValueError(f"unknown fault field(s) {sorted(unknown)}")
+        faults = Faults(**merged)
+        if faults.latency not in LATENCY_KINDS:
+            raise ValueError(f"latency must be one of {', '.join(LATENCY_KINDS)}")
+        out[group] = faults
+    return out
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.size = max(1.0, burst or rate)
+        self.tokens = self.size
+        self.at = time.monotonic()
+
+    def take(self) -> float:
+        """
+        0 if a request may pass, else seconds until one may.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.size, self.tokens + (now - self.at) * self.rate)
+        self.at = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+def _group(path: str) -> Optional[str]:
+    if path == "/oauth/token":
+        return "oauth"
+    if path == "/oauth/userinfo":
+        return "userinfo"
+    if path.startswith(REST_PREFIX):
+        return "rest"
+    return None
+
+
+def _error(status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"errorCode": code, "message": message}, status_code=status, headers=headers)
+
+
+# -- envelopes ----------------------------------------------------------------
+
+
+class EnvelopeStore:
+    """
+    In-memory envelopes per account. Thread-safe: the Connect sender may run
+    on another event loop than the REST routes (bench scenarios).
+    """
+
+    def __init__(self, accounts: Sequence[str]) -> None:
+        self.accounts = [a.lower() for a in accounts]
+        self._envelopes: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._envelopes)
+
+    def apply(self, account_id: str, envelope_id: str, status: str, at: datetime) -> None:
+        key, when = envelope_id.lower(), _iso(at)
+        with self._lock:
+            env = self._envelopes.get(key)
+            if env is None:
+                env = self._envelopes[key] = {
+                    "envelopeId": envelope_id,
+                    "status": status,
+                    "emailSubject": f"Please sign: Agreement {envelope_id[:8]}",
+                    "createdDateTime": when,
+                    "sentDateTime": when,
+                    "envelopeUri": f"/envelopes/{envelope_id}",
+                    "_account": account_id.lower(),
+                }
+            env["status"] = status
+            env["statusChangedDateTime"] = env["lastModifiedDateTime"] = when
+            if status in ("completed", "declined", "voided"):
+                env[f"{status}DateTime"] = when
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def seed(self, n: int, rng: random.Random) -> List[Tuple[str, str]]:
+        """
+        n envelopes at random lifecycle steps; returns (account, envelope) pairs.
+        """
+        now = datetime.now(timezone.utc)
+        out = []
+        for _ in range(n):
+            account = rng.choice(self.accounts)
+            envelope_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            self.apply(account, envelope_id, rng.choice(LIFECYCLE)[1], now - timedelta(seconds=rng.randint(0, 86400)))
+            out.append((account, envelope_id))
+        return out
+
+    @staticmethod
+    def _public(env: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in env.items() if not k.startswith("_")}
+
+    def get(self, account_id: str, envelope_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        key = envelope_id.lower()
+        with self._lock:
+            env = self._envelopes.get(key)
+            if env is None or env["_account"] != account_id.lower():
+                return None
+            return self._public(env), f'"{self._versions[key]}"'
+
+    def by_ids(self, account_id: str, envelope_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        account = account_id.lower()
+        with self._lock:
+            found = (self._envelopes.get(i.strip().lower()) for i in envelope_ids)
+            return [self._public(e) for e in found if e is not None and e["_account"] == account]
+
+    def changed_since(self, account_id: str, from_iso: str, start: int, count: int) -> Tuple[List[Dict[str, Any]], int]:
+        account = account_id.lower()
+        with self._lock:
+            hits = sorted(
+                (e for e in self._envelopes.values()
+                 if e["_account"] == account and e["statusChangedDateTime"] >= from_iso),
+                key=lambda e: e["statusChangedDateTime"],
+            )
+            return [self._public(e) for e in hits[start:start + count]], len(hits)
+
+
+# -- emulator -----------------------------------------------------------------
+
+
+@dataclass
+class EmulatorConfig:
+    seed: int = 1234
+    accounts: int = 5
+    envelopes: int = 0  # pre-created, for read benchmarks
+    token_ttl_s: int = 3600
+    faults: Dict[str, Any] = field(default_factory=dict)  # parse_faults() spec
+    public_url: str = ""  # userinfo base_uri; default: the URL the caller used
+    connect_target: str = ""  # gateway base URL; empty = no Connect sender
+    connect_path: str = WEBHOOK_PATH
+    connect_rate: float = 20.0  # deliveries/s; 0 = as fast as concurrency allows
+    connect_count: int = 0  # 0 = until stopped
+    connect_concurrency: int = 8
+    connect_hmac_key: str = ""
+    connect_document_fraction: float = 0.02
+
+
+class Emulator:
+    """
+    State shared by the routes: envelope store, issued tokens, faults and
+    per-group outcome counts.
+    """
+
+    def __init__(self, config: EmulatorConfig) -> None:
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.store = EnvelopeStore([str(uuid.UUID(int=self.rng.getrandbits(128))) for _ in range(max(1, config.accounts))])
+        self.seeded = self.store.seed(config.envelopes, self.rng)
+        self.tokens: Dict[str, Tuple[str, float]] = {}  # access token -> (sub, expires_at)
+        self.sender: Optional[ConnectSender] = None
+        self.set_faults(config.faults)
+
+    def set_faults(self, spec: Dict[str, Any]) -> None:
+        self.faults = parse_faults(spec)
+        self.fault_spec = spec
+        self._buckets = {g: _Bucket(f.limit_per_s, f.burst) for g, f in self.faults.items() if f.limit_per_s > 0}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.stats: Dict[str, Dict[str, int]] = {g: {} for g in GROUPS}
+        self.injected_s: Dict[str, float] = {g: 0.0 for g in GROUPS}
+
+    def count(self, group: str, outcome: str) -> None:
+        counts = self.stats[group]
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    async def inject(self, group: str) -> Optional[Response]:
+        """
+        Apply the group's faults: an error response to send instead of the
+        route's, or None to go on (after the sampled latency).
+        """
+        f = self.faults[group]
+        bucket = self._buckets.get(group)
+        if bucket is not None:
+            wait = bucket.take()
+            if wait > 0:
+                self.count(group, "429")
+                return _error(429, "HOURLY_APIINVOCATION_LIMIT_EXCEEDED", "API call limit exceeded (emulated bucket).",
+                              {"Retry-After": str(max(1, math.ceil(wait)))})
+        roll = self.rng.random()
+        if roll < f.rate_timeout:
+            self.count(group, "timeout")
+            self.injected_s[group] += f.timeout_s
+            await asyncio.sleep(f.timeout_s)
+            return _error(504, "EMULATED_TIMEOUT", "No answer within timeout_s.")
+        delay = f.latency_s(self.rng)
+        if delay > 0:
+            self.injected_s[group] += delay
+            await asyncio.sleep(delay)
+        roll -= f.rate_timeout
+        if roll < f.rate_429:
+            self.count(group, "429")
+            return _error(429, "HOURLY_APIINVOCATION_LIMIT_EXCEEDED", "API call limit exceeded (emulated).",
+                          {"Retry-After": str(f.retry_after_s)})
+        if roll - f.rate_429 < f.rate_5xx:
+            status = self.rng.choice((500, 502, 503))
+            self.count(group, "5xx")
+            return _error(status, "EMULATED_SERVER_ERROR", f"Injected HTTP {status}.")
+        return None
+
+    def issue_token(self, sub: str) -> Dict[str, Any]:
+        token = "emu-" + base64.urlsafe_b64encode(os.urandom(24)).decode("ascii")
+        self.tokens[token] = (sub, time.time() + self.config.token_ttl_s)
+        return {"access_token": token, "token_type": "Bearer", "expires_in": self.config.token_ttl_s}
+
+    def subject(self, request: Request) -> Optional[str]:
+        auth = request.headers.get("authorization", "")
+        if not auth.lower().startswith("bearer "):
+            return None
+        held = self.tokens.get(auth[7:].strip())
+        if held is None or held[1] <= time.time():
+            return None
+        return held[0]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "accounts": self.store.accounts,
+            "envelopes": len(self.store),
+            "tokens_issued": len(self.tokens),
+            "faults": {g: asdict(f) for g, f in self.faults.items()},
+            "requests": self.stats,
+            "injected_seconds": {g: round(s, 3) for g, s in self.injected_s.items()},
+            "connect": self.sender.status() if self.sender is not None else None,
+        }
+
+
+def _jwt_claims(assertion: str) -> Optional[Dict[str, Any]]:
+    try:
+        part = assertion.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(part + "=" * (-len(part) % 4)))
+    except (IndexError, ValueError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def create_app(emu: Emulator) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        task = None
+        cfg = emu.config
+        if cfg.connect_target:
+            from bench.client import HttpTransport
+
+            transport = HttpTransport(cfg.connect_target, pool_size=max(1, cfg.connect_concurrency))
+            emu.sender = ConnectSender(
+                emu.store,
+                transport,
+                rate=cfg.connect_rate,
+                count=cfg.connect_count,
+                concurrency=cfg.connect_concurrency,
+                seed=cfg.seed,
+                mix=PayloadMix(
+                    document_fraction=cfg.connect_document_fraction,
+                    hmac_key=cfg.connect_hmac_key.encode("utf-8") or None,
+                ),
+                path=cfg.connect_path,
+            )
+            task = asyncio.create_task(emu.sender.run(), name="connect-sender")
+        yield
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    app = FastAPI(title="DocuSign emulator", lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.middleware("http")
+    async def faults(request: Request, call_next: Any) -> Response:
+        group = _group(request.url.path)
+        if group is None:
+            return await call_next(request)
+        injected = await emu.inject(group)
+        if injected is not None:
+            return injected
+        resp = await call_next(request)
+        emu.count(group, "ok" if resp.status_code < 300 else str(resp.status_code))
+        return resp
+
+    def unauthorized() -> JSONResponse:
+        return _error(401, "USER_AUTHENTICATION_FAILED", "One or both of Username and Password are invalid.")
+
+    @app.post("/oauth/token")
+    async def oauth_token(request: Request) -> Response:
+        form = {k: v[0] for k, v in parse_qs((await request.body()).decode("utf-8", "replace")).items()}
+        if form.get("grant_type") != "urn:ietf:params:oauth:grant-type:jwt-bearer":
+            return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
+        claims = _jwt_claims(form.get("assertion", ""))
+        if not claims or not claims.get("iss") or not claims.get("sub"):
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        return JSONResponse(emu.issue_token(str(claims["sub"])))
+
+    @app.get("/oauth/userinfo")
+    async def userinfo(request: Request) -> Response:
+        sub = emu.subject(request)
+        if sub is None:
+            return unauthorized()
+        base = emu.config.public_url or str(request.base_url)
+        return JSONResponse({
+            "sub": sub,
+            "name": "Emulated User",
+            "email": "emulator@example.org",
+            "accounts": [
+                {"account_id": a, "is_default": i == 0, "account_name": f"Emulated Account {i + 1}",
+                 "base_uri": base.rstrip("/")}
+                for i, a in enumerate(emu.store.accounts)
+            ],
+        })
+
+    def check_account(request: Request, account_id: str) -> Optional[Response]:
+        if emu.subject(request) is None:
+            return unauthorized()
+        if account_id.lower() not in emu.store.accounts:
+            return _error(400, "USER_DOES_NOT_BELONG_TO_SPECIFIED_ACCOUNT",
+                          "The specified User is not a member of the specified Account.")
+        return None
+
+    @app.get(REST_PREFIX + "/{account_id}")
+    async def account(request: Request, account_id: str) -> Response:
+        denied = check_account(request, account_id)
+        if denied is not None:
+            return denied
+        i = emu.store.accounts.index(account_id.lower())
+        return JSONResponse({"accountIdGuid": account_id, "accountName": f"Emulated Account {i + 1}",
+                             "planName": "DEVCENTER_DEMO_APRIL2013", "status": "active"})
+
+    @app.get(REST_PREFIX + "/{account_id}/envelopes/{envelope_id}")
+    async def envelope(request: Request, account_id: str, envelope_id: str) -> Response:
+        denied = check_account(request, account_id)
+        if denied is not None:
+            return denied
+        got = emu.store.get(account_id, envelope_id)
+        if got is None:
+            return _error(404, "ENVELOPE_DOES_NOT_EXIST", "The envelope specified either does not exist or you "
+                          "have no rights to the envelope.")
+        body, etag = got
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(body, headers={"ETag": etag})
+
+    @app.get(REST_PREFIX + "/{account_id}/envelopes")
+    async def envelopes(request: Request, account_id: str) -> Response:
+        denied = check_account(request, account_id)
+        if denied is not None:
+            return denied
+        q = request.query_params
+        if q.get("envelope_ids"):
+            found = emu.store.by_ids(account_id, q["envelope_ids"].split(","))
+            total = len(found)
+        elif q.get("from_date"):
+            start, count = int(q.get("start_position", "0") or 0), min(int(q.get("count", "100") or 100), 1000)
+            found, total = emu.store.changed_since(account_id, q["from_date"], start, count)
+        else:
+            return _error(400, "INVALID_REQUEST_PARAMETER", "The request contained at least one invalid "
+                          "parameter. A value for 'from_date', 'envelope_ids' or 'transaction_ids' must be set.")
+        return JSONResponse({"resultSetSize": str(len(found)), "totalSetSize": str(total), "envelopes": found})
+
+    @app.get("/_emulator/stats")
+    async def stats() -> Dict[str, Any]:
+        return emu.status()
+
+    @app.put("/_emulator/faults")
+    async def put_faults(request: Request) -> Response:
+        try:
+            emu.set_faults(json.loads(await request.body() or b"{}"))
+        except (ValueError, TypeError) as e:
+            return JSONResponse({"detail": str(e)}, status_code=400)
+        return JSONResponse({g: asdict(f) for g, f in emu.faults.items()})
+
+    @app.post("/_emulator/reset")
+    async def reset() -> Dict[str, Any]:
+        emu.reset_stats()
+        return {"ok": True}
+
+    return app
+
+
+# -- Connect sender -----------------------------------------------------------
+
+
+class ConnectSender:
+    """
+    POST a synthetic Connect feed (bench.payloads) through `transport` at
+    `rate` deliveries/s (0 = as fast as `concurrency` allows). Each envelope
+    is updated in the store before its event is sent, as DocuSign changes
+    the envelope before it notifies.
+
+    A failed delivery (non-2xx or transport error) is re-sent, byte-identical,
+    after retry_delay_s, doubling, up to `retries` times, like Connect's
+    retry queue. Retries do not hold a concurrency slot while waiting.
+    """
+
+    def __init__(
+        self,
+        store: EnvelopeStore,
+        transport: Any,
+        *,
+        rate: float,
+        count: int,
+        concurrency: int,
+        seed: int,
+        mix: PayloadMix,
+        path: str = WEBHOOK_PATH,
+        retries: int = 3,
+        retry_delay_s: float = 5.0,
+        timeout_s: float = 30.0,
+    ) -> None:
+        self.store = store
+        self.transport = transport
+        self.rate = rate
+        self.count = count
+        self.concurrency = max(1, concurrency)
+        self.seed = seed
+        self.mix = mix
+        self.path = path
+        self.retries = retries
+        self.retry_delay_s = retry_delay_s
+        self.timeout_s = timeout_s
+        self.counts: Dict[str, int] = {"generated": 0, "attempts": 0, "delivered": 0, "retried": 0, "failed": 0}
+        self.statuses: Dict[str, int] = {}
+        self.running = False
+        self._latencies: Deque[float] = deque(maxlen=10000)
+        self._t0 = 0.0
+        self._wall = 0.0
+
+    async def _post(self, d: Any) -> bool:
+        self.counts["attempts"] += 1
+        t0 = time.perf_counter()
+        try:
+            status, _, _ = await asyncio.wait_for(
+                self.transport.request("POST", self.path, d.body, d.headers), self.timeout_s
+            )
+            key = str(status)
+        except Exception:
+            status, key = 0, "error"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if 200 <= status < 300:
+            self._latencies.append(time.perf_counter() - t0)
+            return True
+        return False
+
+    async def _deliver(self, d: Any, slots: asyncio.Semaphore) -> None:
+        try:
+            ok = await self._post(d)
+        finally:
+            slots.release()
+        attempt = 0
+        while not ok and attempt < self.retries:
+            await asyncio.sleep(self.retry_delay_s * 2 ** attempt)
+            attempt += 1
+            self.counts["retried"] += 1
+            async with slots:
+                ok = await self._post(d)
+        self.counts["delivered" if ok else "failed"] += 1
+
+    async def run(self) -> Dict[str, Any]:
+        slots = asyncio.Semaphore(self.concurrency)
+        inflight: "set[asyncio.Task[None]]" = set()
+        stream = connect_stream(self.count or 2**62, seed=self.seed, mix=self.mix, accounts=self.store.accounts)
+        self.running, self._t0 = True, time.perf_counter()
+        try:
+            for i, d in enumerate(stream):
+                if self.rate > 0:
+                    delay = self._t0 + i / self.rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if not d.duplicate:
+                    self.store.apply(str(d.meta["account_id"]), d.envelope_id, str(d.meta["status"]),
+                                     d.meta["generated_at"])  # type: ignore[arg-type]
+                self.counts["generated"] += 1
+                await slots.acquire()
+                task = asyncio.create_task(self._deliver(d, slots))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+            while inflight:
+                await asyncio.wait(set(inflight))
+        finally:
+            for task in inflight:
+                task.cancel()
+            self.running = False
+            self._wall = time.perf_counter() - self._t0
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        wall = (time.perf_counter() - self._t0) if self.running else self._wall
+        # Latencies are the last 10000 deliveries; rates use the full counts.
+        out = summarize(list(self._latencies), wall, self.counts["failed"])
+        out["requests"] = self.counts["generated"]
+        out["throughput_rps"] = round(self.counts["delivered"] / wall, 2) if wall > 0 else 0.0
+        out.update(self.counts)
+        out["statuses"] = dict(self.statuses)
+        out["running"] = self.running
+        out["target_rate"] = self.rate
+        return out
+
+
+# -- running ------------------------------------------------------------------
+
+
+def write_key(path: str) -> str:
+    """
+    Write a throwaway RSA private key (PEM) for DS_PRIVATE_KEY_PATH; the
+    emulator does not check signatures.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return path
+
+
+class RunningEmulator:
+    def __init__(self, emulator: Emulator, server: Any, thread: threading.Thread, base_url: str) -> None:
+        self.emulator = emulator
+        self.server = server
+        self.thread = thread
+        self.base_url = base_url
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10.0)
+
+
+def serve_in_thread(emulator: Emulator, host: str = "127.0.0.1") -> RunningEmulator:
+    """
+    Run the emulator under uvicorn on a free port in a daemon thread (its own
+    event loop), for bench scenarios.
+    """
+    import socket
+
+    import uvicorn
+
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(emulator), log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, name="ds-emulator", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10.0
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("DocuSign emulator did not start")
+        time.sleep(0.01)
+    return RunningEmulator(emulator, server, thread, f"http://{host}:{port}")
+
+
+def _load_faults(value: str) -> Dict[str, Any]:
+    if not value:
+        return {}
+    if value.lstrip().startswith("{"):
+        return json.loads(value)
+    with open(value, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Local DocuSign emulator (OAuth, envelope reads, Connect sender).")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8090)
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--accounts", type=int, default=5)
+    p.add_argument("--envelopes", type=int, default=0, help="pre-created envelopes")
+    p.add_argument("--token-ttl", type=int, default=3600, help="access token expires_in (s)")
+    p.add_argument("--faults", default="", help="fault spec: inline JSON or a JSON file")
+    p.add_argument("--public-url", default="", help="base_uri returned by userinfo")
+    p.add_argument("--connect-target", default="", help="gateway base URL to POST Connect deliveries to")
+    p.add_argument("--connect-path", default=WEBHOOK_PATH)
+    p.add_argument("--connect-rate", type=float, default=20.0, help="deliveries/s (0 = unpaced)")
+    p.add_argument("--connect-count", type=int, default=0, help="deliveries to send (0 = until stopped)")
+    p.add_argument("--connect-concurrency", type=int, default=8)
+    p.add_argument("--connect-hmac-key", default=os.getenv("DS_CONNECT_HMAC_KEY", ""),
+                   help="sign deliveries (x-docusign-signature-1)")
+    p.add_argument("--document-fraction", type=float, default=0.02)
+    p.add_argument("--write-key", metavar="PATH", help="write a throwaway RSA key for DS_PRIVATE_KEY_PATH and exit")
+    args = p.parse_args(argv)
+
+    if args.write_key:
+        print(write_key(args.write_key))
+        return 0
+    try:
+        faults = _load_faults(args.faults)
+        parse_faults(faults)
+    except (OSError, ValueError, TypeError) as e:
+        p.error(f"--faults: {e}")
+
+    import uvicorn
+
+    emulator = Emulator(EmulatorConfig(
+        seed=args.seed,
+        accounts=args.accounts,
+        envelopes=args.envelopes,
+        token_ttl_s=args.token_ttl,
+        faults=faults,
+        public_url=args.public_url,
+        connect_target=args.connect_target,
+        connect_path=args.connect_path,
+        connect_rate=args.connect_rate,
+        connect_count=args.connect_count,
+        connect_concurrency=args.connect_concurrency,
+        connect_hmac_key=args.connect_hmac_key,
+        connect_document_fraction=args.document_fraction,
+    ))
+    print(f"DocuSign emulator on http://{args.host}:{args.port} accounts={','.join(emulator.store.accounts)}")
+    uvicorn.run(create_app(emulator), host=args.host, port=args.port, log_level="warning", access_log=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Envelope lifecycle as Connect reports it (event name, envelope status).
+LIFECYCLE: Tuple[Tuple[str, str], ...] = (
+    ("envelope-sent", "sent"),
+    ("recipient-delivered", "delivered"),
+    ("recipient-completed", "completed"),
+    ("envelope-completed", "completed"),
+)
+TERMINAL_ALTERNATIVES: Tuple[Tuple[str, str], ...] = (
+    ("envelope-declined", "declined"),
+    ("envelope-voided", "voided"),
+)
+
+# Traefik in front of the gateway adds these to every delivery.
+_EDGE_HEADERS = {
+    "x-forwarded-for": "162.248.184.11",
+    "x-forwarded-host": "gateway.example.org",
+    "x-forwarded-port": "443",
+    "x-forwarded-proto": "https",
+    "x-forwarded-server": "traefik-0",
+    "x-real-ip": "162.248.184.11",
+    "accept-encoding": "gzip",
+}
+
+
+@dataclass
+class PayloadMix:
+    """
+    Size/shape distribution of a synthetic Connect stream.
+
+    Defaults approximate a production Connect feed: mostly small event
+    notifications, a tail of envelope summaries with recipients, and a small
+    fraction carrying base64 documents (includeDocuments=true).
+    """
+
+    summary_fraction: float = 0.30
+    document_fraction: float = 0.02
+    document_kb_range: Tuple[int, int] = (64, 2048)
+    duplicate_fraction: float = 0.08
+    recipients_range: Tuple[int, int] = (1, 6)
+    accounts: int = 5
+    hmac_key: Optional[bytes] = None
+
+
+@dataclass
+class Delivery:
+    body: bytes
+    headers: Dict[str, str]
+    envelope_id: str
+    event: str
+    duplicate: bool = False
+    meta: Dict[str, object] = field(default_factory=dict)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _pdf_bytes(rng: random.Random, size_kb: int) -> str:
+    # Incompressible-ish content like a real PDF stream, base64 encoded.
+    raw = rng.randbytes(size_kb * 1024)
+    return base64.b64encode(b"%PDF-1.7\n" + raw).decode("ascii")
+
+
+def _recipients(rng: random.Random, n: int, status: str) -> Dict[str, List[Dict[str, object]]]:
+    signers = []
+    for i in range(n):
+        signers.append(
+            {
+                "recipientId": str(i + 1),
+                "recipientIdGuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                "name": f"Signer {i + 1}",
+                "email": f"signer{i + 1}@example.org",
+                "routingOrder": str(i + 1),
+                "status": status,
+                "deliveryMethod": "email",
+            }
+        )
+    return {"signers": signers, "carbonCopies": [], "recipientCount": str(n)}
+
+
+def sign(body: bytes, key: bytes) -> str:
+    """
+    DocuSign Connect HMAC: base64(HMAC-SHA256(key, body)).
+    """
+    return base64.b64encode(hmac.new(key, body, hashlib.sha256).digest()).decode("ascii")
+
+
+def build_delivery(
+    rng: random.Random,
+    mix: PayloadMix,
+    *,
+    envelope_id: str,
+    account_id: str,
+    event: str,
+    status: str,
+    generated_at: datetime,
+    retry_count: int = 0,
+    extra: Optional[Dict[str, object]] = None,
+) -> Delivery:
+    data: Dict[str, object] = {
+        "accountId": account_id,
+        "userId": str(uuid.UUID(int=rng.getrandbits(128))),
+        "envelopeId": envelope_id,
+    }
+    if event.startswith("recipient-"):
+        data["recipientId"] = str(rng.randint(1, 3))
+
+    roll = rng.random()
+    with_docs = roll < mix.document_fraction
+    if with_docs or roll < mix.summary_fraction:
+        n = rng.randint(*mix.recipients_range)
+        summary: Dict[str, object] = {
+            "status": status,
+            "emailSubject": f"Please sign: Agreement {envelope_id[:8]}",
+            "sender": {"userName": "Gateway Demo", "email": "sender@example.org", "accountId": account_id},
+            "recipients": _recipients(rng, n, status),
+            "createdDateTime": _iso(generated_at - timedelta(hours=1)),
+            "statusChangedDateTime": _iso(generated_at),
+        }
+        if with_docs:
+            kb = rng.randint(*mix.document_kb_range)
+            summary["envelopeDocuments"] = [
+                {"documentId": "1", "name": "agreement.pdf", "type": "content", "PDFBytes": _pdf_bytes(rng, kb)},
+            ]
+        data["envelopeSummary"] = summary
+
+    payload: Dict[str, object] = {
+        "event": event,
+        "apiVersion": "v2.1",
+        "uri": f"/restapi/v2.1/accounts/{account_id}/envelopes/{envelope_id}",
+        "retryCount": retry_count,
+        "configurationId": 10501234,
+        "generatedDateTime": _iso(generated_at),
+        "data": data,
+    }
+    if extra:
+        payload.update(extra)
+
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {
+        "content-type": "application/json; charset=utf-8",
+        "user-agent": "DocuSign Connect Service/1.0",
+        "x-docusign-tls-certificate": "ds-connect-client",
+        **_EDGE_HEADERS,
+        "x-request-id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "content-length": str(len(body)),
+    }
+    if mix.hmac_key:
+        headers["x-docusign-signature-1"] = sign(body, mix.hmac_key)
+    return Delivery(
+        body=body,
+        headers=headers,
+        envelope_id=envelope_id,
+        event=event,
+        meta={"with_documents": with_docs, "generated_at": generated_at, "account_id": account_id, "status": status},
+    )
+
+
+_STATUS_OF = dict(LIFECYCLE + TERMINAL_ALTERNATIVES)
+_XML_HEAD = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<DocuSignEnvelopeInformation xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns="http://www.docusign.net/API/3.0">'
+)
+
+
+def _el(tag: str, value: object) -> str:
+    return f"<{tag}>{escape(str(value))}</{tag}>"
+
+
+def legacy_xml(d: Delivery) -> Delivery:
+    """
+    The same delivery as a legacy Connect (DocuSignEnvelopeInformation) XML
+    body: envelope status, recipients, an AccountId custom field, and
+    documents as base64 PDFBytes wrapped at 76 columns. Signature headers
+    are dropped (the body changed).
+    """
+    payload = json.loads(d.body)
+    data = payload["data"]
+    summary = data.get("envelopeSummary") or {}
+    status = str(summary.get("status") or _STATUS_OF.get(payload["event"], "sent"))
+    generated = str(payload["generatedDateTime"]).rstrip("Z")
+
+    recipients = []
+    for r in (summary.get("recipients") or {}).get("signers", []):
+        recipients.append(
+            "<RecipientStatus>" + _el("Type", "Signer") + _el("Email", r["email"]) + _el("UserName", r["name"])
+            + _el("RoutingOrder", r["routingOrder"]) + _el("Sent", generated)
+            + '<DeclineReason xsi:nil="true" />' + _el("Status", str(r["status"]).capitalize())
+            + _el("RecipientId", r["recipientIdGuid"]) + "</RecipientStatus>"
+        )
+    docs = summary.get("envelopeDocuments") or []
+    parts = [
+        _XML_HEAD,
+        "<EnvelopeStatus><RecipientStatuses>", "".join(recipients), "</RecipientStatuses>",
+        _el("TimeGenerated", generated),
+        _el("EnvelopeID", data["envelopeId"]),
+        _el("Subject", summary.get("emailSubject") or "Please sign"),
+        _el("UserName", "Gateway Demo"),
+        _el("Email", "sender@example.org"),
+        _el("Status", status.capitalize()),
+        "<CustomFields><CustomField>", _el("Name", "AccountId"), _el("Show", "false"),
+        _el("Value", data["accountId"]), "</CustomField></CustomFields>",
+        "<DocumentStatuses>",
+        "".join(
+            "<DocumentStatus>" + _el("ID", doc["documentId"]) + _el("Name", doc["name"])
+            + _el("Sequence", doc["documentId"]) + "</DocumentStatus>"
+            for doc in docs
+        ),
+        "</DocumentStatuses></EnvelopeStatus>",
+    ]
+    if docs:
+        parts.append("<DocumentPDFs>")
+        for doc in docs:
+            b64 = doc["PDFBytes"]
+            wrapped = "\n".join(b64[i:i + 76] for i in range(0, len(b64), 76))
+            parts.append(
+                "<DocumentPDF>" + _el("Name", doc["name"]) + "<PDFBytes>" + wrapped + "</PDFBytes>"
+                + _el("DocumentID", doc["documentId"]) + _el("DocumentType", "CONTENT") + "</DocumentPDF>"
+            )
+        parts.append("</DocumentPDFs>")
+    parts.append("</DocuSignEnvelopeInformation>")
+
+    body = "".join(parts).encode("utf-8")
+    headers = {k: v for k, v in d.headers.items() if not k.startswith("x-docusign-signature-")}
+    headers["content-type"] = "text/xml; charset=utf-8"
+    headers["content-length"] = str(len(body))
+    return Delivery(
+        body=body, headers=headers, envelope_id=d.envelope_id, event=d.event, duplicate=d.duplicate, meta=d.meta
+    )
+
+
+def connect_stream(
+    n: int,
+    *,
+    seed: int = 1234,
+    mix: Optional[PayloadMix] = None,
+    start: Optional[datetime] = None,
+    accounts: Optional[Sequence[str]] = None,
+) -> Iterator[Delivery]:
+    """
+    Yield n deliveries: interleaved envelope lifecycles plus duplicate retries
+    (byte-identical re-sends, which the ledger must dedupe). `accounts`
+    replaces the random account ids (e.g. the emulator's accounts).
+    """
+    mix = mix or PayloadMix()
+    rng = random.Random(seed)
+    now = start or datetime.now(timezone.utc)
+    generated = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(mix.accounts)]
+    accounts = list(accounts) if accounts else generated
+    active: List[Dict[str, object]] = []
+    recent: List[Delivery] = []
+    produced = 0
+
+    while produced < n:
+        if recent and rng.random() < mix.duplicate_fraction:
+            d = rng.choice(recent)
+            yield Delivery(body=d.body, headers=dict(d.headers), envelope_id=d.envelope_id, event=d.event, duplicate=True)
+            produced += 1
+            continue
+
+        if not active or (len(active) < 64 and rng.random() < 0.3):
+            steps = list(LIFECYCLE)
+            if rng.random() < 0.1:
+                steps = steps[:2] + [rng.choice(TERMINAL_ALTERNATIVES)]
+            active.append(
+                {
+                    "envelope_id": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "account_id": rng.choice(accounts),
+                    "steps": steps,
+                    "i": 0,
+                }
+            )
+
+        env = rng.choice(active)
+        event, status = env["steps"][env["i"]]  # type: ignore[index]
+        now += timedelta(milliseconds=rng.randint(5, 1500))
+        d = build_delivery(
+            rng,
+            mix,
+            envelope_id=str(env["envelope_id"]),
+            account_id=str(env["account_id"]),
+            event=event,
+            status=status,
+            generated_at=now,
+        )
+        env["i"] = int(env["i"]) + 1  # type: ignore[call-overload]
+        if env["i"] >= len(env["steps"]):  # type: ignore[arg-type]
+            active.remove(env)
+        recent.append(d)
+        if len(recent) > 256:
+            recent.pop(0)
+        yield d
+        produced += 1
@@ -0,0 +1,241 @@
+"""
+Gateway benchmark runner.
+
+    python -m bench.run                                  # all scenarios, in-process
+    python -m bench.run -s ingest_burst --target uvicorn --workers 2
+    python -m bench.run --quick --out bench_output.json
+    python -m bench.run --baseline bench/baseline.json   # fail on regression
+    python -m bench.run --update-baseline                # record a new baseline
+    python -m bench.run --quick --repeat 3               # per-metric median of 3 runs
+
+Each scenario runs in a fresh child process against a fresh temporary DB so
+results (and RSS) are not polluted by earlier scenarios.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bench.compare import Thresholds, compare, format_report
+from bench.scenarios import SCENARIOS, Options
+from bench.stats import merge_repeats, peak_rss_bytes, rss_bytes
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = ROOT / "bench" / "baseline.json"
+
+QUICK = Options(requests=300, concurrency=16, pollers=2, ledger_rows=2000, stats_queries=10, subscribers=5)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _tree_rss(pid: int) -> Optional[int]:
+    total = rss_bytes(pid)
+    if total is None:
+        return None
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    except OSError:
+        children = []
+    for c in children:
+        total += rss_bytes(int(c)) or 0
+    return total
+
+
+def _start_uvicorn(env: Dict[str, str], workers: int) -> "tuple[subprocess.Popen, str]":
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "gateway.app:app", "--host", "127.0.0.1",
+           "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=str(ROOT), env=env)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc, base
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+async def _run_child(name: str, opts: Options, target: str, workers: int) -> Dict[str, Any]:
+    from bench.client import HttpTransport, InProcessTransport
+
+    fn = SCENARIOS[name]
+    if target == "inprocess":
+        from gateway.app import app
+
+        async with InProcessTransport(app) as t:
+            result = await fn(t, opts)
+        result["rss_bytes"] = rss_bytes()
+        result["peak_rss_bytes"] = peak_rss_bytes()
+        return result
+
+    proc = None
+    base = target
+    if target == "uvicorn":
+        proc, base = _start_uvicorn(dict(os.environ), workers)
+    try:
+        async with HttpTransport(base, pool_size=max(opts.concurrency, 8) + opts.pollers) as t:
+            result = await fn(t, opts)
+        if proc is not None:
+            result["rss_bytes"] = _tree_rss(proc.pid)
+        return result
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def _spawn(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix=f"pug-bench-{name}-") as tmp:
+        env = dict(os.environ)
+        env.setdefault("PYTHONPATH", str(ROOT))
+        if args.target in ("inprocess", "uvicorn"):
+            env["GATEWAY_DB_PATH"] = str(Path(tmp) / "gateway.db")
+            env["GATEWAY_DB_ENABLED"] = "1"
+            if args.workers > 1:
+                env["GATEWAY_METRICS_DIR"] = str(Path(tmp) / "metrics")
+        out = Path(tmp) / "result.json"
+        cmd = [sys.executable, "-m", "bench.run", "--child", "-s", name, "--target", args.target,
+               "--workers", str(args.workers), "--out", str(out), "--options", json.dumps(args.options)]
+        t0 = time.perf_counter()
+        rc = subprocess.call(cmd, cwd=str(ROOT), env=env)
+        if rc != 0 or not out.exists():
+            return {"error": f"scenario exited with {rc}"}
+        result = json.loads(out.read_text())
+        result["scenario_seconds"] = round(time.perf_counter() - t0, 3)
+        return result
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), text=True).strip()
+    except Exception:
+        return None
+
+
+def _thresholds(args: argparse.Namespace, recorded: Dict[str, Any]) -> Thresholds:
+    """
+    Command-line thresholds, else those stored with the baseline, else the defaults.
+    """
+    t = Thresholds(**recorded)
+    return dataclasses.replace(
+        t,
+        throughput_pct=t.throughput_pct if args.throughput_pct is None else args.throughput_pct,
+        latency_pct=t.latency_pct if args.latency_pct is None else args.latency_pct,
+        rss_pct=t.rss_pct if args.rss_pct is None else args.rss_pct,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="repeatable; default all")
+    ap.add_argument("--target", default="inprocess", help="inprocess | uvicorn | http://host:port")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn --workers for --target uvicorn")
+    ap.add_argument("--quick", action="store_true", help="small sizes for smoke runs")
+    ap.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE", help="override an Options field")
+    ap.add_argument("--out", type=Path, help="write results JSON here")
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--repeat", type=int, default=1, help="run each scenario N times, keep the per-metric median")
+    ap.add_argument("--throughput-pct", type=float, help="default: the baseline's, else 15")
+    ap.add_argument("--latency-pct", type=float, help="default: the baseline's, else 25")
+    ap.add_argument("--rss-pct", type=float, help="default: the baseline's, else 20")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--options", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        os.chdir(ROOT)
+        opts = Options(**json.loads(args.options))
+        result = asyncio.run(_run_child(args.scenario[0], opts, args.target, args.workers))
+        args.out.write_text(json.dumps(result, indent=2))
+        return 0
+
+    base = QUICK if args.quick else Options()
+    overrides: Dict[str, Any] = {}
+    for item in args.set:
+        k, _, v = item.partition("=")
+        field_type = type(getattr(base, k))
+        overrides[k] = field_type(v)
+    opts = dataclasses.replace(base, **overrides)
+    args.options = dataclasses.asdict(opts)
+
+    names = args.scenario or list(SCENARIOS)
+    results: Dict[str, Any] = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "target": args.target,
+            "workers": args.workers,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "options": args.options,
+            "repeat": args.repeat,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        print(f"[bench] {name} ...", file=sys.stderr, flush=True)
+        results["scenarios"][name] = merge_repeats([_spawn(name, args) for _ in range(max(1, args.repeat))])
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        args.out.write_text(text)
+    else:
+        print(text)
+
+    over_budget = [n for n, r in results["scenarios"].items() if r.get("budget", {}).get("ok") is False]
+    for n in over_budget:
+        print(f"[bench] {n}: over budget {results['scenarios'][n]['budget']}", file=sys.stderr)
+
+    # A failed scenario has no metrics to compare, so it would pass silently.
+    failed = [n for n, r in results["scenarios"].items() if "error" in r]
+    for n in failed:
+        print(f"[bench] {n}: failed {results['scenarios'][n]}", file=sys.stderr)
+    if failed and args.update_baseline:
+        print("[bench] baseline not written: scenarios failed", file=sys.stderr)
+        return 1
+
+    if args.update_baseline:
+        results["meta"]["thresholds"] = dataclasses.asdict(_thresholds(args, {}))
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"[bench] baseline written: {args.baseline}", file=sys.stderr)
+        return 0
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        meta = baseline.get("meta", {})
+        if meta.get("options") != args.options or meta.get("repeat", 1) != args.repeat:
+            print("[bench] warning: baseline was recorded with different options", file=sys.stderr)
+        findings = compare(results, baseline, _thresholds(args, meta.get("thresholds") or {}))
+        print(format_report(findings), file=sys.stderr)
+        if any(f.regression for f in findings):
+            return 1
+    else:
+        print(f"[bench] no baseline at {args.baseline}; run with --update-baseline to record one", file=sys.stderr)
+    return 1 if over_budget or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,930 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bench.payloads import Delivery, PayloadMix, connect_stream, legacy_xml
+from bench.stats import summarize
+
+WEBHOOK_PATH = "/webhooks/docusign"
+MONITOR_POLL = "/events/latest?limit=80&include_body=1&include_json_obj=1"
+
+
+@dataclass
+class Options:
+    requests: int = 2000
+    concurrency: int = 32
+    seed: int = 1234
+    pollers: int = 4
+    poll_interval_s: float = 0.25
+    ledger_rows: int = 20000
+    stats_queries: int = 50
+    subscribers: int = 20
+    document_fraction: float = 0.02
+    startup_runs: int = 5
+    startup_budget_ms: float = 2000.0
+    enrich_batch_size: int = 50
+    enrich_linger_ms: float = 500.0
+    stub_latency_ms: float = 50.0
+    analytics_days: float = 7.0
+    emu_latency_ms: float = 40.0
+    emu_latency_max_ms: float = 400.0
+    emu_rate_429: float = 0.02
+    emu_rate_5xx: float = 0.01
+    emu_connect_rate: float = 0.0
+    integrity_partitions: int = 8
+    integrity_jobs: int = 0
+    heavy_readers: int = 4
+
+
+Scenario = Callable[[Any, Options], Awaitable[Dict[str, Any]]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str) -> Callable[[Scenario], Scenario]:
+    def deco(fn: Scenario) -> Scenario:
+        SCENARIOS[name] = fn
+        return fn
+
+    return deco
+
+
+def _deliveries(opts: Options, n: Optional[int] = None, seed_offset: int = 0) -> List[Delivery]:
+    mix = PayloadMix(document_fraction=opts.document_fraction)
+    return list(connect_stream(n or opts.requests, seed=opts.seed + seed_offset, mix=mix))
+
+
+async def _ingest(
+    transport: Any, deliveries: List[Delivery], concurrency: int
+) -> Dict[str, Any]:
+    """
+    POST deliveries with bounded concurrency; returns latency summary.
+    """
+    latencies: List[float] = []
+    errors = 0
+    spooled = 0
+    statuses: Dict[str, int] = {}
+    it = iter(deliveries)
+
+    async def worker() -> None:
+        nonlocal errors, spooled
+        for d in it:
+            t0 = time.perf_counter()
+            try:
+                status, body, _ = await transport.request("POST", WEBHOOK_PATH, d.body, d.headers)
+            except Exception:
+                errors += 1
+                continue
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - t0)
+                spooled += bool(json.loads(body).get("spooled"))
+            else:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    out = summarize(latencies, wall, errors)
+    out["statuses"] = statuses
+    # ACKed from the spool instead of written: should be ~0 on a healthy DB.
+    out["spooled"] = spooled
+    out["body_bytes"] = sum(len(d.body) for d in deliveries)
+    return out
+
+
+def seed_ledger(rows: int, seed: int) -> float:
+    """
+    Write rows straight through the persistence layer (no HTTP) so read
+    scenarios start from a large ledger. Returns seconds spent.
+    """
+    from gateway.db.events_store import persist_inbound_event
+
+    t0 = time.perf_counter()
+    for d in connect_stream(rows, seed=seed, mix=PayloadMix(document_fraction=0.0, duplicate_fraction=0.0)):
+        persist_inbound_event(
+            source="docusign",
+            method="POST",
+            host="bench.local",
+            path=WEBHOOK_PATH,
+            remote_addr="127.0.0.1",
+            headers=d.headers,
+            raw_body=d.body,
+            json_parsed=json.loads(d.body),
+        )
+    return time.perf_counter() - t0
+
+
+@scenario("ingest_burst")
+async def ingest_burst(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Connect burst: opts.requests deliveries at opts.concurrency in flight.
+    """
+    deliveries = _deliveries(opts)
+    return {"ingest": await _ingest(transport, deliveries, opts.concurrency)}
+
+
+@scenario("mixed_ingest_monitor")
+async def mixed_ingest_monitor(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Ingest burst while opts.pollers monitor UIs poll /events/latest with bodies.
+    """
+    deliveries = _deliveries(opts)
+    stop = asyncio.Event()
+    poll_lat: List[float] = []
+    poll_err = 0
+
+    async def poller() -> None:
+        nonlocal poll_err
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                status, _, _ = await transport.request("GET", MONITOR_POLL)
+                if status == 200:
+                    poll_lat.append(time.perf_counter() - t0)
+                else:
+                    poll_err += 1
+            except Exception:
+                poll_err += 1
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=opts.poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    t0 = time.perf_counter()
+    pollers = [asyncio.create_task(poller()) for _ in range(opts.pollers)]
+    ingest = await _ingest(transport, deliveries, opts.concurrency)
+    stop.set()
+    await asyncio.gather(*pollers)
+    return {"ingest": ingest, "monitor_poll": summarize(poll_lat, time.perf_counter() - t0, poll_err)}
+
+
+@scenario("stats_large_ledger")
+async def stats_large_ledger(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    /events/stats/summary and /events/latest against a ledger of opts.ledger_rows.
+    """
+    seed_s = await asyncio.to_thread(seed_ledger, opts.ledger_rows, opts.seed + 7)
+    results: Dict[str, Any] = {"seed_rows": opts.ledger_rows, "seed_seconds": round(seed_s, 3)}
+    for name, target in (
+        ("stats_summary", "/events/stats/summary"),
+        ("latest_with_body", MONITOR_POLL),
+    ):
+        lat: List[float] = []
+        errors = 0
+        t0 = time.perf_counter()
+        for _ in range(opts.stats_queries):
+            q0 = time.perf_counter()
+            status, _, _ = await transport.request("GET", target)
+            if status == 200:
+                lat.append(time.perf_counter() - q0)
+            else:
+                errors += 1
+        results[name] = summarize(lat, time.perf_counter() - t0, errors)
+    return results
+
+
+HEAVY_READS = (
+    "/events/stats/summary",
+    "/events/latest?limit=200&include_body=1&body_max_chars=200000&include_json_obj=1",
+)
+
+
+@scenario("ingest_heavy_reads")
+async def ingest_heavy_reads(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Ingest latency alone, then the same burst while opts.heavy_readers
+    clients loop over full-table stats scans and 200-row /events/latest
+    fetches with bodies, against a ledger of opts.ledger_rows. Reads run
+    on the reader pool, so ingest p99 should barely move.
+    """
+    seed_s = await asyncio.to_thread(seed_ledger, opts.ledger_rows, opts.seed + 71)
+    results: Dict[str, Any] = {"seed_rows": opts.ledger_rows, "seed_seconds": round(seed_s, 3)}
+    results["ingest_alone"] = await _ingest(transport, _deliveries(opts, seed_offset=72), opts.concurrency)
+
+    stop = asyncio.Event()
+    lat: Dict[str, List[float]] = {t: [] for t in HEAVY_READS}
+    errors: Dict[str, int] = {t: 0 for t in HEAVY_READS}
+
+    async def reader(k: int) -> None:
+        i = k
+        while not stop.is_set():
+            target = HEAVY_READS[i % len(HEAVY_READS)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                status, body, _ = await transport.request("GET", target)
+                ok = status == 200 and b'"ready":true' in body[:200]
+            except Exception:
+                ok = False
+            if ok:
+                lat[target].append(time.perf_counter() - t0)
+            else:
+                errors[target] += 1
+
+    t0 = time.perf_counter()
+    readers = [asyncio.create_task(reader(k)) for k in range(opts.heavy_readers)]
+    results["ingest_with_reads"] = await _ingest(transport, _deliveries(opts, seed_offset=73), opts.concurrency)
+    stop.set()
+    await asyncio.gather(*readers)
+    wall = time.perf_counter() - t0
+    for target, name in zip(HEAVY_READS, ("stats_summary", "latest_200_with_body")):
+        results[name] = summarize(lat[target], wall, errors[target])
+    alone, loaded = results["ingest_alone"], results["ingest_with_reads"]
+    results["p99_ratio"] = round(loaded["p99_ms"] / alone["p99_ms"], 2) if alone.get("p99_ms") else None
+    return results
+
+
+@scenario("sse_fanout")
+async def sse_fanout(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    opts.subscribers SSE monitor clients; measures POST-to-delivery latency
+    per subscriber while a burst is ingested.
+    """
+    n = max(1, opts.requests // 4)
+    deliveries = []
+    for i, d in enumerate(_deliveries(opts, n=n, seed_offset=11)):
+        body = json.loads(d.body)
+        body["benchSeq"] = i
+        raw = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        deliveries.append(Delivery(body=raw, headers={**d.headers, "content-length": str(len(raw))},
+                                   envelope_id=d.envelope_id, event=d.event))
+
+    sent_at: Dict[int, float] = {}
+    fanout_lat: List[float] = []
+    received = [0] * opts.subscribers
+    stop = asyncio.Event()
+    ready = asyncio.Event()
+    connected = 0
+
+    async def subscriber(idx: int) -> None:
+        nonlocal connected
+        connected += 1
+        if connected == opts.subscribers:
+            ready.set()
+        async for evt in transport.sse("/webhooks/monitor/stream", stop):
+            seq = (evt.get("json") or {}).get("benchSeq")
+            if seq in sent_at:
+                fanout_lat.append(time.perf_counter() - sent_at[seq])
+                received[idx] += 1
+                if received[idx] >= len(deliveries):
+                    return
+
+    subs = [asyncio.create_task(subscriber(i)) for i in range(opts.subscribers)]
+    await ready.wait()
+    await asyncio.sleep(0.2)  # let every stream register its queue
+
+    latencies: List[float] = []
+    errors = 0
+    it = iter(enumerate(deliveries))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i, d in it:
+            sent_at[i] = time.perf_counter()
+            status, _, _ = await transport.request("POST", WEBHOOK_PATH, d.body, d.headers)
+            if status == 200:
+                latencies.append(time.perf_counter() - sent_at[i])
+            else:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, opts.concurrency // 4))))
+    try:
+        await asyncio.wait_for(asyncio.gather(*subs), timeout=30)
+    except asyncio.TimeoutError:
+        pass
+    stop.set()
+    wall = time.perf_counter() - t0
+    for t in subs:
+        t.cancel()
+    expected = len(deliveries) * opts.subscribers
+    return {
+        "ingest": summarize(latencies, wall, errors),
+        "fanout": {**summarize(fanout_lat, wall), "delivered": len(fanout_lat), "expected": expected},
+    }
+
+
+def _headers_storage(rows: int, seed: int) -> Dict[str, Any]:
+    import sqlite3
+    import tempfile
+    from pathlib import Path
+
+    from gateway.db.headers import KnownSets, encode_inline, header_set_key, split_headers
+
+    corpus = [d.headers for d in connect_stream(rows, seed=seed, mix=PayloadMix(document_fraction=0.0, hmac_key=b"bench"))]
+    out: Dict[str, Any] = {"rows": rows}
+
+    with tempfile.TemporaryDirectory(prefix="pug-bench-headers-") as tmp:
+        for layout in ("inline", "dictionary"):
+            path = Path(tmp) / f"{layout}.db"
+            conn = sqlite3.connect(str(path))
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute("CREATE TABLE header_sets (set_hash TEXT PRIMARY KEY, headers_json TEXT NOT NULL, first_seen_at TEXT NOT NULL)")
+            conn.execute("CREATE TABLE ev (id INTEGER PRIMARY KEY, headers_json TEXT NOT NULL, header_set_hash TEXT)")
+            known = KnownSets()
+            lat: List[float] = []
+            t_all = time.perf_counter()
+            for h in corpus:
+                t0 = time.perf_counter()
+                if layout == "inline":
+                    conn.execute("INSERT INTO ev (headers_json) VALUES (?)", (json.dumps(h, default=str),))
+                else:
+                    stable, volatile = split_headers(h)
+                    set_hash, set_json = header_set_key(stable)
+                    if set_hash not in known:
+                        conn.execute("INSERT OR IGNORE INTO header_sets VALUES (?, ?, '')", (set_hash, set_json))
+                        known.add(set_hash)
+                    conn.execute(
+                        "INSERT INTO ev (headers_json, header_set_hash) VALUES (?, ?)",
+                        (encode_inline(volatile), set_hash),
+                    )
+                conn.commit()
+                lat.append(time.perf_counter() - t0)
+            wall = time.perf_counter() - t_all
+            row_bytes = conn.execute(
+                "SELECT coalesce(sum(length(headers_json) + coalesce(length(header_set_hash), 0)), 0) FROM ev"
+            ).fetchone()[0]
+            set_bytes = conn.execute("SELECT coalesce(sum(length(set_hash) + length(headers_json)), 0) FROM header_sets").fetchone()[0]
+            sets = conn.execute("SELECT count(*) FROM header_sets").fetchone()[0]
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            conn.execute("VACUUM;")
+            conn.close()
+            out[layout] = {
+                "insert": summarize(lat, wall),
+                "header_bytes": row_bytes + set_bytes,
+                "bytes_per_row": round((row_bytes + set_bytes) / max(1, rows), 1),
+                "header_sets": sets,
+                "file_bytes": path.stat().st_size,
+            }
+    inline_b = out["inline"]["header_bytes"]
+    out["bytes_saved_pct"] = round((1 - out["dictionary"]["header_bytes"] / inline_b) * 100, 1) if inline_b else 0.0
+    return out
+
+
+@scenario("headers_storage")
+async def headers_storage(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Offline comparison of inline headers_json vs the header-set dictionary
+    (bytes per row, file size, per-insert latency) on a realistic corpus.
+    """
+    return await asyncio.to_thread(_headers_storage, opts.requests, opts.seed)
+
+
+@scenario("ingest_db_outage")
+async def ingest_db_outage(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Burst while another connection holds an exclusive SQLite lock for the
+    middle third of it: ingest latency/throughput before, during and after the
+    outage, and how long the spool takes to drain back into events.
+    """
+    import sqlite3
+    import threading
+
+    from gateway.db.sqlite import db_path
+
+    deliveries = _deliveries(opts, seed_offset=23)
+    third = max(1, len(deliveries) // 3)
+    await transport.request("GET", "/health/ready")  # apply schema first
+
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_lock() -> None:
+        conn = sqlite3.connect(db_path(), timeout=30)
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+            held.set()
+            release.wait(60)
+            conn.commit()
+        finally:
+            conn.close()
+
+    results: Dict[str, Any] = {}
+    results["before"] = await _ingest(transport, deliveries[:third], opts.concurrency)
+    locker = threading.Thread(target=hold_lock, daemon=True)
+    locker.start()
+    await asyncio.to_thread(held.wait, 30)
+    results["outage"] = await _ingest(transport, deliveries[third:2 * third], opts.concurrency)
+    release.set()
+    await asyncio.to_thread(locker.join, 30)
+    results["after"] = await _ingest(transport, deliveries[2 * third:], opts.concurrency)
+
+    t0 = time.perf_counter()
+    backlog = None
+    spooled = 0
+    while time.perf_counter() - t0 < 120:
+        status, body, _ = await transport.request("GET", "/health/ready")
+        spool = json.loads(body).get("spool", {}) if status == 200 else {}
+        backlog = spool.get("backlog_bytes")
+        spooled = spool.get("spooled", 0)
+        if backlog == 0 and not spool.get("bypassing_db"):
+            break
+        await asyncio.sleep(0.1)
+    results["recovery"] = {
+        "seconds": round(time.perf_counter() - t0, 3),
+        "spooled": spooled,
+        "backlog_bytes_left": backlog,
+    }
+    return results
+
+
+_IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import gateway.app\n"
+    "ms = (time.perf_counter() - t0) * 1000\n"
+    "heavy = sorted(m for m in ('requests', 'jwt', 'cryptography', 'numpy') if m in sys.modules)\n"
+    "print(json.dumps({'import_ms': ms, 'heavy_modules': heavy}))\n"
+)
+
+
+def _cold_start(opts: Options) -> Dict[str, Any]:
+    import os
+    import socket
+    import subprocess
+    import sys
+    import urllib.request
+    from pathlib import Path
+
+    root = Path(__file__).resolve().parent.parent
+    env = dict(os.environ)
+    import_ms: List[float] = []
+    heavy: List[str] = []
+    for _ in range(max(1, opts.startup_runs)):
+        out = subprocess.check_output([sys.executable, "-c", _IMPORT_PROBE], cwd=str(root), env=env, text=True)
+        probe = json.loads(out.strip().splitlines()[-1])
+        import_ms.append(probe["import_ms"])
+        heavy = probe["heavy_modules"]
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    base = f"http://127.0.0.1:{port}"
+    d = next(iter(connect_stream(1, seed=opts.seed)))
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "gateway.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=str(root), env=env,
+    )
+    ready_ms = first_ack_ms = None
+    try:
+        while time.perf_counter() - t0 < 30 and first_ack_ms is None:
+            try:
+                if ready_ms is None:
+                    with urllib.request.urlopen(base + "/health", timeout=1) as r:
+                        if r.status == 200:
+                            ready_ms = (time.perf_counter() - t0) * 1000
+                req = urllib.request.Request(base + WEBHOOK_PATH, data=d.body, headers=d.headers, method="POST")
+                with urllib.request.urlopen(req, timeout=5) as r:
+                    if r.status == 200:
+                        first_ack_ms = (time.perf_counter() - t0) * 1000
+            except OSError:
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    import_ms.sort()
+    median = import_ms[len(import_ms) // 2]
+    return {
+        "import": {"median_ms": round(median, 1), "runs_ms": [round(x, 1) for x in import_ms]},
+        "heavy_modules_at_import": heavy,
+        "ready_ms": round(ready_ms, 1) if ready_ms is not None else None,
+        "first_ack_ms": round(first_ack_ms, 1) if first_ack_ms is not None else None,
+        "budget": {
+            "first_ack_limit_ms": opts.startup_budget_ms,
+            "ok": first_ack_ms is not None and first_ack_ms <= opts.startup_budget_ms,
+        },
+    }
+
+
+@scenario("cold_start")
+async def cold_start(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Fresh-interpreter import time of gateway.app (median of opts.startup_runs)
+    and spawn-to-first-ACK of a uvicorn worker, checked against
+    opts.startup_budget_ms. Ignores the transport; always spawns its own server.
+    """
+    return await asyncio.to_thread(_cold_start, opts)
+
+
+def _list_status_stub(latency_s: float) -> Any:
+    """
+    Local stand-in for GET .../envelopes?envelope_ids=...: a real HTTP server
+    on 127.0.0.1 that answers every id with a summary and counts calls.
+    """
+    import threading
+    import urllib.parse
+    import urllib.request
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    calls: List[int] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            ids = [i for i in query.get("envelope_ids", [""])[0].split(",") if i]
+            calls.append(len(ids))
+            time.sleep(latency_s)
+            body = json.dumps(
+                {"envelopes": [{"envelopeId": i, "status": "sent", "statusChangedDateTime": "2026-01-01T00:00:00Z"}
+                               for i in ids], "resultSetSize": str(len(ids))}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def list_status(account_id: str, envelope_ids: Any) -> List[Dict[str, Any]]:
+        q = urllib.parse.urlencode({"envelope_ids": ",".join(envelope_ids)})
+        with urllib.request.urlopen(f"{base}/restapi/v2.1/accounts/{account_id}/envelopes?{q}", timeout=15) as r:
+            return json.loads(r.read())["envelopes"]
+
+    return server, calls, list_status
+
+
+@scenario("enrichment_batching")
+async def enrichment_batching(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Burst of Connect deliveries with the enricher pointed at a local
+    list-status stub: upstream calls made vs one GET per event, events per
+    call, and time for the enrichment backlog to drain. In-process only.
+    """
+    from bench.client import InProcessTransport
+    from gateway.services.enrichment import ENRICHER
+
+    if not isinstance(transport, InProcessTransport):
+        return {"skipped": "needs the in-process transport (enricher backend is swapped)"}
+
+    server, calls, list_status = _list_status_stub(opts.stub_latency_ms / 1000.0)
+    previous = ENRICHER.list_status
+    ENRICHER.batch_size = max(1, opts.enrich_batch_size)
+    ENRICHER.linger_s = opts.enrich_linger_ms / 1000.0
+    ENRICHER.use(list_status)
+    try:
+        ingest = await _ingest(transport, _deliveries(opts, seed_offset=31), opts.concurrency)
+        t0 = time.perf_counter()
+        while ENRICHER.pending and time.perf_counter() - t0 < 60:
+            await asyncio.sleep(0.05)
+        drain_s = time.perf_counter() - t0
+        st = ENRICHER.status()
+    finally:
+        ENRICHER.use(previous)
+        server.shutdown()
+
+    events = st["enriched"] + st["missing"]
+    return {
+        "ingest": ingest,
+        "enrichment": {
+            "events": events,
+            "api_calls": len(calls),
+            "per_event_calls": events,
+            "calls_saved_per_event": round(1 - len(calls) / events, 4) if events else None,
+            "events_per_call": st["events_per_call"],
+            "envelopes_per_call": round(sum(calls) / len(calls), 2) if calls else None,
+            "errors": st["error"],
+            "dropped": st["dropped"],
+            "drain_seconds": round(drain_s, 3),
+        },
+    }
+
+
+# Per-minute counts by event type straight off the row store (the query the
+# snapshots replace): full range scan plus JSON extraction per row.
+_SQL_PER_MINUTE = """
+    SELECT substr(received_at, 1, 16) AS minute, json_extract(json_parsed, '$.event') AS event_type, count(*)
+    FROM events WHERE received_at >= ? GROUP BY minute, event_type
+"""
+
+
+def _seed_spread(rows: int, seed: int, days: float) -> float:
+    """
+    Persist rows with received_at spread evenly over the last `days`, so the
+    compactor has sealed hours to work on. Returns seconds spent.
+    """
+    from datetime import datetime, timedelta, timezone
+
+    from gateway.db.events_store import build_row, persist_rows
+
+    t0 = time.perf_counter()
+    end = datetime.now(timezone.utc) - timedelta(hours=1)
+    step = timedelta(days=days) / max(1, rows)
+    batch = []
+    stream = connect_stream(rows, seed=seed, mix=PayloadMix(document_fraction=0.0, duplicate_fraction=0.0))
+    for i, d in enumerate(stream):
+        received = end - step * (rows - i)
+        batch.append(
+            build_row(
+                source="docusign",
+                method="POST",
+                host="bench.local",
+                path=WEBHOOK_PATH,
+                remote_addr="127.0.0.1",
+                headers=d.headers,
+                raw_body=d.body,
+                json_parsed=json.loads(d.body),
+                received_at=received.isoformat().replace("+00:00", "Z"),
+            )
+        )
+        if len(batch) >= 500:
+            persist_rows(batch)
+            batch = []
+    if batch:
+        persist_rows(batch)
+    return time.perf_counter() - t0
+
+
+@scenario("analytics_snapshots")
+async def analytics_snapshots(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Dashboard aggregations over opts.ledger_rows spread across
+    opts.analytics_days: per-minute counts by event type from the live row
+    store (SQL + json_extract) vs /analytics/* over the columnar snapshots,
+    plus the compaction cost. In-process only (compacts and queries the DB
+    directly).
+    """
+    from datetime import datetime, timedelta, timezone
+
+    from bench.client import InProcessTransport
+    from gateway.db.snapshots import compact
+    from gateway.db.sqlite import connect_read
+
+    if not isinstance(transport, InProcessTransport):
+        return {"skipped": "needs the in-process transport (compacts the local DB)"}
+
+    seed_s = await asyncio.to_thread(_seed_spread, opts.ledger_rows, opts.seed + 41, opts.analytics_days)
+    t0 = time.perf_counter()
+    stats = await asyncio.to_thread(compact, retention_days=opts.analytics_days + 1, grace_s=0.0)
+    results: Dict[str, Any] = {
+        "seed_rows": opts.ledger_rows,
+        "seed_seconds": round(seed_s, 3),
+        "compact": {**stats, "wall_seconds": round(time.perf_counter() - t0, 3)},
+    }
+
+    since = (datetime.now(timezone.utc) - timedelta(days=opts.analytics_days)).isoformat()
+    runs = max(1, min(opts.stats_queries, 10))
+    lat: List[float] = []
+    for _ in range(runs):
+        q0 = time.perf_counter()
+        conn = connect_read()
+        try:
+            await asyncio.to_thread(lambda: conn.execute(_SQL_PER_MINUTE, (since,)).fetchall())
+        finally:
+            conn.close()
+        lat.append(time.perf_counter() - q0)
+    results["sql_per_minute_by_event_type"] = summarize(lat, sum(lat), 0)
+
+    days = f"{opts.analytics_days:g}"
+    for name, target in (
+        ("snapshot_per_minute_by_event_type", f"/analytics/deliveries?bucket=minute&by=event_type&days={days}"),
+        ("snapshot_body_size_by_account", f"/analytics/body-size?by=account&q=0.5,0.95&days={days}"),
+    ):
+        lat, errors = [], 0
+        t0 = time.perf_counter()
+        for _ in range(opts.stats_queries):
+            q0 = time.perf_counter()
+            status, _, _ = await transport.request("GET", target)
+            if status == 200:
+                lat.append(time.perf_counter() - q0)
+            else:
+                errors += 1
+        results[name] = summarize(lat, time.perf_counter() - t0, errors)
+    return results
+
+
+def _point_docusign_at(base_url: str, key_path: str) -> Dict[str, Optional[str]]:
+    """
+    Aim gateway DocuSign settings at an emulator; returns the env to restore.
+    """
+    import os
+
+    from gateway import docusign_auth
+    from gateway.settings import init_settings
+
+    env = {"DS_AUTH_BASE_URL": base_url, "DS_INTEGRATION_KEY": "emulator", "DS_USER_ID": "emulator",
+           "DS_PRIVATE_KEY_PATH": key_path}
+    previous = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    init_settings()
+    docusign_auth._token_cache.update(access_token=None, expires_at=0.0)
+    return previous
+
+
+def _restore_env(previous: Dict[str, Optional[str]]) -> None:
+    import os
+
+    from gateway import docusign_auth
+    from gateway.settings import init_settings
+
+    for k, v in previous.items():
+        if v is None:
+            os.environ.pop(k, None)
+        else:
+            os.environ[k] = v
+    init_settings()
+    docusign_auth._token_cache.update(access_token=None, expires_at=0.0)
+
+
+@scenario("docusign_emulator")
+async def docusign_emulator(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    The real DocuSign client against bench/emulator.py with injected latency
+    (lognormal emu_latency_ms median / emu_latency_max_ms p99), 429s and
+    5xx: cached envelope reads, then a Connect burst from the emulator's
+    sender with the enricher calling list-status on the emulator. In-process
+    only (repoints DocuSign settings).
+    """
+    import tempfile
+
+    from bench.client import InProcessTransport
+    from bench.emulator import ConnectSender, Emulator, EmulatorConfig, serve_in_thread, write_key
+    from gateway.docusign_client import CLIENT, DocuSignHTTPError
+    from gateway.services.enrichment import ENRICHER, _docusign_list_status
+
+    if not isinstance(transport, InProcessTransport):
+        return {"skipped": "needs the in-process transport (DocuSign settings are repointed)"}
+
+    faults = {"rest": {"latency": "lognormal", "latency_ms": opts.emu_latency_ms,
+                       "latency_max_ms": opts.emu_latency_max_ms, "rate_429": opts.emu_rate_429,
+                       "rate_5xx": opts.emu_rate_5xx}}
+    emu = Emulator(EmulatorConfig(seed=opts.seed + 51, envelopes=200, faults=faults))
+    running = await asyncio.to_thread(serve_in_thread, emu)
+    tmp = tempfile.TemporaryDirectory()
+    previous_env = _point_docusign_at(running.base_url, write_key(f"{tmp.name}/key.pem"))
+    prev_backend, prev_active, prev_reason = ENRICHER.list_status, ENRICHER.active, ENRICHER.reason
+    results: Dict[str, Any] = {}
+    try:
+        # Cached reads: a hot set of envelopes, read concurrently.
+        reads = emu.seeded[:50]
+        lat: List[float] = []
+        failures: Dict[str, int] = {}
+        it = iter(range(opts.requests))
+
+        async def reader() -> None:
+            for i in it:
+                account, envelope = reads[i % len(reads)]
+                t0 = time.perf_counter()
+                try:
+                    await asyncio.to_thread(CLIENT.envelope, account, envelope)
+                except DocuSignHTTPError as e:
+                    failures[str(e.status_code)] = failures.get(str(e.status_code), 0) + 1
+                    continue
+                lat.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(reader() for _ in range(min(opts.concurrency, 16))))
+        results["client_reads"] = {
+            **summarize(lat, time.perf_counter() - t0, sum(failures.values())),
+            "failures": failures,
+            "upstream": dict(emu.stats["rest"]),
+        }
+
+        # Connect burst; enrichment goes through the real client.
+        emu.reset_stats()
+        ENRICHER.use(_docusign_list_status)
+        sender = ConnectSender(
+            emu.store,
+            transport,
+            rate=opts.emu_connect_rate,
+            count=opts.requests,
+            concurrency=opts.concurrency,
+            seed=opts.seed + 52,
+            mix=PayloadMix(document_fraction=opts.document_fraction),
+            retries=2,
+            retry_delay_s=0.5,
+        )
+        results["connect"] = await sender.run()
+        t0 = time.perf_counter()
+        while ENRICHER.pending and time.perf_counter() - t0 < 60:
+            await asyncio.sleep(0.05)
+        st = ENRICHER.status()
+        results["enrichment"] = {
+            "events": st["events"],
+            "enriched": st["enriched"],
+            "missing": st["missing"],
+            "errors": st["error"],
+            "dropped": st["dropped"],
+            "api_calls": st["calls"],
+            "rate_limited_calls": st["rate_limited"],
+            "events_per_call": st["events_per_call"],
+            "drain_seconds": round(time.perf_counter() - t0, 3),
+        }
+        results["emulator"] = {
+            "requests": emu.stats,
+            "injected_seconds": {g: round(v, 3) for g, v in emu.injected_s.items()},
+        }
+    finally:
+        ENRICHER.list_status, ENRICHER.active, ENRICHER.reason = prev_backend, prev_active, prev_reason
+        _restore_env(previous_env)
+        await asyncio.to_thread(running.stop)
+        tmp.cleanup()
+    return results
+
+
+@scenario("integrity_verify")
+async def integrity_verify(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Hash-chain verification over opts.ledger_rows: sealing into
+    opts.integrity_partitions checkpoints, full verification on one process
+    vs opts.integrity_jobs (0 = all cores), the projected time for 10M
+    events, then one edited and one deleted row, which must both be
+    reported. In-process only (writes the local DB directly).
+    """
+    import os
+
+    from bench.client import InProcessTransport
+    from gateway.db import integrity
+    from gateway.db.sqlite import connect
+
+    if not isinstance(transport, InProcessTransport):
+        return {"skipped": "needs the in-process transport (verifies and edits the local DB)"}
+
+    seed_s = await asyncio.to_thread(_seed_spread, opts.ledger_rows, opts.seed + 61, 1.0)
+    partition = max(16, opts.ledger_rows // max(1, opts.integrity_partitions))
+    t0 = time.perf_counter()
+    sealed = await asyncio.to_thread(integrity.audit, partition=partition)
+    results: Dict[str, Any] = {
+        "seed_rows": opts.ledger_rows,
+        "seed_rows_per_s": round(opts.ledger_rows / seed_s) if seed_s else None,
+        "seal": {"partitions": len(sealed["sealed"]), "seconds": round(time.perf_counter() - t0, 3)},
+    }
+    keys = ("ok", "rows", "ranges", "jobs", "seconds", "cpu_seconds", "rows_per_s")
+    jobs = opts.integrity_jobs or os.cpu_count() or 1
+    for label, j in (("full_1", 1), (f"full_{jobs}", jobs))[: 2 if jobs > 1 else 1]:
+        out = await asyncio.to_thread(integrity.verify_ledger, jobs=j, record=False)
+        results[label] = {k: out[k] for k in keys}
+        if out["rows"]:
+            # From CPU time per row: pool start-up does not grow with the ledger.
+            per_row = out["cpu_seconds"] / out["rows"]
+            results[label]["projected_10m_minutes"] = round(10_000_000 * per_row / out["jobs"] / 60, 1)
+
+    conn = connect()
+    try:
+        conn.execute("UPDATE events SET path = '/tampered' WHERE chain_seq = ?", (opts.ledger_rows // 3,))
+        conn.execute("DELETE FROM events WHERE chain_seq = ?", (opts.ledger_rows // 2,))
+        conn.commit()
+    finally:
+        conn.close()
+    out = await asyncio.to_thread(integrity.verify_ledger, jobs=jobs, record=False)
+    results["after_tamper"] = {
+        "ok": out["ok"],
+        "findings": sorted({f"{f['kind']}@{f['seq']}" for f in out["findings"]}),
+    }
+    return results
+
+
+@scenario("connect_xml")
+async def connect_xml(transport: Any, opts: Options) -> Dict[str, Any]:
+    """
+    Two bursts of opts.requests // 2: Connect JSON, then legacy XML with
+    the same mix (opts.document_fraction with base64 documents). Ingest
+    latency per format, stored json_parsed vs body size (rows with and
+    without documents), and the blobs the documents went to.
+    """
+    from gateway.db.blobs import blob_dir
+    from gateway.db.sqlite import connect_read
+
+    n = max(1, opts.requests // 2)
+    results: Dict[str, Any] = {
+        "json": await _ingest(transport, _deliveries(opts, n, seed_offset=91), opts.concurrency),
+        "xml": await _ingest(transport, [legacy_xml(d) for d in _deliveries(opts, n, seed_offset=92)], opts.concurrency),
+    }
+
+    conn = connect_read()
+    try:
+        rows = conn.execute(
+            """
+            SELECT coalesce(json_extract(json_parsed, '$.connectFormat'), 'json'),
+                   json_extract(json_parsed, '$.data.envelopeSummary.envelopeDocuments') IS NOT NULL,
+                   count(*), avg(body_size), avg(length(json_parsed)), max(length(json_parsed))
+            FROM events WHERE json_parsed IS NOT NULL GROUP BY 1, 2
+            """
+        ).fetchall()
+    finally:
+        conn.close()
+    stored: Dict[str, Any] = {}
+    for fmt, with_docs, count, body, parsed, parsed_max in rows:
+        stored[f"{fmt}_{'documents' if with_docs else 'plain'}"] = {
+            "rows": count,
+            "avg_body_bytes": round(body),
+            "avg_json_parsed_bytes": round(parsed),
+            "max_json_parsed_bytes": parsed_max,
+        }
+    results["stored"] = stored
+    blobs = [p for p in blob_dir().glob("??/*") if p.is_file()]
+    results["blobs"] = {"files": len(blobs), "bytes": sum(p.stat().st_size for p in blobs)}
+    return results
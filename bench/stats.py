@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import resource
+import statistics
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """
+    Nearest-rank percentile on pre-sorted data (p in 0..100).
+    """
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies_s: List[float], wall_s: float, errors: int = 0) -> Dict[str, float]:
+    lat = sorted(latencies_s)
+    n = len(lat)
+    return {
+        "requests": n + errors,
+        "errors": errors,
+        "throughput_rps": round(n / wall_s, 2) if wall_s > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 99) * 1000, 3),
+        "max_ms": round((lat[-1] if lat else 0.0) * 1000, 3),
+    }
+
+
+def median_of(runs: Sequence[Any]) -> Any:
+    """
+    Element-wise median of repeated results of one scenario: numbers become
+    the median across runs, anything else is taken from the first run that
+    has it. Dict keys are the union over all runs (a key only some runs
+    produced is the median of those).
+    """
+    first = runs[0]
+    if isinstance(first, dict):
+        keys = dict.fromkeys(k for r in runs if isinstance(r, dict) for k in r)
+        return {k: median_of([r[k] for r in runs if isinstance(r, dict) and k in r]) for k in keys}
+    if all(isinstance(r, (int, float)) and not isinstance(r, bool) for r in runs):
+        return statistics.median(runs)
+    return first
+
+
+def merge_repeats(runs: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    One scenario's result from its repeats: median_of, unless any repeat
+    failed ({"error": ...}), which fails the scenario.
+    """
+    failed = [r for r in runs if "error" in r]
+    if failed:
+        return {"error": failed[0]["error"], "failed_runs": len(failed), "runs": len(runs)}
+    return median_of(runs)
+
+
+def rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """
+    Current RSS of pid (default: this process). Linux /proc only for other pids.
+    """
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid is None:
+        return peak_rss_bytes()
+    return None
+
+
+def peak_rss_bytes() -> int:
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return int(r if sys.platform == "darwin" else r * 1024)
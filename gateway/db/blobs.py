@@ -0,0 +1,117 @@
+"""
+Content-addressed files for documents taken out of webhook payloads.
+
+Connect deliveries with includeDocuments carry each PDF base64-encoded in
+the body. The Connect parser (gateway/services/connect_parser.py) decodes
+them in chunks into a BlobWriter and keeps only a reference in json_parsed:
+
+    <GATEWAY_BLOB_DIR>/<sha256[:2]>/<sha256>      default blobs/ next to the DB
+
+A blob is written to a temp name and renamed once complete, so a reader
+never sees a partial file; the same document delivered twice (retries,
+every status event of an envelope) is stored once. The events row keeps the
+original body, so blobs are a derived copy: they are not fsynced, and a
+lost one can be re-extracted from body_raw.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+
+from gateway.db.sqlite import db_path
+
+log = logging.getLogger("gateway.db.blobs")
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_seq = itertools.count()
+
+
+def blob_dir() -> Path:
+    d = os.getenv("GATEWAY_BLOB_DIR", "").strip()
+    return Path(d) if d else Path(db_path()).parent / "blobs"
+
+
+def blob_path(digest: str, directory: Optional[Path] = None) -> Optional[Path]:
+    """
+    Where the blob with this sha256 hex lives, or None for a malformed digest.
+    """
+    digest = digest.lower()
+    if not _DIGEST_RE.match(digest):
+        return None
+    return (directory or blob_dir()) / digest[:2] / digest
+
+
+class BlobWriter:
+    """
+    Hashes everything written and streams it to a temp file in `directory`.
+    With directory None, or after a write error, it only hashes (the blob is
+    then reported as not stored and the delivery is still accepted).
+    """
+
+    def __init__(self, directory: Optional[Path]) -> None:
+        self.directory = directory
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._tmp: Optional[Path] = None
+        self._f = None
+        if directory is not None:
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+                self._tmp = directory / f".tmp-{os.getpid()}-{next(_seq)}"
+                self._f = open(self._tmp, "wb")
+            except OSError as e:
+                self._fail(e)
+
+    def _fail(self, e: OSError) -> None:
+        log.warning("blob write failed in %s: %r", self.directory, e)
+        self.abort()
+
+    def write(self, data: bytes) -> None:
+        self._sha.update(data)
+        self.size += len(data)
+        if self._f is not None:
+            try:
+                self._f.write(data)
+            except OSError as e:
+                self._fail(e)
+
+    def close(self) -> Tuple[str, str]:
+        """
+        Finish the blob: (sha256 hex, result) with result "stored" (new
+        file), "existing" (already there) or "unstored" (not written).
+        """
+        digest = self._sha.hexdigest()
+        if self._f is None or self._tmp is None or self.directory is None:
+            return digest, "unstored"
+        try:
+            self._f.close()
+            self._f = None
+            final = self.directory / digest[:2] / digest
+            if final.exists():
+                self._tmp.unlink()
+                return digest, "existing"
+            final.parent.mkdir(exist_ok=True)
+            os.replace(self._tmp, final)
+            return digest, "stored"
+        except OSError as e:
+            self._fail(e)
+            return digest, "unstored"
+
+    def abort(self) -> None:
+        f, self._f = self._f, None
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+        if self._tmp is not None:
+            try:
+                self._tmp.unlink()
+            except OSError:
+                pass
+            self._tmp = None
@@ -0,0 +1,110 @@
+"""
+Hash chain over the events ledger, so edits are evident (ADR-0010).
+
+Every events row inserted by events_store.insert_rows carries
+
+    row_hash    sha256 of the row's canonical content (ROW_COLUMNS)
+    chain_seq   previous chain_seq + 1, in insertion (commit) order
+    chain_hash  sha256(previous chain_hash || row_hash); 32 zero bytes before the first
+
+chain_seq and chain_hash are computed by the INSERT statement itself: it
+reads the current head under the write lock and calls chain_link(), a SQL
+function registered on every write connection. Concurrent writers cannot
+fork the chain, and the batch insert makes no extra round trip. Dedupe hits
+(INSERT OR IGNORE) take no sequence number.
+
+body_raw / body_codec are outside the hash (compress_bodies rewrites them);
+body_sha256, which is inside, covers the uncompressed body. Rows written
+before the chain existed have chain_seq NULL ("unchained").
+
+Sealed ranges of the chain carry Merkle roots over their row hashes
+(chain_checkpoints; see gateway/db/integrity.py), so one event can be proven
+against a checkpoint without the rest of the chain.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+ROW_COLUMNS: Tuple[str, ...] = (
+    "event_id", "kind", "source", "namespace",
+    "correlation_id", "parent_event_id", "received_at",
+    "method", "host", "path", "remote_addr", "status_code",
+    "headers_json", "header_set_hash", "body_size", "body_sha256", "json_parsed",
+    "verify_status", "verify_reason", "dedupe_key",
+)
+
+GENESIS = bytes(32)
+
+
+def row_hash(values: Sequence[Any]) -> str:
+    """
+    sha256 hex of one row's ROW_COLUMNS values (str, int or None), in order.
+    """
+    return hashlib.sha256(json.dumps(list(values), separators=(",", ":")).encode("ascii")).hexdigest()
+
+
+def link(prev_chain_hash: Optional[str], row_hash_hex: str) -> str:
+    """
+    The chain_hash following prev_chain_hash (None before the first row).
+    Registered as the SQL function chain_link(prev, row_hash).
+    """
+    prev = bytes.fromhex(prev_chain_hash) if prev_chain_hash else GENESIS
+    return hashlib.sha256(prev + bytes.fromhex(row_hash_hex)).hexdigest()
+
+
+def register(conn: Any) -> None:
+    conn.create_function("chain_link", 2, link, deterministic=True)
+
+
+# -- Merkle trees over a partition's row hashes -------------------------------
+# Leaves and inner nodes are domain-separated (0x00 / 0x01, as in RFC 6962);
+# an odd node at the end of a level is carried up unchanged.
+
+
+def _leaf(row_hash_hex: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(row_hash_hex)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _up(level: List[bytes]) -> List[bytes]:
+    up = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        up.append(level[-1])
+    return up
+
+
+def merkle_root(row_hashes: Sequence[str]) -> str:
+    if not row_hashes:
+        return hashlib.sha256(b"").hexdigest()
+    level = [_leaf(h) for h in row_hashes]
+    while len(level) > 1:
+        level = _up(level)
+    return level[0].hex()
+
+
+def merkle_path(row_hashes: Sequence[str], index: int) -> List[Tuple[str, str]]:
+    """
+    Audit path for row_hashes[index]: (side, sibling hex) from the leaf up,
+    side "L" when the sibling is on the left.
+    """
+    level = [_leaf(h) for h in row_hashes]
+    path: List[Tuple[str, str]] = []
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(("L" if sibling < index else "R", level[sibling].hex()))
+        level = _up(level)
+        index //= 2
+    return path
+
+
+def verify_path(row_hash_hex: str, path: Sequence[Tuple[str, str]], root: str) -> bool:
+    h = _leaf(row_hash_hex)
+    for side, sibling in path:
+        h = _node(bytes.fromhex(sibling), h) if side == "L" else _node(h, bytes.fromhex(sibling))
+    return h.hex() == root
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from gateway.db.sqlite import connect, wal_path
+from gateway.services.roles import ROLES
+from gateway.services.metrics import (
+    DB_CHECKPOINT_SECONDS,
+    DB_CHECKPOINTS_TOTAL,
+    DB_WAL_BYTES,
+)
+
+log = logging.getLogger("gateway.db.checkpoint")
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def checkpoint_enabled() -> bool:
+    if os.getenv("GATEWAY_DB_ENABLED", "1").strip() == "0":
+        return False
+    return os.getenv("GATEWAY_DB_CHECKPOINT_ENABLED", "1").strip() != "0"
+
+
+@dataclass(frozen=True)
+class CheckpointResult:
+    mode: str  # PASSIVE|TRUNCATE
+    busy: bool
+    log_frames: int
+    checkpointed_frames: int
+    duration_s: float
+    wal_bytes_before: int
+    wal_bytes_after: int
+    at: float
+
+
+def wal_size() -> int:
+    try:
+        return wal_path().stat().st_size
+    except OSError:
+        return 0
+
+
+def _wal_idle_for() -> float:
+    """
+    Seconds since any process last appended to the WAL (mtime-based, so it
+    also sees writes from sibling uvicorn workers).
+    """
+    try:
+        return max(0.0, time.time() - wal_path().stat().st_mtime)
+    except OSError:
+        return float("inf")
+
+
+def run_checkpoint(mode: str) -> CheckpointResult:
+    """
+    Run one wal_checkpoint on a short-lived connection. May raise.
+
+    PASSIVE copies what it can without waiting on readers or writers.
+    TRUNCATE waits (bounded by busy_timeout) for readers to finish, then
+    resets the WAL to zero bytes.
+    """
+    before = wal_size()
+    t0 = time.perf_counter()
+    conn = connect()
+    try:
+        # Keep TRUNCATE from stalling writers for the full default busy timeout.
+        conn.execute("PRAGMA busy_timeout=1000;")
+        busy, log_frames, ckpt_frames = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+    finally:
+        conn.close()
+    duration = time.perf_counter() - t0
+    after = wal_size()
+
+    DB_CHECKPOINT_SECONDS.labels(mode).observe(duration)
+    DB_CHECKPOINTS_TOTAL.labels(mode, "busy" if busy else "ok").inc()
+    DB_WAL_BYTES.set(after)
+    return CheckpointResult(
+        mode=mode,
+        busy=bool(busy),
+        log_frames=int(log_frames),
+        checkpointed_frames=int(ckpt_frames),
+        duration_s=round(duration, 6),
+        wal_bytes_before=before,
+        wal_bytes_after=after,
+        at=time.time(),
+    )
+
+
+class CheckpointScheduler:
+    """
+    Background WAL checkpointing.
+
+    - While the WAL is being written: PASSIVE every interval (never blocks ingest).
+    - Once the WAL has been idle for idle_after seconds: one TRUNCATE, so the
+      file shrinks back to zero instead of staying at its burst high-water mark.
+
+    Runs in the worker holding the "wal-checkpoint" role; the others only
+    report WAL size.
+    """
+
+    def __init__(
+        self,
+        interval_s: Optional[float] = None,
+        idle_after_s: Optional[float] = None,
+    ) -> None:
+        self.interval_s = interval_s or _float_env("GATEWAY_DB_CHECKPOINT_INTERVAL_SECONDS", 5.0)
+        self.idle_after_s = idle_after_s or _float_env("GATEWAY_DB_CHECKPOINT_IDLE_SECONDS", 30.0)
+        self.last: Optional[CheckpointResult] = None
+        self.last_error = ""
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        ROLES.register("wal-checkpoint")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="wal-checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def tick(self) -> Optional[CheckpointResult]:
+        size = wal_size()
+        DB_WAL_BYTES.set(size)
+        if size == 0 or ROLES.token("wal-checkpoint") is None:
+            return None
+        mode = "TRUNCATE" if _wal_idle_for() >= self.idle_after_s else "PASSIVE"
+        try:
+            result = run_checkpoint(mode)
+        except Exception as e:
+            self.last_error = repr(e)
+            DB_CHECKPOINTS_TOTAL.labels(mode, "error").inc()
+            log.warning("WAL checkpoint (%s) failed: %r", mode, e)
+            return None
+        self.last = result
+        self.last_error = ""
+        self.runs += 1
+        if result.duration_s > 1.0 or result.busy:
+            log.info(
+                "WAL checkpoint %s busy=%s frames=%d/%d %.3fs wal=%d->%d bytes",
+                mode, result.busy, result.checkpointed_frames, result.log_frames,
+                result.duration_s, result.wal_bytes_before, result.wal_bytes_after,
+            )
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.tick()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running(),
+            "leader": ROLES.token("wal-checkpoint") is not None,
+            "interval_s": self.interval_s,
+            "idle_after_s": self.idle_after_s,
+            "wal_bytes": wal_size(),
+            "runs": self.runs,
+            "last": asdict(self.last) if self.last else None,
+            "last_error": self.last_error or None,
+        }
+
+
+_SCHEDULER: Optional[CheckpointScheduler] = None
+
+
+def start_scheduler() -> Optional[CheckpointScheduler]:
+    global _SCHEDULER
+    if not checkpoint_enabled():
+        return None
+    if _SCHEDULER is None:
+        _SCHEDULER = CheckpointScheduler()
+    _SCHEDULER.start()
+    return _SCHEDULER
+
+
+def stop_scheduler() -> None:
+    if _SCHEDULER is not None:
+        _SCHEDULER.stop()
+
+
+def scheduler_status() -> Dict[str, Any]:
+    if _SCHEDULER is None:
+        return {"running": False, "wal_bytes": wal_size()}
+    return _SCHEDULER.status()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import bz2
+import lzma
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from gateway.services.metrics import (
+    BODY_CODEC_BYTES_TOTAL,
+    BODY_COMPRESS_SECONDS,
+    BODY_COMPRESSION_RATIO,
+    BODY_DECOMPRESS_SECONDS,
+)
+
+# events.body_codec: NULL means body_raw holds the original bytes (all rows
+# written before compression existed, and bodies under the size threshold).
+IDENTITY = "identity"
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    compress: Callable[[bytes, int], bytes]
+    decompressor: Callable[[], Any]  # object with .decompress(data, max_length) and .eof
+    default_level: int
+
+
+def _zlib_decompressor() -> Any:
+    return zlib.decompressobj()
+
+
+def _gzip_compress(data: bytes, level: int) -> bytes:
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return c.compress(data) + c.flush()
+
+
+def _gzip_decompressor() -> Any:
+    return zlib.decompressobj(31)
+
+
+CODECS: Dict[str, Codec] = {
+    "zlib": Codec("zlib", lambda d, lvl: zlib.compress(d, lvl), _zlib_decompressor, 6),
+    "gzip": Codec("gzip", _gzip_compress, _gzip_decompressor, 6),
+    "bz2": Codec("bz2", lambda d, lvl: bz2.compress(d, lvl), bz2.BZ2Decompressor, 9),
+    "lzma": Codec("lzma", lambda d, lvl: lzma.compress(d, preset=lvl), lzma.LZMADecompressor, 6),
+}
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class BodyPolicy:
+    codec: Optional[str]  # None disables compression
+    level: int
+    min_bytes: int
+
+
+def policy_from_env() -> BodyPolicy:
+    """
+    GATEWAY_BODY_CODEC               zlib (default) | gzip | bz2 | lzma | none
+    GATEWAY_BODY_CODEC_LEVEL         codec level (default: the codec's own)
+    GATEWAY_BODY_COMPRESS_MIN_BYTES  smaller bodies stay raw (default 1024)
+    """
+    name = os.getenv("GATEWAY_BODY_CODEC", "zlib").strip().lower()
+    codec = CODECS.get(name)
+    return BodyPolicy(
+        codec=codec.name if codec else None,
+        level=_int_env("GATEWAY_BODY_CODEC_LEVEL", codec.default_level if codec else 0),
+        min_bytes=_int_env("GATEWAY_BODY_COMPRESS_MIN_BYTES", 1024),
+    )
+
+
+POLICY = policy_from_env()
+
+
+def encode_body(raw: bytes, policy: Optional[BodyPolicy] = None) -> Tuple[bytes, Optional[str]]:
+    """
+    Returns (stored_bytes, codec_name). codec_name is None when the body is
+    stored as-is (compression disabled, body under threshold, or no gain).
+    """
+    p = policy or POLICY
+    if p.codec is None or len(raw) < p.min_bytes:
+        BODY_CODEC_BYTES_TOTAL.labels(IDENTITY, "raw").inc(len(raw))
+        BODY_CODEC_BYTES_TOTAL.labels(IDENTITY, "stored").inc(len(raw))
+        return raw, None
+
+    t0 = time.perf_counter()
+    packed = CODECS[p.codec].compress(raw, p.level)
+    BODY_COMPRESS_SECONDS.labels(p.codec).observe(time.perf_counter() - t0)
+    if len(packed) >= len(raw):
+        BODY_CODEC_BYTES_TOTAL.labels(IDENTITY, "raw").inc(len(raw))
+        BODY_CODEC_BYTES_TOTAL.labels(IDENTITY, "stored").inc(len(raw))
+        return raw, None
+
+    BODY_COMPRESSION_RATIO.labels(p.codec).observe(len(raw) / max(1, len(packed)))
+    BODY_CODEC_BYTES_TOTAL.labels(p.codec, "raw").inc(len(raw))
+    BODY_CODEC_BYTES_TOTAL.labels(p.codec, "stored").inc(len(packed))
+    return packed, p.codec
+
+
+def decode_body(stored: Optional[bytes], codec: Optional[str], max_bytes: Optional[int] = None) -> Tuple[bytes, bool]:
+    """
+    Returns (data, complete). With max_bytes set, only that many decoded bytes
+    are produced (the rest of the stream is never inflated) and complete is
+    False when the body continues past them. Unknown codecs raise ValueError.
+    """
+    if stored is None:
+        return b"", True
+    data = bytes(stored)
+    if not codec or codec == IDENTITY:
+        if max_bytes is not None and len(data) > max_bytes:
+            return data[:max_bytes], False
+        return data, True
+
+    c = CODECS.get(codec)
+    if c is None:
+        raise ValueError(f"unknown body codec {codec!r}")
+    t0 = time.perf_counter()
+    d = c.decompressor()
+    if max_bytes is None:
+        out = d.decompress(data)
+        complete = True
+    else:
+        # Ask for one byte more than needed so "exactly max_bytes" is not
+        # mistaken for a truncated body.
+        out = d.decompress(data, max_bytes + 1)
+        complete = len(out) <= max_bytes and d.eof
+        out = out[:max_bytes]
+    BODY_DECOMPRESS_SECONDS.labels(codec, "full" if max_bytes is None else "prefix").observe(
+        time.perf_counter() - t0
+    )
+    return out, complete
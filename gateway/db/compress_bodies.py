@@ -0,0 +1,146 @@
+"""
+Backfill at-rest body compression for rows written before it existed.
+
+    python -m gateway.db.compress_bodies --dry-run
+    python -m gateway.db.compress_bodies --batch 500 --sleep-ms 20
+    python -m gateway.db.compress_bodies --codec lzma --recode --vacuum
+
+Works in short batches (one write transaction each) so it can run next to a
+live gateway. Safe to interrupt and re-run: only rows that still need work
+are touched. Freed pages are reused by new rows; --vacuum returns them to
+the filesystem (takes an exclusive lock for the duration).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import replace
+from typing import Any, Dict
+
+from gateway.db.codecs import CODECS, POLICY, BodyPolicy, decode_body, encode_body
+from gateway.db.init_db import ensure_schema
+from gateway.db.sqlite import connect
+
+
+def backfill(
+    policy: BodyPolicy,
+    *,
+    batch: int = 500,
+    sleep_s: float = 0.0,
+    recode: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Compress stored bodies in rowid order. By default only rows written
+    before compression existed (body_size NULL) are visited; each gets
+    body_size filled in, so a body that did not compress is not tried
+    again on the next run. With recode, rows stored raw or with another
+    codec are re-encoded too (e.g. after running with GATEWAY_BODY_CODEC=none).
+    """
+    where = "body_size IS NULL"
+    params: tuple = ()
+    if recode:
+        where = (
+            "(body_size IS NULL OR (body_codec IS NULL AND length(body_raw) >= ?) "
+            "OR coalesce(body_codec, ?) != ?)"
+        )
+        params = (policy.min_bytes, policy.codec or "", policy.codec or "")
+
+    stats = {"rows_scanned": 0, "rows_updated": 0, "bytes_before": 0, "bytes_after": 0}
+    t0 = time.perf_counter()
+    last = 0
+    conn = connect()
+    try:
+        while True:
+            rows = conn.execute(
+                f"SELECT rowid, body_raw, body_codec FROM events WHERE rowid > ? AND {where} "
+                "ORDER BY rowid LIMIT ?",
+                (last, *params, batch),
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for rowid, stored, codec in rows:
+                raw, _ = decode_body(stored, codec)
+                packed, new_codec = encode_body(raw, policy)
+                stats["rows_scanned"] += 1
+                stats["bytes_before"] += len(stored)
+                stats["bytes_after"] += len(packed)
+                updates.append((packed, new_codec, len(raw), rowid))
+                last = rowid
+            if not dry_run:
+                conn.executemany(
+                    "UPDATE events SET body_raw = ?, body_codec = ?, body_size = ? WHERE rowid = ?",
+                    updates,
+                )
+                conn.commit()
+                stats["rows_updated"] += len(updates)
+            if sleep_s:
+                time.sleep(sleep_s)
+    finally:
+        conn.close()
+
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    before = stats["bytes_before"]
+    stats["ratio"] = round(before / stats["bytes_after"], 2) if stats["bytes_after"] else None
+    stats["bytes_saved"] = before - stats["bytes_after"]
+    return stats
+
+
+def vacuum() -> None:
+    conn = connect()
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        conn.execute("VACUUM;")
+    finally:
+        conn.close()
+
+
+def main(argv: Any = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m gateway.db.compress_bodies", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--codec", choices=sorted(CODECS), help="default: GATEWAY_BODY_CODEC")
+    ap.add_argument("--level", type=int, help="default: GATEWAY_BODY_CODEC_LEVEL")
+    ap.add_argument("--min-bytes", type=int, help="default: GATEWAY_BODY_COMPRESS_MIN_BYTES")
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--sleep-ms", type=float, default=0.0, help="pause between batches")
+    ap.add_argument("--recode", action="store_true", help="also re-encode rows stored raw or with another codec")
+    ap.add_argument("--dry-run", action="store_true", help="report savings without writing")
+    ap.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the file")
+    args = ap.parse_args(argv)
+
+    policy = POLICY
+    if args.codec:
+        policy = BodyPolicy(codec=args.codec, level=CODECS[args.codec].default_level, min_bytes=policy.min_bytes)
+    if args.level is not None:
+        policy = replace(policy, level=args.level)
+    if args.min_bytes is not None:
+        policy = replace(policy, min_bytes=args.min_bytes)
+    if policy.codec is None:
+        print("compression disabled (GATEWAY_BODY_CODEC=none); pass --codec", file=sys.stderr)
+        return 2
+
+    status = ensure_schema()
+    if not status.ready:
+        print(f"DB not ready: {status.mode} {status.detail}", file=sys.stderr)
+        return 2
+
+    stats = backfill(
+        policy,
+        batch=max(1, args.batch),
+        sleep_s=args.sleep_ms / 1000.0,
+        recode=args.recode,
+        dry_run=args.dry_run,
+    )
+    stats.update({"codec": policy.codec, "level": policy.level, "dry_run": args.dry_run})
+    if args.vacuum and not args.dry_run:
+        vacuum()
+        stats["vacuumed"] = True
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from gateway.db.init_db import ensure_schema
+from gateway.db.sqlite import connect
+
+
+@dataclass(frozen=True)
+class EnrichmentRow:
+    event_id: str
+    envelope_id: str
+    account_id: str
+    result: str  # enriched|missing
+    status: Optional[str]
+    status_changed_at: Optional[str]
+    envelope_json: Optional[str]
+    enriched_at: str
+    batch_envelopes: int
+
+
+def store_enrichment(rows: Sequence[EnrichmentRow]) -> None:
+    """
+    Write one batch's results in a single transaction. A later result for the
+    same event replaces the earlier one. Raises on DB errors.
+    """
+    status = ensure_schema()
+    if not status.ready:
+        raise RuntimeError(f"DB not ready: {status.mode} {status.detail}")
+    conn = connect()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO event_enrichment (event_id, envelope_id, account_id, result, status, "
+            "status_changed_at, envelope_json, enriched_at, batch_envelopes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (r.event_id, r.envelope_id, r.account_id, r.result, r.status,
+                 r.status_changed_at, r.envelope_json, r.enriched_at, r.batch_envelopes)
+                for r in rows
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
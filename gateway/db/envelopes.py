@@ -0,0 +1,337 @@
+"""
+Per-envelope event index (envelope_events) and the reorder stage's spill table.
+
+envelope_events holds one row per persisted delivery that names an envelope,
+clustered on (envelope_id, provider_ts, seq_hint, received_at, event_id), so an
+envelope's history is read in provider order with one index range scan.
+Rows are written in the same transaction as the events row (insert_rows).
+
+Backfill rows written before the index existed:
+
+    python -m gateway.db.envelopes --batch 500 --sleep-ms 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from gateway.db.init_db import ensure_schema
+from gateway.db.sqlite import connect
+
+# Tie-breakers for deliveries with the same provider timestamp (DocuSign stamps
+# to 100 ns, but retries and multi-recipient events often share one). Lower
+# sorts first; unknown events sit in the middle.
+_SEQ_HINTS: Dict[str, int] = {
+    "envelope-created": 0,
+    "envelope-sent": 10,
+    "envelope-resent": 11,
+    "recipient-sent": 12,
+    "recipient-resent": 13,
+    "recipient-autoresponded": 14,
+    "recipient-authenticationfailed": 15,
+    "recipient-delivered": 20,
+    "envelope-delivered": 21,
+    "recipient-reassign": 22,
+    "recipient-delegate": 22,
+    "envelope-corrected": 25,
+    "recipient-finish-later": 28,
+    "recipient-completed": 30,
+    "recipient-declined": 30,
+    "envelope-completed": 40,
+    "envelope-declined": 40,
+    "envelope-voided": 40,
+    "envelope-deleted": 50,
+    "envelope-purge": 60,
+}
+_DEFAULT_HINT = 25
+
+_TS_RE = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+
+def normalize_ts(value: Any) -> Optional[str]:
+    """
+    Parse an ISO-8601 timestamp (any fraction length, Z or offset; naive =
+    UTC) into fixed-width UTC text, so string order equals time order.
+    """
+    if not isinstance(value, str):
+        return None
+    m = _TS_RE.match(value.strip())
+    if not m:
+        return None
+    y, mo, d, h, mi, s, frac, tz = m.groups()
+    try:
+        dt = datetime(int(y), int(mo), int(d), int(h), int(mi), int(s), int((frac or "0")[:6].ljust(6, "0")))
+    except ValueError:
+        return None
+    if tz and tz != "Z":
+        sign = 1 if tz[0] == "+" else -1
+        hh, mm = tz[1:3], tz[-2:]
+        dt -= sign * timedelta(hours=int(hh), minutes=int(mm))
+    return dt.replace(tzinfo=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+@dataclass(frozen=True)
+class EnvelopeRef:
+    """
+    Ordering key and summary of one delivery about an envelope.
+    ts_source is "provider" when provider_ts came from the payload, else
+    "received" (gateway clock; ordering is then only as good as arrival).
+    account_id is carried for enrichment and not stored in envelope_events.
+    """
+
+    envelope_id: str
+    provider_ts: str
+    seq_hint: int
+    event_type: Optional[str]
+    status: Optional[str]
+    recipient_id: Optional[str]
+    ts_source: str
+    account_id: Optional[str] = None
+
+
+def _docusign_ref(parsed: Dict[str, Any], received_at: str) -> Optional[EnvelopeRef]:
+    """
+    DocuSign Connect JSON (SIM): {"event", "generatedDateTime", "data": {"accountId",
+    "envelopeId", "recipientId", "envelopeSummary": {"status", "statusChangedDateTime"}}}.
+    """
+    data = parsed.get("data") if isinstance(parsed.get("data"), dict) else {}
+    envelope_id = data.get("envelopeId") or parsed.get("envelopeId")
+    if not isinstance(envelope_id, str) or not envelope_id:
+        return None
+    summary = data.get("envelopeSummary") if isinstance(data.get("envelopeSummary"), dict) else {}
+    event = parsed.get("event") if isinstance(parsed.get("event"), str) else None
+    ts = normalize_ts(parsed.get("generatedDateTime")) or normalize_ts(summary.get("statusChangedDateTime"))
+    source = "provider"
+    if ts is None:
+        ts, source = normalize_ts(received_at) or received_at, "received"
+    recipient = data.get("recipientId")
+    account = data.get("accountId")
+    return EnvelopeRef(
+        envelope_id=envelope_id.lower(),
+        provider_ts=ts,
+        seq_hint=_SEQ_HINTS.get(event or "", _DEFAULT_HINT),
+        event_type=event,
+        status=summary.get("status") if isinstance(summary.get("status"), str) else None,
+        recipient_id=str(recipient) if recipient is not None else None,
+        ts_source=source,
+        account_id=account.lower() if isinstance(account, str) and account else None,
+    )
+
+
+# Providers whose deliveries carry an envelope subject.
+_EXTRACTORS: Dict[str, Callable[[Dict[str, Any], str], Optional[EnvelopeRef]]] = {
+    "docusign": _docusign_ref,
+}
+
+
+def extract_ref(source: str, parsed: Optional[Dict[str, Any]], received_at: str) -> Optional[EnvelopeRef]:
+    fn = _EXTRACTORS.get(source)
+    if fn is None or not isinstance(parsed, dict):
+        return None
+    try:
+        return fn(parsed, received_at)
+    except Exception:
+        return None
+
+
+_INSERT_REF = """
+    INSERT OR IGNORE INTO envelope_events (
+      envelope_id, provider_ts, seq_hint, received_at, event_id,
+      source, event_type, status, recipient_id, ts_source
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def insert_ref(conn, ref: EnvelopeRef, *, event_id: str, source: str, received_at: str) -> None:
+    """
+    Index one delivery in the caller's transaction (no commit).
+    """
+    conn.execute(
+        _INSERT_REF,
+        (
+            ref.envelope_id, ref.provider_ts, ref.seq_hint, received_at, event_id,
+            source, ref.event_type, ref.status, ref.recipient_id, ref.ts_source,
+        ),
+    )
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    return f"{row['provider_ts']}|{row['seq_hint']}|{row['received_at']}|{row['event_id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, str, str]:
+    """
+    Raises ValueError on a malformed cursor.
+    """
+    ts, hint, received_at, event_id = cursor.split("|", 3)
+    return ts, int(hint), received_at, event_id
+
+
+def history_query(
+    envelope_id: str,
+    *,
+    after: Optional[str] = None,
+    limit: int = 500,
+    include_json: bool = False,
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    SQL and parameters for an envelope's deliveries in provider order,
+    starting after the cursor (ValueError if it does not decode). Walks the
+    envelope_events primary key; json_parsed is a point lookup per row.
+    """
+    cols = (
+        "x.envelope_id, x.provider_ts, x.seq_hint, x.received_at, x.event_id, "
+        "x.source, x.event_type, x.status, x.recipient_id, x.ts_source"
+    )
+    join = ""
+    if include_json:
+        cols += ", e.json_parsed"
+        join = "LEFT JOIN events e ON e.event_id = x.event_id"
+    where = "x.envelope_id = ?"
+    params: List[Any] = [envelope_id.lower()]
+    if after:
+        where += " AND (x.provider_ts, x.seq_hint, x.received_at, x.event_id) > (?, ?, ?, ?)"
+        params.extend(decode_cursor(after))
+    sql = (
+        f"SELECT {cols} FROM envelope_events x {join} WHERE {where} "
+        "ORDER BY x.provider_ts, x.seq_hint, x.received_at, x.event_id LIMIT ?"
+    )
+    return sql, (*params, limit)
+
+
+def envelope_history(
+    conn,
+    envelope_id: str,
+    *,
+    after: Optional[str] = None,
+    limit: int = 500,
+    include_json: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    An envelope's deliveries in provider order, starting after the cursor.
+    """
+    cur = conn.execute(*history_query(envelope_id, after=after, limit=limit, include_json=include_json))
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, r)) for r in cur.fetchall()]
+
+
+# ---------------------------------------------------------------------------
+# Reorder spill (gateway/services/reorder.py)
+# ---------------------------------------------------------------------------
+
+
+def spill(conn, owner: str, entries: Iterable[Tuple[str, Tuple[Any, ...], float, Dict[str, Any]]]) -> int:
+    """
+    Write (envelope_id, key, deadline, payload) entries and commit.
+    key is (provider_ts, seq_hint, received_at, event_id).
+    """
+    n = 0
+    for envelope_id, key, deadline, payload in entries:
+        conn.execute(
+            "INSERT OR REPLACE INTO reorder_spill (owner, envelope_id, provider_ts, seq_hint, received_at, "
+            "event_id, deadline, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (owner, envelope_id, *key, deadline, json.dumps(payload, separators=(",", ":"), default=str)),
+        )
+        n += 1
+    conn.commit()
+    return n
+
+
+def unspill(conn, owner: str, envelope_id: str) -> List[Tuple[Tuple[Any, ...], float, Dict[str, Any]]]:
+    """
+    Take back (and delete) an envelope's spilled entries, in key order.
+    """
+    rows = conn.execute(
+        "SELECT provider_ts, seq_hint, received_at, event_id, deadline, payload FROM reorder_spill "
+        "WHERE owner = ? AND envelope_id = ? ORDER BY provider_ts, seq_hint, received_at, event_id",
+        (owner, envelope_id),
+    ).fetchall()
+    conn.execute("DELETE FROM reorder_spill WHERE owner = ? AND envelope_id = ?", (owner, envelope_id))
+    conn.commit()
+    return [((r[0], r[1], r[2], r[3]), r[4], json.loads(r[5])) for r in rows]
+
+
+def purge_spill(conn, is_stale: Callable[[str], bool]) -> int:
+    """
+    Drop spill rows of owners for which is_stale(owner) is true. The stream is
+    live-only; the deliveries themselves are in envelope_events.
+    """
+    owners = [r[0] for r in conn.execute("SELECT DISTINCT owner FROM reorder_spill").fetchall()]
+    n = 0
+    for owner in owners:
+        if is_stale(owner):
+            n += conn.execute("DELETE FROM reorder_spill WHERE owner = ?", (owner,)).rowcount
+    conn.commit()
+    return n
+
+
+# ---------------------------------------------------------------------------
+# Backfill
+# ---------------------------------------------------------------------------
+
+
+def backfill(*, batch: int = 500, sleep_s: float = 0.0) -> Dict[str, Any]:
+    """
+    Index events rows of envelope-carrying providers in rowid order.
+    Safe to re-run: existing index rows are ignored.
+    """
+    sources = sorted(_EXTRACTORS)
+    marks = ",".join("?" for _ in sources)
+    stats = {"rows_scanned": 0, "rows_indexed": 0}
+    t0 = time.perf_counter()
+    last = 0
+    conn = connect()
+    try:
+        while True:
+            rows = conn.execute(
+                f"SELECT rowid, event_id, source, received_at, json_parsed FROM events "
+                f"WHERE rowid > ? AND source IN ({marks}) AND json_parsed IS NOT NULL ORDER BY rowid LIMIT ?",
+                (last, *sources, batch),
+            ).fetchall()
+            if not rows:
+                break
+            for rowid, event_id, source, received_at, text in rows:
+                last = rowid
+                stats["rows_scanned"] += 1
+                try:
+                    parsed = json.loads(text)
+                except ValueError:
+                    continue
+                ref = extract_ref(source, parsed, received_at)
+                if ref is not None:
+                    insert_ref(conn, ref, event_id=event_id, source=source, received_at=received_at)
+                    stats["rows_indexed"] += 1
+            conn.commit()
+            if sleep_s:
+                time.sleep(sleep_s)
+    finally:
+        conn.close()
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    return stats
+
+
+def main(argv: Any = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m gateway.db.envelopes", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--sleep-ms", type=float, default=0.0, help="pause between batches")
+    args = ap.parse_args(argv)
+
+    status = ensure_schema()
+    if not status.ready:
+        print(f"DB not ready: {status.mode} {status.detail}", file=sys.stderr)
+        return 2
+    print(json.dumps(backfill(batch=max(1, args.batch), sleep_s=args.sleep_ms / 1000.0), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
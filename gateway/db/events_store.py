@@ -3,12 +3,26 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import time
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
+from gateway.db import chain
+from gateway.db.codecs import encode_body
+from gateway.db.envelopes import EnvelopeRef, extract_ref, insert_ref
+from gateway.db.headers import KNOWN_SETS, encode_inline, header_set_key, split_headers
 from gateway.db.init_db import ensure_schema
 from gateway.db.sqlite import connect
+from gateway.services.metrics import (
+    BODY_HASH_SECONDS,
+    DB_COMMIT_SECONDS,
+    DEDUPE_HITS_TOTAL,
+    EVENTS_PERSISTED_TOTAL,
+    PERSIST_FAILURES_TOTAL,
+)
+from gateway.services.timing import span
 
 log = logging.getLogger("gateway.events_store")
 
@@ -21,6 +35,165 @@ def _sha256_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
+@dataclass(frozen=True)
+class EventRow:
+    """
+    One fully prepared events row plus its header set (see headers.py).
+    """
+
+    event_id: str
+    source: str
+    correlation_id: str
+    received_at: str
+    method: str
+    host: str
+    path: str
+    remote_addr: Optional[str]
+    headers_json: str
+    set_hash: str
+    set_json: str
+    stored_body: bytes
+    body_codec: Optional[str]
+    body_size: int
+    body_sha256: str
+    json_text: Optional[str]
+    dedupe_key: str
+    row_hash: str
+    envelope: Optional[EnvelopeRef] = None
+
+
+# chain_seq / chain_hash continue the hash chain from the current head (see
+# gateway/db/chain.py). "chain_seq IS NOT NULL" lets max() use the partial
+# index idx_events_chain_seq instead of scanning the table.
+_INSERT_EVENT = """
+    INSERT OR IGNORE INTO events (
+      event_id, kind, source, namespace,
+      correlation_id, parent_event_id, received_at,
+      method, host, path, remote_addr, status_code,
+      headers_json, header_set_hash, body_raw, body_codec, body_size, body_sha256, json_parsed,
+      verify_status, verify_reason, dedupe_key,
+      row_hash, chain_seq, chain_hash
+    ) VALUES (
+      ?, 'inbound_http', ?, '',
+      ?, NULL, ?,
+      ?, ?, ?, ?, NULL,
+      ?, ?, ?, ?, ?, ?, ?,
+      'unknown', NULL, ?,
+      ?, coalesce((SELECT max(chain_seq) FROM events WHERE chain_seq IS NOT NULL), 0) + 1,
+      chain_link((SELECT chain_hash FROM events WHERE chain_seq = (SELECT max(chain_seq) FROM events WHERE chain_seq IS NOT NULL)), ?)
+    )
+"""
+
+
+def build_row(
+    *,
+    source: str,
+    method: str,
+    host: str,
+    path: str,
+    remote_addr: Optional[str],
+    headers: Dict[str, Any],
+    raw_body: bytes,
+    json_parsed: Optional[Dict[str, Any]],
+    correlation_id: Optional[str] = None,
+    event_id: Optional[str] = None,
+    received_at: Optional[str] = None,
+    envelope: Optional[EnvelopeRef] = None,
+) -> EventRow:
+    received_at = received_at or _utc_now_iso()
+    with span("serialize"):
+        # Stable headers go to the deduplicated header_sets table; only the
+        # volatile ones (signatures, request ids, content-length) stay inline.
+        stable, volatile = split_headers(headers)
+        set_hash, set_json = header_set_key(stable)
+        headers_json = encode_inline(volatile)
+        json_text = json.dumps(json_parsed, default=str) if json_parsed is not None else None
+        if envelope is None:
+            envelope = extract_ref(source, json_parsed, received_at)
+    with span("hash"):
+        t0 = time.perf_counter()
+        body_sha256 = _sha256_bytes(raw_body)
+        BODY_HASH_SECONDS.observe(time.perf_counter() - t0)
+    with span("compress"):
+        stored_body, body_codec = encode_body(raw_body)
+
+    event_id = event_id or str(uuid.uuid4())
+    correlation_id = correlation_id or str(uuid.uuid4())
+    # Dedupe key: stable hash of source+path+body
+    dedupe_key = _sha256_bytes(f"{source}|{path}|{body_sha256}".encode("utf-8"))
+    # Same values, in chain.ROW_COLUMNS order, as _INSERT_EVENT writes.
+    row_hash = chain.row_hash((
+        event_id, "inbound_http", source, "",
+        correlation_id, None, received_at,
+        method, host, path, remote_addr, None,
+        headers_json, set_hash, len(raw_body), body_sha256, json_text,
+        "unknown", None, dedupe_key,
+    ))
+
+    return EventRow(
+        event_id=event_id,
+        source=source,
+        correlation_id=correlation_id,
+        received_at=received_at,
+        method=method,
+        host=host,
+        path=path,
+        remote_addr=remote_addr,
+        headers_json=headers_json,
+        set_hash=set_hash,
+        set_json=set_json,
+        stored_body=stored_body,
+        body_codec=body_codec,
+        body_size=len(raw_body),
+        body_sha256=body_sha256,
+        json_text=json_text,
+        dedupe_key=dedupe_key,
+        row_hash=row_hash,
+        envelope=envelope,
+    )
+
+
+def insert_rows(conn, rows: Sequence[EventRow]) -> List[bool]:
+    """
+    Insert rows (and their envelope_events index rows) in the caller's
+    transaction (no commit). Returns, per row, whether it was new (False = dedupe hit).
+    """
+    new_sets = set()
+    inserted: List[bool] = []
+    for r in rows:
+        if r.set_hash not in new_sets and r.set_hash not in KNOWN_SETS:
+            conn.execute(
+                "INSERT OR IGNORE INTO header_sets (set_hash, headers_json, first_seen_at) VALUES (?, ?, ?)",
+                (r.set_hash, r.set_json, r.received_at),
+            )
+            new_sets.add(r.set_hash)
+        cur = conn.execute(
+            _INSERT_EVENT,
+            (
+                r.event_id, r.source,
+                r.correlation_id, r.received_at,
+                r.method, r.host, r.path, r.remote_addr,
+                r.headers_json, r.set_hash, r.stored_body, r.body_codec, r.body_size, r.body_sha256, r.json_text,
+                r.dedupe_key,
+                r.row_hash, r.row_hash,
+            ),
+        )
+        new = cur.rowcount != 0
+        if new and r.envelope is not None:
+            insert_ref(conn, r.envelope, event_id=r.event_id, source=r.source, received_at=r.received_at)
+        inserted.append(new)
+    return inserted
+
+
+def _commit(conn, rows: Sequence[EventRow]) -> None:
+    t0 = time.perf_counter()
+    conn.commit()
+    DB_COMMIT_SECONDS.observe(time.perf_counter() - t0)
+    # Only after commit: a rolled-back header set must be written again.
+    for r in rows:
+        KNOWN_SETS.add(r.set_hash)
+
+
 def persist_inbound_event(
     *,
     source: str,
@@ -32,58 +205,90 @@ def persist_inbound_event(
     raw_body: bytes,
     json_parsed: Optional[Dict[str, Any]],
     correlation_id: Optional[str] = None,
+    event_id: Optional[str] = None,
+    received_at: Optional[str] = None,
+    envelope: Optional[EnvelopeRef] = None,
 ) -> Dict[str, Any]:
     """
     Best-effort persistence. Never raises to caller.
     Returns an envelope describing persistence result and generated ids.
+    event_id/received_at may be supplied so a later spool replay of the same
+    delivery lands on the same ids (and dedupes against this write).
     """
-    status = ensure_schema()
-    if not status.ready:
-        return {"persisted": False, "db_mode": status.mode, "db_detail": status.detail}
-
-    event_id = str(uuid.uuid4())
-    corr = correlation_id or str(uuid.uuid4())
-    received_at = _utc_now_iso()
+    row = build_row(
+        source=source,
+        method=method,
+        host=host,
+        path=path,
+        remote_addr=remote_addr,
+        headers=headers,
+        raw_body=raw_body,
+        json_parsed=json_parsed,
+        correlation_id=correlation_id,
+        event_id=event_id,
+        received_at=received_at,
+        envelope=envelope,
+    )
+    return persist_row(row)
 
-    headers_json = json.dumps(headers, default=str)
-    body_sha256 = _sha256_bytes(raw_body)
-    json_text = json.dumps(json_parsed, default=str) if json_parsed is not None else None
 
-    # Dedupe key: stable hash of source+path+body
-    dedupe_key = _sha256_bytes(f"{source}|{path}|{body_sha256}".encode("utf-8"))
+def persist_row(row: EventRow) -> Dict[str, Any]:
+    """
+    The DB half of persist_inbound_event, for callers that time the write
+    apart from building the row (body compression can take longer than the
+    write itself). Never raises.
+    """
+    source = row.source
+    with span("db_schema"):
+        status = ensure_schema()
+    if not status.ready:
+        PERSIST_FAILURES_TOTAL.labels(source, status.mode).inc()
+        return {"persisted": False, "db_mode": status.mode, "db_detail": status.detail}
 
     try:
-        conn = connect()
+        with span("db_connect"):
+            conn = connect()
         try:
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO events (
-                  event_id, kind, source, namespace,
-                  correlation_id, parent_event_id, received_at,
-                  method, host, path, remote_addr, status_code,
-                  headers_json, body_raw, body_sha256, json_parsed,
-                  verify_status, verify_reason, dedupe_key
-                ) VALUES (
-                  ?, 'inbound_http', ?, '',
-                  ?, NULL, ?,
-                  ?, ?, ?, ?, NULL,
-                  ?, ?, ?, ?,
-                  'unknown', NULL, ?
-                )
-                """,
-                (
-                    event_id, source,
-                    corr, received_at,
-                    method, host, path, remote_addr,
-                    headers_json, raw_body, body_sha256, json_text,
-                    dedupe_key,
-                ),
-            )
-            conn.commit()
+            with span("db_insert"):
+                (inserted,) = insert_rows(conn, [row])
+            with span("db_commit"):
+                _commit(conn, [row])
+            deduplicated = not inserted
         finally:
             conn.close()
 
-        return {"persisted": True, "event_id": event_id, "correlation_id": corr, "db_mode": "ok"}
+        if deduplicated:
+            DEDUPE_HITS_TOTAL.labels(source).inc()
+        else:
+            EVENTS_PERSISTED_TOTAL.labels(source).inc()
+        return {
+            "persisted": True,
+            "deduplicated": deduplicated,
+            "event_id": row.event_id,
+            "correlation_id": row.correlation_id,
+            "db_mode": "ok",
+        }
     except Exception:
         log.exception("DB write failed (degraded mode).")
+        PERSIST_FAILURES_TOTAL.labels(source, "degraded").inc()
         return {"persisted": False, "db_mode": "degraded", "db_detail": "write failed"}
+
+
+def persist_rows(rows: Sequence[EventRow]) -> List[bool]:
+    """
+    Insert a batch in one transaction. Unlike persist_inbound_event this
+    raises on any DB error, so batch callers (spool replay) can retry later.
+    Returns one flag per row: True if inserted, False if deduplicated.
+    """
+    status = ensure_schema()
+    if not status.ready:
+        raise RuntimeError(f"DB not ready: {status.mode} {status.detail}")
+    conn = connect()
+    try:
+        flags = insert_rows(conn, rows)
+        _commit(conn, rows)
+    finally:
+        conn.close()
+    for r, new in zip(rows, flags):
+        (EVENTS_PERSISTED_TOTAL if new else DEDUPE_HITS_TOTAL).labels(r.source).inc()
+    return flags
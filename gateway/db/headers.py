@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+# Headers that change on (almost) every delivery. They stay inline on the
+# event row; everything else is stored once per distinct set in header_sets.
+_VOLATILE_EXACT = frozenset(
+    {
+        "content-length",
+        "x-request-id",
+        "x-correlation-id",
+        "x-amzn-trace-id",
+        "traceparent",
+        "tracestate",
+        "date",
+    }
+)
+_VOLATILE_PREFIXES = ("x-docusign-signature-", "x-b3-")
+
+
+def _extra_volatile() -> frozenset:
+    raw = os.getenv("GATEWAY_HEADERS_VOLATILE", "")
+    return frozenset(h.strip().lower() for h in raw.split(",") if h.strip())
+
+
+_EXTRA_VOLATILE = _extra_volatile()
+
+
+def is_volatile(name: str) -> bool:
+    n = name.lower()
+    return n in _VOLATILE_EXACT or n in _EXTRA_VOLATILE or n.startswith(_VOLATILE_PREFIXES)
+
+
+def split_headers(headers: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split into (stable, volatile), preserving the original key order in each.
+    """
+    stable: Dict[str, Any] = {}
+    volatile: Dict[str, Any] = {}
+    for k, v in headers.items():
+        (volatile if is_volatile(k) else stable)[k] = v
+    return stable, volatile
+
+
+def header_set_key(stable: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Returns (set_hash, headers_json) for a stable header set.
+    The hash is order-independent; the stored JSON keeps first-seen order.
+    """
+    try:
+        return _header_set_key_cached(tuple(stable.items()))
+    except TypeError:  # unhashable header value; compute uncached
+        return _header_set_key(stable)
+
+
+@lru_cache(maxsize=256)
+def _header_set_key_cached(items: Tuple[Tuple[str, Any], ...]) -> Tuple[str, str]:
+    # Connect resends the same few header sets, so hashing is usually a cache hit.
+    return _header_set_key(dict(items))
+
+
+def _header_set_key(stable: Dict[str, Any]) -> Tuple[str, str]:
+    canonical = json.dumps(stable, sort_keys=True, separators=(",", ":"), default=str)
+    set_hash = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+    return set_hash, json.dumps(stable, separators=(",", ":"), default=str)
+
+
+def encode_inline(volatile: Dict[str, Any]) -> str:
+    return json.dumps(volatile, separators=(",", ":"), default=str)
+
+
+def rebuild_headers(set_json: Optional[str], inline_json: Optional[str]) -> Dict[str, Any]:
+    """
+    Merge a stored header set with the row's inline volatile headers.
+    Rows written before header sets existed have set_json=None and the full
+    dict inline, so they pass through unchanged.
+    """
+    out: Dict[str, Any] = {}
+    if set_json:
+        out.update(json.loads(set_json))
+    if inline_json:
+        out.update(json.loads(inline_json))
+    return out
+
+
+def rebuild_headers_json(set_json: Optional[str], inline_json: Optional[str]) -> str:
+    """
+    Same JSON text shape persist_inbound_event used to store in headers_json.
+    """
+    if not set_json:
+        return inline_json if inline_json is not None else "{}"
+    try:
+        return json.dumps(rebuild_headers(set_json, inline_json), default=str)
+    except Exception:
+        return inline_json or "{}"
+
+
+class KnownSets:
+    """
+    Bounded LRU of header-set hashes already written, so the common case
+    (same Connect header set as last time) skips the header_sets insert.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self._d: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._d:
+                self._d.move_to_end(key)
+                return True
+            return False
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._d[key] = None
+            self._d.move_to_end(key)
+            while len(self._d) > self.capacity:
+                self._d.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._d.clear()
+
+
+KNOWN_SETS = KnownSets()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Tuple
 
 from gateway.db.sqlite import connect
 
@@ -20,11 +21,41 @@ class DBStatus:
 _SCHEMA_APPLIED = False
 _LAST_ERROR = ""
 
+# Additive column migrations for databases created before the column existed.
+# schema.sql carries the same columns for fresh databases.
+_COLUMN_MIGRATIONS: Tuple[Tuple[str, str, str], ...] = (
+    ("events", "header_set_hash", "TEXT"),
+    ("events", "body_codec", "TEXT"),
+    ("events", "body_size", "INTEGER"),
+    ("events", "chain_seq", "INTEGER"),
+    ("events", "row_hash", "TEXT"),
+    ("events", "chain_hash", "TEXT"),
+)
+
+# Indexes on migrated columns; created after the migrations so schema.sql
+# still applies to databases that do not have the columns yet.
+_INDEX_MIGRATIONS: Tuple[str, ...] = (
+    # Not UNIQUE: INSERT OR IGNORE would drop an event on a conflict; the
+    # verifier reports duplicate sequence numbers instead.
+    "CREATE INDEX IF NOT EXISTS idx_events_chain_seq ON events(chain_seq) WHERE chain_seq IS NOT NULL",
+)
+
 
 def schema_path() -> Path:
     return Path(__file__).with_name("schema.sql")
 
 
+def _apply_column_migrations(conn) -> None:
+    for table, column, ddl in _COLUMN_MIGRATIONS:
+        cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table});").fetchall()}
+        if column not in cols:
+            log.info("DB migration: adding %s.%s", table, column)
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl};")
+    for ddl in _INDEX_MIGRATIONS:
+        conn.execute(ddl)
+    conn.commit()
+
+
 def ensure_schema() -> DBStatus:
     """
     Best-effort: open DB, set pragmas, apply schema.
@@ -44,6 +75,7 @@ def ensure_schema() -> DBStatus:
         conn = connect()
         try:
             conn.executescript(sql)
+            _apply_column_migrations(conn)
             _SCHEMA_APPLIED = True
             _LAST_ERROR = ""
             # confirm WAL (informational)
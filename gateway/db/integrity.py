@@ -0,0 +1,675 @@
+"""
+Checkpoints and verification for the events hash chain (gateway/db/chain.py).
+
+The chain is cut into partitions of GATEWAY_INTEGRITY_PARTITION_EVENTS rows.
+A full partition is verified once more and then sealed in chain_checkpoints
+with the Merkle root of its row hashes and its last chain_hash. Sealed
+partitions are independent of each other (each starts from the previous
+checkpoint's chain_hash), so a full verification runs them as separate tasks
+in a process pool and uses every core.
+
+The integrity-audit role (one process across workers, see
+gateway/services/roles.py) seals partitions as they fill and re-verifies the
+open tail every GATEWAY_INTEGRITY_INTERVAL_SECONDS, so the incremental check
+never reads more than one partition.
+
+Findings:
+
+    content    row_hash does not match the row's columns (an edited row)
+    link       chain_hash does not follow from the previous link
+    gap        chain_seq skips numbers (deleted rows)
+    duplicate  chain_seq repeats
+    end        a partition does not end on its checkpoint's chain_hash
+    root       a partition's Merkle root differs from its checkpoint
+    body       (deep) the stored body does not hash to body_sha256
+    headers    a header set the range points at (header_set_hash, which the
+               row hash covers) is missing from header_sets or its
+               headers_json does not hash to its set_hash
+    truncated  the head is below a sealed or already verified chain_seq
+
+Checkpoints live in the same database, so whoever can rewrite rows can
+rewrite them too: copy merkle_root / chain_hash of new checkpoints elsewhere
+(they are logged) to anchor them.
+
+    python -m gateway.db.integrity verify --jobs 8 [--deep]
+    python -m gateway.db.integrity status
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gateway.db.chain import ROW_COLUMNS, link, merkle_path, merkle_root, row_hash, verify_path
+from gateway.db.codecs import decode_body
+from gateway.db.headers import header_set_key
+from gateway.db.init_db import ensure_schema
+from gateway.db.leases import LeaseLost, check_fence
+from gateway.db.sqlite import connect, connect_read, db_path
+from gateway.services.metrics import (
+    INTEGRITY_FINDINGS_TOTAL,
+    INTEGRITY_ROWS_VERIFIED_TOTAL,
+    INTEGRITY_SEALED_SEQ,
+    INTEGRITY_VERIFY_SECONDS,
+)
+from gateway.services.roles import ROLES
+
+log = logging.getLogger("gateway.db.integrity")
+
+ROLE = "integrity-audit"
+_KEEP_RUNS = 500
+_MAX_FINDINGS = 50  # kept per range / run; the count is exact
+
+_SELECT_RANGE = f"""
+    SELECT chain_seq, row_hash, chain_hash, {", ".join(ROW_COLUMNS)}
+    FROM events WHERE chain_seq BETWEEN ? AND ? ORDER BY chain_seq
+"""
+_SELECT_RANGE_DEEP = _SELECT_RANGE.replace(" FROM events", ", body_raw, body_codec FROM events", 1)
+_HEADER_SET_COL = ROW_COLUMNS.index("header_set_hash")
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def integrity_enabled() -> bool:
+    return os.getenv("GATEWAY_INTEGRITY_ENABLED", "1").strip() != "0"
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class RangeResult:
+    seq_from: int
+    seq_to: int
+    rows: int = 0
+    last_chain_hash: Optional[str] = None
+    merkle_root: Optional[str] = None
+    finding_count: int = 0
+    findings: List[Dict[str, Any]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.finding_count == 0
+
+    def add(self, kind: str, seq: Optional[int], event_id: Optional[str] = None, detail: str = "") -> None:
+        self.finding_count += 1
+        if len(self.findings) < _MAX_FINDINGS:
+            self.findings.append({"kind": kind, "seq": seq, "event_id": event_id, "detail": detail})
+
+
+def verify_range(
+    seq_from: int,
+    seq_to: int,
+    prev_chain_hash: Optional[str],
+    *,
+    expect: Optional[Tuple[str, str]] = None,
+    want_root: bool = False,
+    deep: bool = False,
+    db: Optional[str] = None,
+) -> RangeResult:
+    """
+    Recompute row hashes and links for chain_seq seq_from..seq_to, starting
+    from prev_chain_hash. expect = (merkle_root, chain_hash) of the range's
+    checkpoint. After a broken link the walk continues from the stored
+    chain_hash, so each edit is reported once. Header sets the rows point
+    at are re-hashed once per range. Runs in pool processes.
+    """
+    t0 = time.perf_counter()
+    res = RangeResult(seq_from, seq_to)
+    n = len(ROW_COLUMNS)
+    leaves: Optional[List[str]] = [] if (expect is not None or want_root) else None
+    prev, next_seq = prev_chain_hash, seq_from
+    # set_hash -> (chain_seq, event_id) of the first row pointing at it
+    header_sets: Dict[str, Tuple[int, str]] = {}
+    conn = connect_read(db)
+    conn.row_factory = None
+    try:
+        cur = conn.execute(_SELECT_RANGE_DEEP if deep else _SELECT_RANGE, (seq_from, seq_to))
+        while True:
+            batch = cur.fetchmany(2000)
+            if not batch:
+                break
+            for r in batch:
+                seq, stored_row, stored_chain, values = r[0], r[1], r[2], r[3:3 + n]
+                event_id = values[0]
+                if seq < next_seq:
+                    res.add("duplicate", seq, event_id)
+                elif seq > next_seq:
+                    res.add("gap", next_seq, None, f"chain_seq {next_seq}..{seq - 1} missing")
+                next_seq = seq + 1
+                actual = row_hash(values)
+                if actual != stored_row:
+                    res.add("content", seq, event_id)
+                try:
+                    expected_chain = link(prev, stored_row)
+                except (TypeError, ValueError):
+                    expected_chain = None
+                if expected_chain != stored_chain:
+                    res.add("link", seq, event_id)
+                prev = stored_chain
+                if leaves is not None:
+                    leaves.append(actual)
+                set_hash = values[_HEADER_SET_COL]
+                if set_hash is not None and set_hash not in header_sets:
+                    header_sets[set_hash] = (seq, event_id)
+                if deep:
+                    try:
+                        body, _ = decode_body(r[3 + n], r[4 + n])
+                        if hashlib.sha256(body).hexdigest() != values[ROW_COLUMNS.index("body_sha256")]:
+                            res.add("body", seq, event_id)
+                    except Exception as e:
+                        res.add("body", seq, event_id, repr(e))
+                res.rows += 1
+        _check_header_sets(conn, header_sets, res)
+    finally:
+        conn.close()
+    if next_seq <= seq_to:
+        res.add("gap", next_seq, None, f"chain_seq {next_seq}..{seq_to} missing")
+    res.last_chain_hash = prev
+    if leaves is not None:
+        res.merkle_root = merkle_root(leaves)
+    if expect is not None:
+        if res.merkle_root != expect[0]:
+            res.add("root", seq_to, None, f"merkle root {res.merkle_root} != checkpoint {expect[0]}")
+        if prev != expect[1]:
+            res.add("end", seq_to, None, "last chain_hash differs from checkpoint")
+    res.seconds = time.perf_counter() - t0
+    return res
+
+
+def _check_header_sets(conn: Any, refs: Dict[str, Tuple[int, str]], res: RangeResult) -> None:
+    """
+    Re-hash each referenced header set; report missing or altered ones
+    against the first row that points at them.
+    """
+    hashes = list(refs)
+    stored: Dict[str, str] = {}
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        rows = conn.execute(
+            f"SELECT set_hash, headers_json FROM header_sets WHERE set_hash IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall()
+        stored.update((r[0], r[1]) for r in rows)
+    for set_hash in sorted(hashes, key=lambda h: refs[h][0]):
+        seq, event_id = refs[set_hash]
+        if set_hash not in stored:
+            res.add("headers", seq, event_id, f"header set {set_hash} missing")
+            continue
+        try:
+            actual, _ = header_set_key(json.loads(stored[set_hash]))
+        except (TypeError, ValueError, AttributeError) as e:
+            res.add("headers", seq, event_id, f"header set {set_hash}: {e!r}")
+            continue
+        if actual != set_hash:
+            res.add("headers", seq, event_id, f"header set {set_hash} hashes to {actual}")
+
+
+# -- ledger state -----------------------------------------------------------
+
+
+def head(conn: Any) -> Tuple[int, Optional[str]]:
+    row = conn.execute(
+        "SELECT chain_seq, chain_hash FROM events WHERE chain_seq = (SELECT max(chain_seq) FROM events WHERE chain_seq IS NOT NULL)"
+    ).fetchone()
+    return (int(row[0]), row[1]) if row else (0, None)
+
+
+def checkpoints(conn: Any) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT seq_from, seq_to, merkle_root, chain_hash, sealed_at FROM chain_checkpoints ORDER BY seq_from"
+    ).fetchall()
+    return [
+        {"seq_from": r[0], "seq_to": r[1], "merkle_root": r[2], "chain_hash": r[3], "sealed_at": r[4]}
+        for r in rows
+    ]
+
+
+def _verified_through(conn: Any) -> int:
+    row = conn.execute("SELECT max(seq_to) FROM integrity_runs WHERE ok = 1").fetchone()
+    return int(row[0] or 0)
+
+
+def _unchained(conn: Any) -> int:
+    # Only rows written before the chain existed lack a chain_seq, i.e. rows
+    # older than chain_seq 1: count those instead of scanning the table.
+    first = conn.execute("SELECT rowid FROM events WHERE chain_seq = 1").fetchone()
+    if first is None:
+        return int(conn.execute("SELECT count(*) FROM events WHERE chain_seq IS NULL").fetchone()[0])
+    return int(conn.execute(
+        "SELECT count(*) FROM events WHERE rowid < ? AND chain_seq IS NULL", (first[0],)
+    ).fetchone()[0])
+
+
+def record_run(kind: str, summary: Dict[str, Any], holder: Optional[str] = None) -> None:
+    conn = connect()
+    try:
+        cur = conn.execute(
+            "INSERT INTO integrity_runs (kind, started_at, seconds, seq_from, seq_to, rows_checked, ok,"
+            " findings_json, holder) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, summary["started_at"], summary["seconds"], summary.get("seq_from"), summary.get("seq_to"),
+             summary["rows"], int(summary["ok"]), json.dumps(summary["findings"][:_MAX_FINDINGS]), holder),
+        )
+        conn.execute("DELETE FROM integrity_runs WHERE id <= ?", (cur.lastrowid - _KEEP_RUNS,))
+        conn.commit()
+    finally:
+        conn.close()
+    INTEGRITY_ROWS_VERIFIED_TOTAL.labels(kind).inc(summary["rows"])
+    INTEGRITY_VERIFY_SECONDS.labels(kind).observe(summary["seconds"])
+    for f in summary["findings"]:
+        INTEGRITY_FINDINGS_TOTAL.labels(f["kind"]).inc()
+
+
+def _summary(kind: str, started_at: str, results: List[RangeResult], extra: List[Dict[str, Any]]) -> Dict[str, Any]:
+    findings = list(extra)
+    for r in results:
+        findings.extend(r.findings)
+    findings.sort(key=lambda f: f["seq"] or 0)
+    return {
+        "kind": kind,
+        "started_at": started_at,
+        "ok": not extra and all(r.ok for r in results),
+        "seq_from": results[0].seq_from if results else None,
+        "seq_to": results[-1].seq_to if results else None,
+        "rows": sum(r.rows for r in results),
+        "ranges": len(results),
+        "finding_count": len(extra) + sum(r.finding_count for r in results),
+        "findings": findings[:_MAX_FINDINGS],
+        "seconds": round(sum(r.seconds for r in results), 3),
+    }
+
+
+# -- sealing and incremental check ------------------------------------------------
+
+
+def audit(
+    *,
+    partition: int,
+    fence: Optional[Tuple[str, int]] = None,
+    guard: Optional[Callable[[], None]] = None,
+    holder: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Seal every full partition after the last checkpoint, then verify the
+    open tail. A partition that fails verification is not sealed (and
+    nothing after it). fence = (lease name, token) is checked in the
+    transaction that writes a checkpoint.
+    """
+    conn = connect_read()
+    try:
+        cps = checkpoints(conn)
+        head_seq, _ = head(conn)
+        verified = _verified_through(conn)
+    finally:
+        conn.close()
+    last = cps[-1] if cps else None
+    prev, next_from = (last["chain_hash"], last["seq_to"] + 1) if last else (None, 1)
+    out: Dict[str, Any] = {"head": head_seq, "sealed": [], "incremental": None, "ok": True}
+
+    if head_seq < max(next_from - 1, verified):
+        finding = {"kind": "truncated", "seq": head_seq, "event_id": None,
+                   "detail": f"head {head_seq} below verified {max(next_from - 1, verified)}"}
+        summary = {"kind": "incremental", "started_at": _utc_now_iso(), "ok": False, "seq_from": head_seq,
+                   "seq_to": head_seq, "rows": 0, "finding_count": 1, "findings": [finding], "seconds": 0.0}
+        record_run("incremental", summary, holder)
+        log.error("events hash chain truncated: %s", finding["detail"])
+        out.update(ok=False, incremental=summary)
+        return out
+
+    while head_seq - next_from + 1 >= partition:
+        seq_to = next_from + partition - 1
+        started = _utc_now_iso()
+        res = verify_range(next_from, seq_to, prev, want_root=True)
+        summary = _summary("seal", started, [res], [])
+        if guard is not None:
+            guard()
+        record_run("seal", summary, holder)
+        if not res.ok:
+            log.error("events hash chain %d..%d failed verification; not sealing: %s",
+                      next_from, seq_to, summary["findings"][:5])
+            out["ok"] = False
+            return out
+        wconn = connect()
+        try:
+            wconn.execute("BEGIN IMMEDIATE")
+            if fence is not None:
+                check_fence(wconn, *fence)
+            wconn.execute(
+                "INSERT OR IGNORE INTO chain_checkpoints (seq_from, seq_to, merkle_root, chain_hash, sealed_at, token)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (next_from, seq_to, res.merkle_root, res.last_chain_hash, _utc_now_iso(), fence[1] if fence else 0),
+            )
+            wconn.commit()
+        except BaseException:
+            wconn.rollback()
+            raise
+        finally:
+            wconn.close()
+        INTEGRITY_SEALED_SEQ.set(seq_to)
+        log.info("sealed events chain %d..%d merkle_root=%s chain_hash=%s",
+                 next_from, seq_to, res.merkle_root, res.last_chain_hash)
+        out["sealed"].append([next_from, seq_to])
+        prev, next_from = res.last_chain_hash, seq_to + 1
+
+    if head_seq >= next_from:
+        started = _utc_now_iso()
+        summary = _summary("incremental", started, [verify_range(next_from, head_seq, prev)], [])
+        if guard is not None:
+            guard()
+        record_run("incremental", summary, holder)
+        if not summary["ok"]:
+            log.error("events hash chain %d..%d failed verification: %s",
+                      next_from, head_seq, summary["findings"][:5])
+        out.update(ok=summary["ok"], incremental=summary)
+    return out
+
+
+# -- full verification ----------------------------------------------------------
+
+
+def plan(conn: Any) -> Tuple[List[Tuple[int, int, Optional[str], Optional[Tuple[str, str]]]], List[Dict[str, Any]]]:
+    """
+    One task per sealed partition plus the open tail:
+    (seq_from, seq_to, prev_chain_hash, (merkle_root, chain_hash) or None),
+    and findings about the checkpoints themselves.
+    """
+    tasks: List[Tuple[int, int, Optional[str], Optional[Tuple[str, str]]]] = []
+    findings: List[Dict[str, Any]] = []
+    prev, next_from = None, 1
+    for cp in checkpoints(conn):
+        if cp["seq_from"] != next_from:
+            findings.append({"kind": "gap", "seq": next_from, "event_id": None,
+                             "detail": f"checkpoints skip to {cp['seq_from']}"})
+        tasks.append((cp["seq_from"], cp["seq_to"], prev, (cp["merkle_root"], cp["chain_hash"])))
+        prev, next_from = cp["chain_hash"], cp["seq_to"] + 1
+    head_seq, _ = head(conn)
+    verified = max(next_from - 1, _verified_through(conn))
+    if head_seq < verified:
+        findings.append({"kind": "truncated", "seq": head_seq, "event_id": None,
+                         "detail": f"head {head_seq} below verified {verified}"})
+    if head_seq >= next_from:
+        tasks.append((next_from, head_seq, prev, None))
+    return tasks, findings
+
+
+def verify_ledger(*, jobs: int = 0, deep: bool = False, record: bool = True) -> Dict[str, Any]:
+    """
+    Verify the whole chain, one task per partition across `jobs` processes
+    (default: all cores). Wall time is reported as seconds; cpu_seconds sums
+    the tasks.
+    """
+    started, t0 = _utc_now_iso(), time.perf_counter()
+    conn = connect_read()
+    try:
+        tasks, extra = plan(conn)
+        unchained = _unchained(conn)
+    finally:
+        conn.close()
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    db = db_path()
+    if jobs == 1:
+        results = [verify_range(a, b, prev, expect=exp, deep=deep, db=db) for a, b, prev, exp in tasks]
+    else:
+        # spawn, not fork: the gateway process has threads (and open connections).
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+            futures = [pool.submit(verify_range, a, b, prev, expect=exp, deep=deep, db=db) for a, b, prev, exp in tasks]
+            results = [f.result() for f in futures]
+    summary = _summary("full", started, results, extra)
+    summary.update(
+        cpu_seconds=summary["seconds"],
+        seconds=round(time.perf_counter() - t0, 3),
+        jobs=jobs,
+        deep=deep,
+        unchained=unchained,
+    )
+    summary["rows_per_s"] = round(summary["rows"] / summary["seconds"]) if summary["seconds"] else None
+    if record:
+        record_run("full", summary, ROLES.holder or None)
+    return summary
+
+
+# -- reports ----------------------------------------------------------------------
+
+
+def _runs(conn: Any, where: str = "", limit: int = 20) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT kind, started_at, seconds, seq_from, seq_to, rows_checked, ok, findings_json, holder"
+        f" FROM integrity_runs {where} ORDER BY id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [
+        {"kind": r[0], "started_at": r[1], "seconds": r[2], "seq_from": r[3], "seq_to": r[4], "rows": r[5],
+         "ok": bool(r[6]), "findings": json.loads(r[7]), "holder": r[8]}
+        for r in rows
+    ]
+
+
+def report() -> Dict[str, Any]:
+    conn = connect_read()
+    try:
+        head_seq, head_hash = head(conn)
+        cps = checkpoints(conn)
+        last = {}
+        for kind in ("incremental", "seal", "full"):
+            got = _runs(conn, f"WHERE kind = '{kind}'", 1)
+            last[kind] = got[0] if got else None
+        failures = _runs(conn, "WHERE ok = 0", 10)
+        unchained = _unchained(conn)
+    finally:
+        conn.close()
+    return {
+        "head": {"chain_seq": head_seq, "chain_hash": head_hash},
+        "unchained_rows": unchained,
+        "checkpoints": {
+            "count": len(cps),
+            "sealed_through": cps[-1]["seq_to"] if cps else 0,
+            "latest": cps[-1] if cps else None,
+        },
+        "last_runs": last,
+        "recent_failures": failures,
+    }
+
+
+def proof(event_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Merkle audit path from an event's row hash to its partition's
+    checkpoint root. None if the event is unknown; "sealed": False while it
+    is still in the open tail.
+    """
+    conn = connect_read()
+    conn.row_factory = None
+    try:
+        row = conn.execute(
+            f"SELECT chain_seq, row_hash, {', '.join(ROW_COLUMNS)} FROM events WHERE event_id = ?", (event_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        seq, stored = row[0], row[1]
+        out: Dict[str, Any] = {"event_id": event_id, "chain_seq": seq, "row_hash": stored,
+                               "row_hash_matches": seq is not None and row_hash(row[2:]) == stored}
+        cp = conn.execute(
+            "SELECT seq_from, seq_to, merkle_root, chain_hash, sealed_at FROM chain_checkpoints"
+            " WHERE seq_from <= ? AND seq_to >= ?", (seq, seq),
+        ).fetchone() if seq is not None else None
+        if cp is None:
+            out["sealed"] = False
+            return out
+        leaves = [r[0] for r in conn.execute(
+            "SELECT row_hash FROM events WHERE chain_seq BETWEEN ? AND ? ORDER BY chain_seq", (cp[0], cp[1])
+        )]
+    finally:
+        conn.close()
+    path = merkle_path(leaves, seq - cp[0])
+    out.update(
+        sealed=True,
+        checkpoint={"seq_from": cp[0], "seq_to": cp[1], "merkle_root": cp[2], "chain_hash": cp[3],
+                    "sealed_at": cp[4]},
+        path=[{"side": side, "hash": h} for side, h in path],
+        verified=verify_path(stored, path, cp[2]),
+    )
+    return out
+
+
+# -- background role -------------------------------------------------------------
+
+
+class IntegrityAuditor:
+    """
+    Runs audit() every interval in a daemon thread while this process holds
+    the integrity-audit role; full verifications run on request in a
+    separate thread (one at a time per worker).
+    """
+
+    def __init__(self, *, enabled: bool, interval_s: float, partition: int, jobs: int) -> None:
+        self.enabled = enabled
+        self.interval_s = max(1.0, interval_s)
+        self.partition = max(16, partition)
+        self.jobs = jobs
+        self.runs = 0
+        self.last: Optional[Dict[str, Any]] = None
+        self.last_full: Optional[Dict[str, Any]] = None
+        self.last_error = ""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._full: Optional[threading.Thread] = None
+
+    def tick(self) -> None:
+        token = ROLES.token(ROLE)
+        if token is None:
+            return
+
+        def guard() -> None:
+            if ROLES.token(ROLE) != token:
+                raise LeaseLost(f"lease {ROLE!r} lost during integrity audit")
+
+        try:
+            self.last = audit(
+                partition=self.partition,
+                fence=None if ROLES.local else (ROLE, token),
+                guard=guard,
+                holder=ROLES.holder or None,
+            )
+            self.last["at"] = time.time()
+            self.runs += 1
+            self.last_error = ""
+        except Exception as e:
+            self.last_error = repr(e)
+            log.warning("integrity audit failed; will retry: %r", e)
+
+    def _run(self) -> None:
+        self.tick()
+        while not self._stop.wait(self.interval_s):
+            self.tick()
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        ROLES.register(ROLE)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="integrity-audit", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    @property
+    def full_running(self) -> bool:
+        return self._full is not None and self._full.is_alive()
+
+    def start_full(self, *, jobs: int = 0, deep: bool = False) -> bool:
+        """
+        Start a full verification in the background; False if one is running.
+        """
+        if self.full_running:
+            return False
+
+        def run() -> None:
+            try:
+                self.last_full = verify_ledger(jobs=jobs or self.jobs, deep=deep)
+            except Exception as e:
+                self.last_full = {"ok": False, "error": repr(e)}
+                log.exception("full integrity verification failed")
+
+        self._full = threading.Thread(target=run, name="integrity-full", daemon=True)
+        self._full.start()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "leader": ROLES.token(ROLE) is not None,
+            "interval_s": self.interval_s,
+            "partition_events": self.partition,
+            "runs": self.runs,
+            "last": self.last,
+            "last_error": self.last_error or None,
+            "full_running": self.full_running,
+            "last_full": self.last_full,
+        }
+
+
+def auditor_from_env() -> IntegrityAuditor:
+    return IntegrityAuditor(
+        enabled=integrity_enabled(),
+        interval_s=_float_env("GATEWAY_INTEGRITY_INTERVAL_SECONDS", 60.0),
+        partition=int(_float_env("GATEWAY_INTEGRITY_PARTITION_EVENTS", 65536)),
+        jobs=int(_float_env("GATEWAY_INTEGRITY_JOBS", 0)),
+    )
+
+
+AUDITOR = auditor_from_env()
+
+
+def main(argv: Any = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m gateway.db.integrity", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    v = sub.add_parser("verify", help="verify the whole chain in parallel")
+    v.add_argument("--jobs", type=int, default=0, help="processes (default: all cores)")
+    v.add_argument("--deep", action="store_true", help="also decode every body and check body_sha256")
+    v.add_argument("--no-record", action="store_true", help="do not write the run to integrity_runs")
+    s = sub.add_parser("seal", help="seal full partitions and check the open tail (what the role does)")
+    s.add_argument("--partition", type=int, default=AUDITOR.partition)
+    sub.add_parser("status", help="print the /admin/integrity report")
+    args = ap.parse_args(argv)
+
+    status = ensure_schema()
+    if not status.ready:
+        print(f"DB not ready: {status.mode} {status.detail}", file=sys.stderr)
+        return 2
+    if args.cmd == "verify":
+        out = verify_ledger(jobs=args.jobs, deep=args.deep, record=not args.no_record)
+        ok = out["ok"]
+    elif args.cmd == "seal":
+        out = audit(partition=max(16, args.partition))
+        ok = out["ok"]
+    else:
+        out, ok = report(), True
+    print(json.dumps(out, indent=2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
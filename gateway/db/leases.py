@@ -0,0 +1,201 @@
+"""
+Leader leases in the gateway DB, so a background role runs in one process.
+
+A lease is a row (name, holder, token, expires_at). Holders renew before
+expires_at; anyone may take an expired lease, a released one (expires_at 0)
+or one whose holder process is gone (same host, pid not running). Every
+change of holder bumps `token`, the fencing token: work that must not be
+done by a deposed holder checks it in the same transaction as its write
+(check_fence) so a stalled ex-leader fails instead of overwriting.
+
+Every transition is appended to lease_events for /health/ready.
+Expiry uses wall-clock time, so hosts sharing a DB need synced clocks.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+_KEEP_EVENTS = 500
+
+
+class LeaseLost(RuntimeError):
+    """
+    The lease changed hands since the caller's token was issued.
+    """
+
+
+@dataclass(frozen=True)
+class Lease:
+    name: str
+    holder: str
+    token: int
+    acquired_at: float
+    expires_at: float
+
+
+def holder_id() -> str:
+    """
+    host:pid:nonce for this process (the nonce tells a restarted pid apart).
+    """
+    return f"{os.uname().nodename}:{os.getpid()}:{os.urandom(3).hex()}"
+
+
+def holder_pid(holder: str) -> Optional[int]:
+    """
+    pid part of a host:pid:nonce holder id, if it names this host.
+    """
+    parts = holder.split(":")
+    if len(parts) != 3 or parts[0] != os.uname().nodename:
+        return None
+    try:
+        return int(parts[1])
+    except ValueError:
+        return None
+
+
+def _event(conn, now: float, name: str, holder: str, token: int, prev: Optional[str], reason: str) -> None:
+    cur = conn.execute(
+        "INSERT INTO lease_events (at, name, holder, token, prev_holder, reason) VALUES (?, ?, ?, ?, ?, ?)",
+        (now, name, holder, token, prev, reason),
+    )
+    conn.execute("DELETE FROM lease_events WHERE id <= ?", (cur.lastrowid - _KEEP_EVENTS,))
+
+
+def acquire(
+    conn,
+    name: str,
+    holder: str,
+    *,
+    ttl_s: float,
+    holder_gone: Callable[[str], bool],
+    now: Optional[float] = None,
+) -> Optional[Lease]:
+    """
+    Take or renew `name` for `holder` (one IMMEDIATE transaction). Returns the
+    lease, or None while another live holder has it.
+    """
+    now = time.time() if now is None else now
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT holder, token, acquired_at, expires_at FROM leases WHERE name = ?", (name,)
+        ).fetchone()
+        expires = now + ttl_s
+        if row is None:
+            conn.execute(
+                "INSERT INTO leases (name, holder, token, acquired_at, expires_at) VALUES (?, ?, 1, ?, ?)",
+                (name, holder, now, expires),
+            )
+            _event(conn, now, name, holder, 1, None, "new")
+            lease = Lease(name, holder, 1, now, expires)
+        elif row[0] == holder:
+            # Renewal, also after a missed deadline: nobody took it meanwhile,
+            # so the token is still ours.
+            conn.execute("UPDATE leases SET expires_at = ? WHERE name = ?", (expires, name))
+            lease = Lease(name, holder, row[1], row[2], expires)
+        else:
+            prev, token, expired_at = row[0], row[1] + 1, row[3]
+            if expired_at == 0:
+                reason = "handoff"
+            elif expired_at <= now:
+                reason = "expired"
+            elif holder_gone(prev):
+                reason = "holder-exited"
+            else:
+                conn.rollback()
+                return None
+            conn.execute(
+                "UPDATE leases SET holder = ?, token = ?, acquired_at = ?, expires_at = ? WHERE name = ?",
+                (holder, token, now, expires, name),
+            )
+            _event(conn, now, name, holder, token, prev, reason)
+            lease = Lease(name, holder, token, now, expires)
+        conn.commit()
+        return lease
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def release(conn, name: str, holder: str) -> bool:
+    """
+    Give up `name` if held by `holder`; the next taker logs a handoff.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT token FROM leases WHERE name = ? AND holder = ?", (name, holder)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE leases SET expires_at = 0 WHERE name = ?", (name,))
+            _event(conn, now, name, holder, row[0], holder, "released")
+        conn.commit()
+        return row is not None
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def check_fence(conn, name: str, token: int) -> None:
+    """
+    Raise LeaseLost unless `token` is still current for `name`. Call inside
+    the transaction whose write it guards.
+    """
+    row = conn.execute("SELECT token FROM leases WHERE name = ?", (name,)).fetchone()
+    if row is None or row[0] != token:
+        raise LeaseLost(f"lease {name!r} moved on (token {token} -> {row[0] if row else None})")
+
+
+def heartbeat_member(
+    conn, holder: str, *, started_at: float, stale_s: float, holder_gone: Callable[[str], bool]
+) -> int:
+    """
+    Record that `holder` is alive and return how many members are (heartbeat
+    within stale_s). Long-gone members and exited processes are deleted.
+    """
+    now = time.time()
+    conn.execute(
+        "INSERT INTO lease_members (holder, started_at, heartbeat_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(holder) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+        (holder, started_at, now),
+    )
+    conn.execute("DELETE FROM lease_members WHERE heartbeat_at < ?", (now - 10 * stale_s,))
+    for (other,) in conn.execute("SELECT holder FROM lease_members").fetchall():
+        if holder_gone(other):
+            conn.execute("DELETE FROM lease_members WHERE holder = ?", (other,))
+    conn.commit()
+    (n,) = conn.execute("SELECT count(*) FROM lease_members WHERE heartbeat_at >= ?", (now - stale_s,)).fetchone()
+    return int(n)
+
+
+def leave(conn, holder: str) -> None:
+    conn.execute("DELETE FROM lease_members WHERE holder = ?", (holder,))
+    conn.commit()
+
+
+def holders(conn) -> List[Dict[str, Any]]:
+    now = time.time()
+    rows = conn.execute("SELECT name, holder, token, acquired_at, expires_at FROM leases ORDER BY name").fetchall()
+    return [
+        {
+            "name": r[0],
+            "holder": r[1],
+            "token": r[2],
+            "held_s": round(now - r[3], 1),
+            "expires_in_s": round(r[4] - now, 1) if r[4] else None,
+            "live": r[4] > now,
+        }
+        for r in rows
+    ]
+
+
+def recent_events(conn, limit: int = 20) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT at, name, holder, token, prev_holder, reason FROM lease_events ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [
+        {"at": r[0], "name": r[1], "holder": r[2], "token": r[3], "prev_holder": r[4], "reason": r[5]}
+        for r in reversed(rows)
+    ]
@@ -0,0 +1,300 @@
+"""
+Reader pool for /events: SQLite reads off the event loop, with budgets.
+
+Every read runs on a dedicated thread pool (GATEWAY_DB_READ_THREADS, default
+4) with its own query_only connection, so a slow stats scan or a large body
+fetch never holds up webhook ACKs on the loop. Each read has a time budget
+(GATEWAY_DB_READ_BUDGET_SECONDS, default 5); a stream has one budget for
+all of its chunks. When it runs out, or the awaiting request is cancelled
+or its client disconnects (watched until a stream's first chunk, when the
+response takes over receive()), the statement in flight is stopped with
+sqlite3.Connection.interrupt() and the read raises ReadInterrupted.
+
+    stats = await READS.run(count_by_source, request=request)
+
+    async for chunk in READS.stream(sql, params, request=request, map=render):
+        ...   # render(row dict) for GATEWAY_DB_READ_CHUNK_ROWS (default 50) rows
+
+map runs on the pool thread too, so decoding and serializing large rows
+stays off the loop as well. That work holds the GIL, though, so at most
+GATEWAY_DB_READ_FETCH_THREADS (default 1) pool threads fetch and map
+stream chunks at once; run() and a stream's query still use every thread.
+
+A stream keeps its connection (and its WAL read snapshot) until the last
+chunk, so long results should go out as they are read, not be collected.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from gateway.db.sqlite import connect_read
+from gateway.services.profiler import following
+from gateway.services.metrics import DB_READ_WAIT_SECONDS, DB_READS_IN_FLIGHT, DB_READS_INTERRUPTED_TOTAL
+
+T = TypeVar("T")
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class ReadInterrupted(RuntimeError):
+    """
+    A read was stopped: reason is "budget", "disconnected" or "cancelled".
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"read interrupted ({reason})")
+        self.reason = reason
+
+
+class _Read:
+    """
+    One read's connection and interrupt state. The connection is opened,
+    used and closed on pool threads; interrupt() may come from any thread.
+    """
+
+    def __init__(self) -> None:
+        self.conn: Optional[sqlite3.Connection] = None
+        self.reason: Optional[str] = None
+        self.pending: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> sqlite3.Connection:
+        conn = connect_read()
+        with self._lock:
+            if self.reason is not None:
+                conn.close()
+                raise ReadInterrupted(self.reason)
+            self.conn = conn
+        return conn
+
+    def interrupt(self, reason: str) -> bool:
+        """
+        Stop the statement in flight and fail the read's later calls.
+        False if the read was already interrupted.
+        """
+        with self._lock:
+            if self.reason is not None:
+                return False
+            self.reason = reason
+            if self.conn is not None:
+                self.conn.interrupt()
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            conn, self.conn = self.conn, None
+        if conn is not None:
+            conn.close()
+
+
+def _dicts(cur: sqlite3.Cursor, rows: List[Any]) -> List[Dict[str, Any]]:
+    cols = [d[0] for d in cur.description] if cur.description else []
+    return [dict(zip(cols, r)) for r in rows]
+
+
+class ReadPool:
+    def __init__(self, *, threads: int, budget_s: float, chunk_rows: int, fetch_threads: int = 1) -> None:
+        self.threads = max(1, threads)
+        self.budget_s = max(0.05, budget_s)
+        self.chunk_rows = max(1, chunk_rows)
+        self.in_flight = 0
+        self.completed = 0
+        self.interrupted: Dict[str, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Turning rows into dicts and map() is Python and holds the GIL;
+        # SQLite mostly does not. Capping how many threads do it at once
+        # keeps the loop's share of the GIL, so heavy reads don't slow
+        # webhook ACKs.
+        self.fetch_threads = max(1, min(self.threads, fetch_threads))
+        self._fetching = threading.Semaphore(self.fetch_threads)
+
+    def _interrupt(self, read: _Read, reason: str) -> None:
+        # Always called on the event loop thread.
+        if read.interrupt(reason):
+            self.interrupted[reason] = self.interrupted.get(reason, 0) + 1
+            DB_READS_INTERRUPTED_TOTAL.labels(reason).inc()
+
+    async def _watch_disconnect(self, receive: Callable[[], Any], read: _Read) -> None:
+        # A GET's only request message has arrived already; the next one is
+        # the disconnect.
+        while True:
+            message = await receive()
+            if message.get("type") == "http.disconnect":
+                self._interrupt(read, "disconnected")
+                return
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="db-read")
+            return self._executor
+
+    async def _call(self, read: _Read, fn: Callable[[sqlite3.Connection], T], budget_s: Optional[float]) -> T:
+        """
+        Run fn(conn) for `read` on the pool within the budget. The connection
+        is opened by the first call.
+        """
+        submitted = time.perf_counter()
+
+        def job() -> T:
+            DB_READ_WAIT_SECONDS.observe(time.perf_counter() - submitted)
+            if read.reason is not None:
+                raise ReadInterrupted(read.reason)
+            conn = read.conn or read.open()
+            try:
+                with following():
+                    return fn(conn)
+            except sqlite3.OperationalError:
+                if read.reason is not None:
+                    raise ReadInterrupted(read.reason) from None
+                raise
+
+        loop = asyncio.get_running_loop()
+        # Under the request's contextvars, so a sampled request's profile
+        # includes this thread.
+        read.pending = self._pool().submit(contextvars.copy_context().run, job)
+        timer = loop.call_later(budget_s or self.budget_s, self._interrupt, read, "budget")
+        try:
+            return await asyncio.wrap_future(read.pending)
+        except asyncio.CancelledError:
+            self._interrupt(read, "cancelled")
+            raise
+        finally:
+            timer.cancel()
+
+    def _release(self, read: _Read) -> None:
+        # Close on the pool thread once its last call has returned; a
+        # cancelled call may still be unwinding from the interrupt.
+        if read.pending is not None:
+            read.pending.add_done_callback(lambda _: read.close())
+        else:
+            read.close()
+        self.in_flight -= 1
+        self.completed += 1
+        DB_READS_IN_FLIGHT.set(self.in_flight)
+
+    def _begin(self, request: Any) -> Tuple[_Read, Optional[asyncio.Task]]:
+        read = _Read()
+        self.in_flight += 1
+        DB_READS_IN_FLIGHT.set(self.in_flight)
+        watcher = None
+        if request is not None:
+            watcher = asyncio.ensure_future(self._watch_disconnect(request.receive, read))
+        return read, watcher
+
+    async def run(
+        self,
+        fn: Callable[[sqlite3.Connection], T],
+        *,
+        request: Any = None,
+        budget_s: Optional[float] = None,
+    ) -> T:
+        """
+        fn(conn) on a pool thread with a fresh query_only connection (one
+        budget for all of fn's statements). Pass the request to stop the
+        read when its client disconnects.
+        """
+        read, watcher = self._begin(request)
+        try:
+            return await self._call(read, fn, budget_s)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self._release(read)
+
+    async def stream(
+        self,
+        sql: str,
+        params: Tuple[Any, ...] = (),
+        *,
+        request: Any = None,
+        budget_s: Optional[float] = None,
+        chunk_rows: Optional[int] = None,
+        map: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Rows of one query in chunks (dicts, or map(dict)), fetched and mapped
+        on the pool. One budget covers the whole stream, including the time
+        the consumer spends between chunks, so a slow client cannot hold the
+        connection and its read snapshot open. request's disconnect is
+        watched only until the first chunk; after that, the consumer stops
+        the read by cancelling it or closing the generator.
+        """
+        size = chunk_rows or self.chunk_rows
+
+        def fetch(_: sqlite3.Connection) -> List[Any]:
+            with self._fetching:
+                if read.reason is not None:
+                    raise ReadInterrupted(read.reason)
+                rows = _dicts(cur, cur.fetchmany(size))
+                return [map(r) for r in rows] if map is not None else rows
+
+        deadline = time.monotonic() + (budget_s or self.budget_s)
+
+        def remaining() -> float:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                self._interrupt(read, "budget")
+                raise ReadInterrupted(read.reason or "budget")
+            return left
+
+        read, watcher = self._begin(request)
+        try:
+            cur = await self._call(read, lambda conn: conn.execute(sql, params), remaining())
+            while True:
+                rows = await self._call(read, fetch, remaining())
+                if not rows:
+                    return
+                if watcher is not None:
+                    # From the first chunk on, the response owns receive()
+                    # (StreamingResponse listens for the disconnect itself
+                    # and cancels or closes this generator).
+                    watcher.cancel()
+                    watcher = None
+                yield rows
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self._release(read)
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "fetch_threads": self.fetch_threads,
+            "budget_s": self.budget_s,
+            "chunk_rows": self.chunk_rows,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "interrupted": dict(self.interrupted),
+        }
+
+
+def reads_from_env() -> ReadPool:
+    return ReadPool(
+        threads=int(_float_env("GATEWAY_DB_READ_THREADS", 4)),
+        budget_s=_float_env("GATEWAY_DB_READ_BUDGET_SECONDS", 5.0),
+        chunk_rows=int(_float_env("GATEWAY_DB_READ_CHUNK_ROWS", 50)),
+        fetch_threads=int(_float_env("GATEWAY_DB_READ_FETCH_THREADS", 1)),
+    )
+
+
+READS = reads_from_env()
@@ -17,8 +17,11 @@ CREATE TABLE IF NOT EXISTS events (
   remote_addr     TEXT,
   status_code     INTEGER,
 
-  headers_json    TEXT NOT NULL DEFAULT '{}',
-  body_raw        BLOB NOT NULL,
+  headers_json    TEXT NOT NULL DEFAULT '{}',   -- full headers, or only volatile ones when header_set_hash is set
+  header_set_hash TEXT,                         -- -> header_sets.set_hash (NULL on legacy rows)
+  body_raw        BLOB NOT NULL,                -- compressed when body_codec is set (gateway/db/codecs.py)
+  body_codec      TEXT,                         -- zlib | gzip | bz2 | lzma; NULL = stored as received
+  body_size       INTEGER,                      -- uncompressed length in bytes (NULL on legacy rows)
   body_sha256     TEXT NOT NULL,
   json_parsed     TEXT,
 
@@ -26,11 +29,119 @@ CREATE TABLE IF NOT EXISTS events (
   verify_reason   TEXT,
 
   dedupe_key      TEXT NOT NULL,
+
+  -- Hash chain (gateway/db/chain.py); NULL on rows written before it existed.
+  -- Indexed on chain_seq by init_db after the column migrations.
+  chain_seq       INTEGER,                      -- insertion order, 1, 2, 3, ...
+  row_hash        TEXT,                         -- sha256 of the row's canonical content
+  chain_hash      TEXT,                         -- sha256(previous chain_hash || row_hash)
+
   UNIQUE(source, kind, dedupe_key),
 
   FOREIGN KEY(parent_event_id) REFERENCES events(event_id)
 );
 
+-- Deduplicated non-volatile header sets (see gateway/db/headers.py)
+CREATE TABLE IF NOT EXISTS header_sets (
+  set_hash        TEXT PRIMARY KEY,
+  headers_json    TEXT NOT NULL,
+  first_seen_at   TEXT NOT NULL
+);
+
 CREATE INDEX IF NOT EXISTS idx_events_received_at ON events(received_at);
 CREATE INDEX IF NOT EXISTS idx_events_corr        ON events(correlation_id);
 
+
+-- Per-envelope index of deliveries in provider order (see gateway/db/envelopes.py).
+-- Clustered on the ordering key so an envelope's history is one range scan.
+CREATE TABLE IF NOT EXISTS envelope_events (
+  envelope_id     TEXT NOT NULL,                -- lower-cased
+  provider_ts     TEXT NOT NULL,                -- provider timestamp, fixed-width UTC
+  seq_hint        INTEGER NOT NULL,             -- tie-break by event type
+  received_at     TEXT NOT NULL,
+  event_id        TEXT NOT NULL,                -- -> events.event_id
+  source          TEXT NOT NULL,
+  event_type      TEXT,
+  status          TEXT,
+  recipient_id    TEXT,
+  ts_source       TEXT NOT NULL,                -- provider | received
+  PRIMARY KEY (envelope_id, provider_ts, seq_hint, received_at, event_id)
+) WITHOUT ROWID;
+
+-- Reorder-buffer overflow (gateway/services/reorder.py); owner = worker pid.
+CREATE TABLE IF NOT EXISTS reorder_spill (
+  owner           TEXT NOT NULL,
+  envelope_id     TEXT NOT NULL,
+  provider_ts     TEXT NOT NULL,
+  seq_hint        INTEGER NOT NULL,
+  received_at     TEXT NOT NULL,
+  event_id        TEXT NOT NULL,
+  deadline        REAL NOT NULL,                -- owner's monotonic clock
+  payload         TEXT NOT NULL,
+  PRIMARY KEY (owner, envelope_id, provider_ts, seq_hint, received_at, event_id)
+) WITHOUT ROWID;
+
+-- DocuSign envelope state fetched for an event (gateway/services/enrichment.py).
+CREATE TABLE IF NOT EXISTS event_enrichment (
+  event_id          TEXT PRIMARY KEY,           -- -> events.event_id
+  envelope_id       TEXT NOT NULL,
+  account_id        TEXT NOT NULL,
+  result            TEXT NOT NULL,              -- enriched | missing
+  status            TEXT,                       -- envelope status at enrichment time
+  status_changed_at TEXT,
+  envelope_json     TEXT,                       -- list-status entry for the envelope
+  enriched_at       TEXT NOT NULL,
+  batch_envelopes   INTEGER NOT NULL            -- envelopes resolved by the same call
+);
+
+-- Leader leases for background roles (gateway/db/leases.py, gateway/services/roles.py).
+-- One row per role or role shard ("name#k"); token is the fencing token.
+CREATE TABLE IF NOT EXISTS leases (
+  name            TEXT PRIMARY KEY,
+  holder          TEXT NOT NULL,                -- host:pid:nonce
+  token           INTEGER NOT NULL,             -- +1 on every change of holder
+  acquired_at     REAL NOT NULL,                -- epoch seconds
+  expires_at      REAL NOT NULL                 -- epoch seconds; 0 = released
+);
+
+-- Processes taking part in the election (sizes fair shares of sharded roles).
+CREATE TABLE IF NOT EXISTS lease_members (
+  holder          TEXT PRIMARY KEY,
+  started_at      REAL NOT NULL,
+  heartbeat_at    REAL NOT NULL
+);
+
+-- Changes of lease holder, newest last (trimmed to the last 500).
+CREATE TABLE IF NOT EXISTS lease_events (
+  id              INTEGER PRIMARY KEY AUTOINCREMENT,
+  at              REAL NOT NULL,
+  name            TEXT NOT NULL,
+  holder          TEXT NOT NULL,
+  token           INTEGER NOT NULL,
+  prev_holder     TEXT,
+  reason          TEXT NOT NULL                 -- new | expired | holder-exited | handoff | released
+);
+
+-- Sealed partitions of the events hash chain (gateway/db/integrity.py).
+CREATE TABLE IF NOT EXISTS chain_checkpoints (
+  seq_from        INTEGER PRIMARY KEY,
+  seq_to          INTEGER NOT NULL,
+  merkle_root     TEXT NOT NULL,                -- over row_hash of seq_from..seq_to
+  chain_hash      TEXT NOT NULL,                -- chain_hash at seq_to
+  sealed_at       TEXT NOT NULL,
+  token           INTEGER NOT NULL              -- fencing token of the sealing lease
+);
+
+-- Integrity verification runs, newest last (trimmed to the last 500).
+CREATE TABLE IF NOT EXISTS integrity_runs (
+  id              INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind            TEXT NOT NULL,                -- seal | incremental | full
+  started_at      TEXT NOT NULL,
+  seconds         REAL NOT NULL,
+  seq_from        INTEGER,
+  seq_to          INTEGER,
+  rows_checked    INTEGER NOT NULL,
+  ok              INTEGER NOT NULL,
+  findings_json   TEXT NOT NULL DEFAULT '[]',   -- first findings (kind, seq, event_id, detail)
+  holder          TEXT
+);
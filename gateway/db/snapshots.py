@@ -0,0 +1,520 @@
+"""
+Hourly columnar snapshots of the events table for ops analytics.
+
+A background compactor turns every complete hour of events into one
+segment file (<dir>/events-YYYYMMDDTHH.seg) holding packed little-endian
+column arrays:
+
+    ts_ms          int64   received_at, epoch milliseconds
+    source         codes   events.source
+    kind           codes   events.kind
+    event_type     codes   payload "event" (DocuSign Connect) or "eventType"
+    account        codes   payload data.accountId (lower-cased)
+    verify_status  codes   events.verify_status
+    body_size      uint32  uncompressed body bytes
+
+Code columns are dictionary-encoded per segment (uint8/16/32 by dictionary
+size; "" = absent). Readers memory-map the file (gateway/services/analytics.py)
+and never touch the live database.
+
+Layout: magic | version | meta_len, the JSON meta (rows, dictionaries,
+column offsets), then each column 8-byte aligned. Files are written to a
+temp name and renamed, so readers only ever see complete segments.
+
+Hours are split into shards (hour number % n) that workers hold as role
+leases (gateway/services/roles.py), so each hour is compacted by one
+process. Hours are sealed `grace` seconds after they end. Rows that land in an
+already-sealed hour later (spool replay keeps the original received_at)
+are found by rowid on the next run and their hour is rebuilt.
+
+Build or catch up once (e.g. after enabling on an existing database):
+
+    python -m gateway.db.snapshots --days 90
+"""
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from gateway.db.init_db import ensure_schema
+from gateway.db.leases import LeaseLost
+from gateway.db.sqlite import connect_read, db_path
+from gateway.services.metrics import (
+    SNAPSHOT_COMPACT_SECONDS,
+    SNAPSHOT_ROWS_TOTAL,
+    SNAPSHOT_SEGMENTS,
+)
+from gateway.services.roles import ROLES, shard_name
+
+log = logging.getLogger("gateway.db.snapshots")
+
+_HEADER = struct.Struct("<4sHHI")
+MAGIC = b"PUGS"
+VERSION = 1
+SEGMENT_SUFFIX = ".seg"
+_ALIGN = 8
+
+# Dictionary-encoded columns, in file order.
+CODE_COLUMNS: Tuple[str, ...] = ("source", "kind", "event_type", "account", "verify_status")
+
+_HOUR_FMT = "%Y-%m-%dT%H"
+
+_SELECT_HOUR = """
+    SELECT
+      rowid,
+      CAST(round((julianday(received_at) - 2440587.5) * 86400000.0) AS INTEGER),
+      source,
+      kind,
+      CASE WHEN json_valid(json_parsed)
+           THEN coalesce(json_extract(json_parsed, '$.event'), json_extract(json_parsed, '$.eventType')) END,
+      CASE WHEN json_valid(json_parsed) THEN json_extract(json_parsed, '$.data.accountId') END,
+      verify_status,
+      coalesce(body_size, length(body_raw))
+    FROM events
+    WHERE received_at >= ? AND received_at < ?
+"""
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def snapshots_enabled() -> bool:
+    if os.getenv("GATEWAY_DB_ENABLED", "1").strip() == "0":
+        return False
+    return os.getenv("GATEWAY_SNAPSHOT_ENABLED", "1").strip() != "0"
+
+
+def snapshot_dir() -> Path:
+    d = os.getenv("GATEWAY_SNAPSHOT_DIR", "").strip()
+    return Path(d) if d else Path(db_path()).parent / "snapshots"
+
+
+def segment_name(hour: datetime) -> str:
+    return f"events-{hour.strftime('%Y%m%dT%H')}{SEGMENT_SUFFIX}"
+
+
+def hour_of_segment(path: Path) -> Optional[datetime]:
+    try:
+        return datetime.strptime(path.name[len("events-"):-len(SEGMENT_SUFFIX)], "%Y%m%dT%H").replace(
+            tzinfo=timezone.utc
+        )
+    except ValueError:
+        return None
+
+
+def list_segments(directory: Path) -> List[Path]:
+    try:
+        return sorted(p for p in directory.iterdir() if p.name.startswith("events-") and p.suffix == SEGMENT_SUFFIX)
+    except FileNotFoundError:
+        return []
+
+
+def _hour_text(hour: datetime) -> str:
+    # received_at is isoformat() text, so an hour prefix compares in time order.
+    return hour.strftime(_HOUR_FMT)
+
+
+def _parse_hour(prefix: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(prefix[:13], _HOUR_FMT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _code_typecode(n: int) -> Tuple[str, str]:
+    """
+    (array typecode, numpy dtype) for a dictionary of n entries.
+    """
+    if n <= 0xFF:
+        return "B", "<u1"
+    if n <= 0xFFFF:
+        return "H", "<u2"
+    return "I", "<u4"
+
+
+def _column(typecode: str, values: Any) -> array:
+    arr = array(typecode, values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+# ---------------------------------------------------------------------------
+# Segment encoding
+# ---------------------------------------------------------------------------
+
+
+def encode_segment(hour: datetime, rows: List[Tuple[Any, ...]]) -> bytes:
+    """
+    rows: (rowid, ts_ms, source, kind, event_type, account, verify_status, body_size).
+    """
+    dicts: Dict[str, List[str]] = {}
+    index: Dict[str, Dict[str, int]] = {}
+    codes: Dict[str, List[int]] = {}
+    for name in CODE_COLUMNS:
+        dicts[name], index[name], codes[name] = [], {}, []
+
+    ts: List[int] = []
+    sizes: List[int] = []
+    max_rowid = 0
+    for rowid, ts_ms, source, kind, event_type, account, verify, size in rows:
+        max_rowid = max(max_rowid, rowid)
+        ts.append(int(ts_ms))
+        sizes.append(min(max(int(size or 0), 0), 0xFFFFFFFF))
+        values = (
+            source or "",
+            kind or "",
+            event_type if isinstance(event_type, str) else "",
+            account.lower() if isinstance(account, str) else "",
+            verify or "",
+        )
+        for name, value in zip(CODE_COLUMNS, values):
+            idx = index[name]
+            code = idx.get(value)
+            if code is None:
+                code = idx[value] = len(dicts[name])
+                dicts[name].append(value)
+            codes[name].append(code)
+
+    columns: List[Tuple[str, str, array]] = [("ts_ms", "<i8", _column("q", ts))]
+    for name in CODE_COLUMNS:
+        typecode, dtype = _code_typecode(len(dicts[name]))
+        columns.append((name, dtype, _column(typecode, codes[name])))
+    columns.append(("body_size", "<u4", _column("I", sizes)))
+
+    # Column offsets are relative to data_offset (the 8-aligned end of the
+    # meta block), so only data_offset depends on the meta length.
+    rel: Dict[str, Dict[str, Any]] = {}
+    pos = 0
+    for name, dtype, arr in columns:
+        rel[name] = {"dtype": dtype, "offset": pos}
+        pos += len(arr) * arr.itemsize
+        pos += -pos % _ALIGN
+
+    meta: Dict[str, Any] = {
+        "hour": _hour_text(hour),
+        "rows": len(ts),
+        "max_rowid": max_rowid,
+        "built_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "dicts": dicts,
+        "columns": rel,
+        "data_offset": 0,
+    }
+    while True:  # data_offset's own digits count towards the meta length
+        blob = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+        start = _HEADER.size + len(blob)
+        start += -start % _ALIGN
+        if meta["data_offset"] == start:
+            break
+        meta["data_offset"] = start
+
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, 0, len(blob)))
+    out += blob
+    out += b"\0" * (meta["data_offset"] - len(out))
+    for _, _, arr in columns:
+        out += arr.tobytes()
+        out += b"\0" * (-len(out) % _ALIGN)
+    return bytes(out)
+
+
+def read_meta(buf: Any) -> Dict[str, Any]:
+    """
+    Parse a segment's meta from its first bytes (bytes, mmap, memoryview).
+    Raises ValueError on anything that is not a complete version-1 segment.
+    """
+    if len(buf) < _HEADER.size:
+        raise ValueError("short segment")
+    magic, version, _, meta_len = _HEADER.unpack(bytes(buf[: _HEADER.size]))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a v{VERSION} snapshot segment")
+    end = _HEADER.size + meta_len
+    if len(buf) < end:
+        raise ValueError("truncated segment meta")
+    return json.loads(bytes(buf[_HEADER.size:end]))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+
+def _hour_shard(hour: datetime, shards: int) -> int:
+    return (int(hour.timestamp()) // 3600) % shards
+
+
+def _shard_suffix(shard: Tuple[int, int]) -> str:
+    return "" if shard[1] == 1 else f"-{shard[0]}of{shard[1]}"
+
+
+def _state_path(directory: Path, shard: Tuple[int, int] = (0, 1)) -> Path:
+    return directory / f"state{_shard_suffix(shard)}.json"
+
+
+def _load_state(directory: Path, shard: Tuple[int, int]) -> Dict[str, Any]:
+    try:
+        return json.loads(_state_path(directory, shard).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _hours_with_rows(conn, lo: datetime, hi: datetime) -> Iterator[datetime]:
+    """
+    Hours in [lo, hi) that have events, found by seeking the received_at
+    index one hour at a time (one lookup per non-empty hour, not a scan).
+    """
+    cursor = _hour_text(lo)
+    end = _hour_text(hi)
+    while True:
+        row = conn.execute(
+            "SELECT min(received_at) FROM events WHERE received_at >= ? AND received_at < ?", (cursor, end)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return
+        hour = _parse_hour(row[0])
+        if hour is None:
+            return
+        yield hour
+        cursor = _hour_text(hour + timedelta(hours=1))
+
+
+def compact(
+    directory: Optional[Path] = None,
+    *,
+    retention_days: float = 90.0,
+    grace_s: float = 120.0,
+    shard: Tuple[int, int] = (0, 1),
+    guard: Optional[Callable[[], None]] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Build missing hour segments, rebuild hours that received late rows and
+    drop segments older than the retention window.
+
+    shard=(k, n) restricts the run to hours with hour_number % n == k, so n
+    processes can split the work (each shard keeps its own state file).
+    guard() is called before every write and may raise to abort (the
+    service passes a lease check). One process per shard at a time (flock);
+    others return {"skipped": ...}.
+    """
+    directory = directory or snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    k, n = shard
+    guard = guard or (lambda: None)
+    stats: Dict[str, Any] = {"built": 0, "rebuilt": 0, "rows": 0, "pruned": 0}
+    lock_fd = os.open(str(directory / f".compact{_shard_suffix(shard)}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            stats["skipped"] = "another process is compacting"
+            return stats
+        t0 = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        sealed_before = (now - timedelta(seconds=grace_s)).replace(minute=0, second=0, microsecond=0)
+        oldest = (sealed_before - timedelta(days=retention_days)).replace(minute=0, second=0, microsecond=0)
+
+        existing = {}
+        for path in list_segments(directory):
+            hour = hour_of_segment(path)
+            if hour is not None and _hour_shard(hour, n) == k:
+                existing[hour] = path
+        for hour, path in list(existing.items()):
+            if hour < oldest:
+                guard()
+                path.unlink(missing_ok=True)
+                existing.pop(hour, None)
+                stats["pruned"] += 1
+
+        state = _load_state(directory, shard)
+        conn = connect_read()
+        try:
+            max_rowid = conn.execute("SELECT coalesce(max(rowid), 0) FROM events").fetchone()[0]
+            last_rowid = int(state.get("last_rowid", 0))
+
+            todo: Dict[datetime, str] = {}
+            if existing and last_rowid:
+                # Late arrivals: new rows (by rowid) stamped into a sealed hour.
+                for (prefix,) in conn.execute(
+                    "SELECT DISTINCT substr(received_at, 1, 13) FROM events "
+                    "WHERE rowid > ? AND rowid <= ? AND received_at < ?",
+                    (last_rowid, max_rowid, _hour_text(sealed_before)),
+                ):
+                    hour = _parse_hour(prefix)
+                    if hour is not None and hour >= oldest and hour in existing:
+                        todo[hour] = "rebuilt"
+            for hour in _hours_with_rows(conn, oldest, sealed_before):
+                if hour not in existing and _hour_shard(hour, n) == k:
+                    todo[hour] = "built"
+
+            for hour in sorted(todo):
+                rows = conn.execute(
+                    _SELECT_HOUR, (_hour_text(hour), _hour_text(hour + timedelta(hours=1)))
+                ).fetchall()
+                guard()
+                _write_atomic(directory / segment_name(hour), encode_segment(hour, rows))
+                stats[todo[hour]] += 1
+                stats["rows"] += len(rows)
+                SNAPSHOT_ROWS_TOTAL.inc(len(rows))
+        finally:
+            conn.close()
+
+        guard()
+        _write_atomic(
+            _state_path(directory, shard),
+            json.dumps({"last_rowid": max_rowid, "sealed_before": _hour_text(sealed_before)}).encode("utf-8"),
+        )
+        n_segments = len(list_segments(directory))
+        SNAPSHOT_SEGMENTS.set(n_segments)
+        stats["segments"] = n_segments
+        stats["sealed_before"] = _hour_text(sealed_before)
+        stats["seconds"] = round(time.perf_counter() - t0, 3)
+        SNAPSHOT_COMPACT_SECONDS.observe(stats["seconds"])
+    finally:
+        os.close(lock_fd)
+    return stats
+
+
+ROLE = "snapshot-compactor"
+
+
+class SnapshotCompactor:
+    """
+    Runs compact() every interval in a daemon thread. Every worker starts
+    one; the hours are split into `shards` role leases (gateway.services.roles)
+    and each worker compacts only the shards it holds.
+    """
+
+    def __init__(
+        self, *, enabled: bool, interval_s: float, retention_days: float, grace_s: float, shards: int
+    ) -> None:
+        self.enabled = enabled
+        self.shards = max(1, shards)
+        self.interval_s = max(1.0, interval_s)
+        self.retention_days = max(1.0 / 24, retention_days)
+        self.grace_s = max(0.0, grace_s)
+        self.directory = snapshot_dir()
+        self.runs = 0
+        self.last: Optional[Dict[str, Any]] = None
+        self.last_error = ""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tick(self) -> None:
+        for k, token in sorted(ROLES.held_shards(ROLE).items()):
+            name = shard_name(ROLE, k) if self.shards > 1 else ROLE
+
+            def guard(name: str = name, token: int = token) -> None:
+                if ROLES.token(name) != token:
+                    raise LeaseLost(f"lease {name!r} lost during compaction")
+
+            try:
+                stats = compact(
+                    self.directory,
+                    retention_days=self.retention_days,
+                    grace_s=self.grace_s,
+                    shard=(k, self.shards),
+                    guard=guard,
+                )
+            except Exception as e:
+                self.last_error = repr(e)
+                log.warning("snapshot compaction (shard %d) failed; will retry: %r", k, e)
+                continue
+            self.last_error = ""
+            if "skipped" not in stats:
+                self.runs += 1
+                self.last = {**stats, "shard": k, "at": time.time()}
+                if stats["built"] or stats["rebuilt"]:
+                    log.info("snapshots compacted shard %d/%d %s", k, self.shards, stats)
+
+    def _run(self) -> None:
+        # First pass right away so a fresh deployment gets its backlog built.
+        self.tick()
+        while not self._stop.wait(self.interval_s):
+            self.tick()
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self.directory = snapshot_dir()
+        ROLES.register(ROLE, shards=self.shards)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-compact", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "dir": str(self.directory),
+            "interval_s": self.interval_s,
+            "retention_days": self.retention_days,
+            "grace_s": self.grace_s,
+            "shards": self.shards,
+            "held_shards": sorted(ROLES.held_shards(ROLE)),
+            "segments": len(list_segments(self.directory)),
+            "runs": self.runs,
+            "last": self.last,
+            "last_error": self.last_error or None,
+        }
+
+
+def compactor_from_env() -> SnapshotCompactor:
+    return SnapshotCompactor(
+        enabled=snapshots_enabled(),
+        interval_s=_float_env("GATEWAY_SNAPSHOT_INTERVAL_SECONDS", 300.0),
+        retention_days=_float_env("GATEWAY_SNAPSHOT_RETENTION_DAYS", 90.0),
+        grace_s=_float_env("GATEWAY_SNAPSHOT_GRACE_SECONDS", 120.0),
+        shards=int(_float_env("GATEWAY_SNAPSHOT_SHARDS", 4)),
+    )
+
+
+COMPACTOR = compactor_from_env()
+
+
+def main(argv: Any = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m gateway.db.snapshots", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--days", type=float, default=_float_env("GATEWAY_SNAPSHOT_RETENTION_DAYS", 90.0))
+    ap.add_argument("--grace-s", type=float, default=_float_env("GATEWAY_SNAPSHOT_GRACE_SECONDS", 120.0))
+    ap.add_argument("--dir", default=None, help="snapshot directory (default: GATEWAY_SNAPSHOT_DIR)")
+    args = ap.parse_args(argv)
+
+    status = ensure_schema()
+    if not status.ready:
+        print(f"DB not ready: {status.mode} {status.detail}", file=sys.stderr)
+        return 2
+    stats = compact(Path(args.dir) if args.dir else None, retention_days=args.days, grace_s=args.grace_s)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,515 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from gateway.db.events_store import EventRow, build_row, persist_rows
+from gateway.db.sqlite import db_path
+from gateway.services.connect_parser import parse_delivery
+from gateway.services.enrichment import ENRICHER
+from gateway.services.metrics import (
+    SPOOL_APPENDS_TOTAL,
+    SPOOL_BACKLOG_BYTES,
+    SPOOL_CORRUPT_TOTAL,
+    SPOOL_FSYNC_SECONDS,
+    SPOOL_REPLAYED_TOTAL,
+)
+from gateway.services.roles import ROLES
+
+log = logging.getLogger("gateway.db.spool")
+
+# Record: magic | meta_len | body_len | crc32(meta + body), then meta (JSON), then body.
+_HEADER = struct.Struct("<4sIII")
+MAGIC = b"PUG1"
+
+# Writers append to <name>.open; a segment is sealed (renamed to .log) on
+# rotation or shutdown. The drainer replays both and deletes sealed
+# segments once every record is in the DB. Progress is kept in <name>.offset.
+OPEN_SUFFIX = ".open"
+SEALED_SUFFIX = ".log"
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def spool_enabled() -> bool:
+    if os.getenv("GATEWAY_DB_ENABLED", "1").strip() == "0":
+        return False
+    return os.getenv("GATEWAY_SPOOL_ENABLED", "1").strip() != "0"
+
+
+def spool_dir() -> Path:
+    d = os.getenv("GATEWAY_SPOOL_DIR", "").strip()
+    return Path(d) if d else Path(db_path()).parent / "spool"
+
+
+def encode_record(meta: Dict[str, Any], body: bytes) -> bytes:
+    m = json.dumps(meta, separators=(",", ":"), default=str).encode("utf-8")
+    crc = zlib.crc32(body, zlib.crc32(m))
+    return _HEADER.pack(MAGIC, len(m), len(body), crc) + m + body
+
+
+def iter_records(path: Path, offset: int) -> Iterator[Tuple[int, Dict[str, Any], bytes]]:
+    """
+    Yields (end_offset, meta, body) for each complete record from offset.
+
+    Stops quietly at a torn tail (a record still being written, or cut short by
+    a crash). A complete record with a bad checksum is skipped by scanning for
+    the next magic; SPOOL_CORRUPT_TOTAL counts those.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        pos = offset
+        while pos + _HEADER.size <= size:
+            f.seek(pos)
+            head = f.read(_HEADER.size)
+            magic, meta_len, body_len, crc = _HEADER.unpack(head)
+            end = pos + _HEADER.size + meta_len + body_len
+            if magic == MAGIC and end > size:
+                return  # torn tail; retry on the next drain
+            payload = f.read(meta_len + body_len) if magic == MAGIC else b""
+            if magic != MAGIC or zlib.crc32(payload) != crc:
+                SPOOL_CORRUPT_TOTAL.inc()
+                nxt = _find_magic(f, pos + 1, size)
+                log.warning("spool %s: corrupt record at %d, resuming at %s", path.name, pos, nxt)
+                if nxt is None:
+                    return
+                pos = nxt
+                continue
+            try:
+                meta = json.loads(payload[:meta_len])
+            except ValueError:
+                SPOOL_CORRUPT_TOTAL.inc()
+                pos = end
+                continue
+            yield end, meta, payload[meta_len:]
+            pos = end
+
+
+def _find_magic(f: Any, start: int, size: int) -> Optional[int]:
+    f.seek(start)
+    buf = f.read(size - start)
+    i = buf.find(MAGIC)
+    return None if i < 0 else start + i
+
+
+@dataclass
+class _Segment:
+    path: Path
+    fd: int
+    size: int
+
+
+class SpoolWriter:
+    """
+    Per-process append-only segment writer.
+
+    append() is one os.write of a fully framed record (O_APPEND), so a crash
+    leaves at most one torn record at the tail. Durability is chosen with
+    GATEWAY_SPOOL_FSYNC:
+      none   rely on the OS page cache (survives process crashes, not power loss)
+      group  callers await sync(); concurrent callers share one fsync
+      always fsync inside every append
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int, fsync_mode: str) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_mode = fsync_mode if fsync_mode in ("none", "group", "always") else "group"
+        self._seg: Optional[_Segment] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._sync_task: Optional["asyncio.Task[None]"] = None
+
+    def _open_segment(self) -> _Segment:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        name = f"spool-{int(time.time() * 1000):013d}-{os.getpid()}-{self._seq}{OPEN_SUFFIX}"
+        path = self.directory / name
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        return _Segment(path, fd, 0)
+
+    def append(self, meta: Dict[str, Any], body: bytes) -> int:
+        rec = encode_record(meta, body)
+        with self._lock:
+            if self._seg is None:
+                self._seg = self._open_segment()
+            seg = self._seg
+            view = memoryview(rec)
+            while view:
+                n = os.write(seg.fd, view)
+                view = view[n:]
+            seg.size += len(rec)
+            self._written += 1
+            if self.fsync_mode == "always":
+                self._fsync(seg.fd)
+                self._synced = self._written
+            if seg.size >= self.segment_bytes:
+                self._seal_locked()
+        return len(rec)
+
+    def _fsync(self, fd: int) -> None:
+        t0 = time.perf_counter()
+        os.fsync(fd)
+        SPOOL_FSYNC_SECONDS.observe(time.perf_counter() - t0)
+
+    async def sync(self) -> None:
+        """
+        Group commit: wait until everything appended so far is fsynced.
+        Appends that arrive while an fsync is running share the next one.
+        """
+        if self.fsync_mode != "group":
+            return
+        target = self._written
+        while self._synced < target:
+            if self._sync_task is None or self._sync_task.done():
+                self._sync_task = asyncio.ensure_future(self._sync_once())
+            await asyncio.shield(self._sync_task)
+
+    async def _sync_once(self) -> None:
+        with self._lock:
+            upto = self._written
+            fd = os.dup(self._seg.fd) if self._seg is not None else None
+        if fd is not None:
+            try:
+                await asyncio.to_thread(self._fsync, fd)
+            finally:
+                os.close(fd)
+        self._synced = max(self._synced, upto)
+
+    def _seal_locked(self) -> None:
+        seg = self._seg
+        if seg is None:
+            return
+        self._seg = None
+        try:
+            if self.fsync_mode != "none":
+                self._fsync(seg.fd)
+            self._synced = self._written
+        finally:
+            os.close(seg.fd)
+        seg.path.rename(seg.path.with_suffix(SEALED_SUFFIX))
+
+    def seal(self) -> None:
+        with self._lock:
+            self._seal_locked()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _offset_path(seg: Path) -> Path:
+    return seg.with_name(seg.stem + ".offset")
+
+
+def _read_offset(seg: Path) -> int:
+    try:
+        return int(_offset_path(seg).read_text().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_offset(seg: Path, offset: int) -> None:
+    p = _offset_path(seg)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(str(offset))
+    os.replace(tmp, p)
+
+
+def _segments(directory: Path) -> List[Path]:
+    if not directory.exists():
+        return []
+    segs = [p for p in directory.iterdir() if p.suffix in (OPEN_SUFFIX, SEALED_SUFFIX)]
+    return sorted(segs, key=lambda p: p.name)
+
+
+def _seal_orphans(directory: Path) -> None:
+    """
+    Seal .open segments left by workers that are no longer running.
+    """
+    for seg in _segments(directory):
+        if seg.suffix != OPEN_SUFFIX:
+            continue
+        try:
+            pid = int(seg.stem.split("-")[2])
+        except (IndexError, ValueError):
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            try:
+                seg.rename(seg.with_suffix(SEALED_SUFFIX))
+            except OSError:
+                pass
+
+
+def backlog_bytes(directory: Optional[Path] = None) -> int:
+    total = 0
+    for seg in _segments(directory or spool_dir()):
+        try:
+            total += max(0, seg.stat().st_size - _read_offset(seg))
+        except OSError:
+            pass
+    return total
+
+
+class Spool:
+    """
+    Ingress fallback for when the DB path is degraded or slow.
+
+    - should_bypass_db(): after a failure or slow write, ingress skips the DB
+      for probe_s and spools directly. Then a single delivery is let through
+      as a half-open probe while the rest keep spooling; mark_healthy() from
+      it (or a successful replay) closes the bypass, another failure re-opens
+      it for probe_s.
+    - append(): durable spool write; the caller ACKs without waiting on SQLite.
+    - drain_once(): replay spooled records into events in batches; dedupe keys
+      make replays idempotent, including records whose original write landed
+      after ingress gave up waiting for it.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = spool_enabled()
+        self.directory = spool_dir()
+        self.writer = SpoolWriter(
+            self.directory,
+            segment_bytes=int(_float_env("GATEWAY_SPOOL_SEGMENT_BYTES", 64 * 1024 * 1024)),
+            fsync_mode=os.getenv("GATEWAY_SPOOL_FSYNC", "group").strip().lower(),
+        )
+        self.persist_timeout_s = _float_env("GATEWAY_SPOOL_PERSIST_TIMEOUT_MS", 500.0) / 1000.0
+        self.probe_s = _float_env("GATEWAY_SPOOL_PROBE_SECONDS", 5.0)
+        self.batch = max(1, int(_float_env("GATEWAY_SPOOL_DRAIN_BATCH", 500)))
+        self.interval_s = _float_env("GATEWAY_SPOOL_DRAIN_INTERVAL_SECONDS", 1.0)
+        self._bypass_until = 0.0
+        self.spooled = 0
+        self.replayed = 0
+        self.last_drain: Optional[Dict[str, Any]] = None
+        self.last_error = ""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- ingress side -------------------------------------------------------
+
+    def should_bypass_db(self) -> bool:
+        if not self.enabled or self._bypass_until == 0.0:
+            return False
+        now = time.monotonic()
+        if now < self._bypass_until:
+            return True
+        # Window expired: this caller is the probe. Push the window out so
+        # concurrent deliveries keep spooling until it reports back; if it
+        # never does, the next window lets another one through.
+        self._bypass_until = now + self.probe_s
+        return False
+
+    def bypassing(self) -> bool:
+        return self.enabled and time.monotonic() < self._bypass_until
+
+    def mark_degraded(self) -> None:
+        self._bypass_until = time.monotonic() + self.probe_s
+
+    def mark_healthy(self) -> None:
+        self._bypass_until = 0.0
+
+    async def append(self, meta: Dict[str, Any], body: bytes, reason: str) -> Dict[str, Any]:
+        # os.write (plus fsync in "always" mode or when it seals a segment)
+        # blocks: keep it off the loop.
+        await asyncio.to_thread(self.writer.append, meta, body)
+        await self.writer.sync()
+        self.spooled += 1
+        SPOOL_APPENDS_TOTAL.labels(reason).inc()
+        return {
+            "persisted": False,
+            "spooled": True,
+            "spool_reason": reason,
+            "event_id": meta.get("event_id"),
+            "correlation_id": meta.get("correlation_id"),
+            "db_mode": "spooled",
+        }
+
+    # -- drain side -----------------------------------------------------------
+
+    def drain_once(self) -> Dict[str, Any]:
+        """
+        Replay every spooled record this process can claim. Only one process
+        drains at a time (flock on .drain.lock). Raises on DB errors after
+        saving progress for the batches that committed.
+        """
+        stats = {"records": 0, "inserted": 0, "duplicates": 0, "segments_removed": 0}
+        if not self.directory.exists():
+            return stats
+        lock_fd = os.open(str(self.directory / ".drain.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                stats["skipped"] = "another process is draining"
+                return stats
+            _seal_orphans(self.directory)
+            t0 = time.perf_counter()
+            for seg in _segments(self.directory):
+                try:
+                    end = self._drain_segment(seg, stats)
+                except FileNotFoundError:
+                    continue  # sealed (renamed) while listing; next tick sees the .log
+                if seg.suffix == SEALED_SUFFIX:
+                    # Sealed segments get no more writes: anything left after the
+                    # last complete record is a torn write from a crash.
+                    leftover = seg.stat().st_size - end
+                    if leftover > 0:
+                        SPOOL_CORRUPT_TOTAL.inc()
+                        log.warning("spool %s: dropping %d-byte torn tail", seg.name, leftover)
+                    seg.unlink()
+                    _offset_path(seg).unlink(missing_ok=True)
+                    stats["segments_removed"] += 1
+            stats["seconds"] = round(time.perf_counter() - t0, 3)
+        finally:
+            os.close(lock_fd)
+        return stats
+
+    def _drain_segment(self, seg: Path, stats: Dict[str, Any]) -> int:
+        end = _read_offset(seg)
+        batch: List[EventRow] = []
+        for end_off, meta, body in iter_records(seg, end):
+            batch.append(_row_from_record(meta, body))
+            if len(batch) >= self.batch:
+                self._commit_batch(seg, batch, end_off, stats)
+                batch = []
+            end = end_off
+        if batch:
+            self._commit_batch(seg, batch, end, stats)
+        return end
+
+    def _commit_batch(self, seg: Path, batch: List[EventRow], end: int, stats: Dict[str, Any]) -> None:
+        flags = persist_rows(batch)
+        _write_offset(seg, end)
+        inserted = sum(flags)
+        dupes = len(flags) - inserted
+        for row, new in zip(batch, flags):
+            # Ingress only enriches rows it wrote itself; these are in the DB now.
+            if new and row.envelope is not None and row.envelope.account_id:
+                ENRICHER.submit_threadsafe(row.envelope.account_id, row.envelope.envelope_id, row.event_id)
+        stats["records"] += len(batch)
+        stats["inserted"] += inserted
+        stats["duplicates"] += dupes
+        self.replayed += len(batch)
+        SPOOL_REPLAYED_TOTAL.labels("inserted").inc(inserted)
+        SPOOL_REPLAYED_TOTAL.labels("duplicate").inc(dupes)
+
+    def tick(self) -> None:
+        SPOOL_BACKLOG_BYTES.set(backlog_bytes(self.directory))
+        if ROLES.token("spool-drain") is None:
+            return  # another worker holds the spool-drain role
+        try:
+            stats = self.drain_once()
+        except Exception as e:
+            self.last_error = repr(e)
+            self.mark_degraded()
+            log.warning("spool drain failed; will retry: %r", e)
+            return
+        self.last_error = ""
+        if stats.get("records"):
+            # Replay just committed, so the DB path is healthy again.
+            self.mark_healthy()
+            self.last_drain = {**stats, "at": time.time()}
+            log.info("spool drained %s", stats)
+        SPOOL_BACKLOG_BYTES.set(backlog_bytes(self.directory))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.tick()
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        ROLES.register("spool-drain")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-drain", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.writer.seal()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "dir": str(self.directory),
+            "fsync": self.writer.fsync_mode,
+            "bypassing_db": self.bypassing(),
+            "drainer": ROLES.token("spool-drain") is not None,
+            "backlog_bytes": backlog_bytes(self.directory) if self.enabled else 0,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "last_drain": self.last_drain,
+            "last_error": self.last_error or None,
+        }
+
+
+def spool_meta(
+    *,
+    event_id: str,
+    received_at: str,
+    source: str,
+    method: str,
+    host: str,
+    path: str,
+    remote_addr: Optional[str],
+    headers: Dict[str, Any],
+    correlation_id: Optional[str],
+) -> Dict[str, Any]:
+    return {
+        "event_id": event_id,
+        "received_at": received_at,
+        "source": source,
+        "method": method,
+        "host": host,
+        "path": path,
+        "remote_addr": remote_addr,
+        "headers": headers,
+        "correlation_id": correlation_id,
+    }
+
+
+def _row_from_record(meta: Dict[str, Any], body: bytes) -> EventRow:
+    parsed = parse_delivery(body, (meta.get("headers") or {}).get("content-type"))
+    return build_row(
+        source=meta["source"],
+        method=meta.get("method") or "POST",
+        host=meta.get("host") or "",
+        path=meta.get("path") or "",
+        remote_addr=meta.get("remote_addr"),
+        headers=meta.get("headers") or {},
+        raw_body=body,
+        json_parsed=parsed if isinstance(parsed, dict) else None,
+        correlation_id=meta.get("correlation_id"),
+        event_id=meta.get("event_id"),
+        received_at=meta.get("received_at"),
+    )
+
+
+SPOOL = Spool()
@@ -2,19 +2,48 @@ from __future__ import annotations
 
 import os
 import sqlite3
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+from gateway.db import chain
+from gateway.services.metrics import DB_CONNECT_SECONDS
 
 
 def db_path() -> str:
     return os.getenv("GATEWAY_DB_PATH", "/app/data/gateway.db")
 
 
+def wal_path(path: Optional[str] = None) -> Path:
+    return Path(f"{path or db_path()}-wal")
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _read_pragmas() -> Tuple[int, int, str]:
+    """
+    Read-connection tuning: (mmap_size bytes, cache_size, temp_store).
+    cache_size follows SQLite semantics (negative = KiB, positive = pages).
+    """
+    mmap_size = _int_env("GATEWAY_DB_MMAP_SIZE", 256 * 1024 * 1024)
+    cache_size = _int_env("GATEWAY_DB_CACHE_SIZE", -64 * 1024)
+    temp_store = os.getenv("GATEWAY_DB_TEMP_STORE", "MEMORY").strip().upper()
+    if temp_store not in ("DEFAULT", "FILE", "MEMORY"):
+        temp_store = "MEMORY"
+    return mmap_size, cache_size, temp_store
+
+
 def connect(path: Optional[str] = None) -> sqlite3.Connection:
     """
     Open a SQLite connection with WAL and sane pragmas.
     This function may raise sqlite3.OperationalError if the path is unwritable.
     """
+    t0 = time.perf_counter()
     p = Path(path or db_path())
     p.parent.mkdir(parents=True, exist_ok=True)
 
@@ -30,4 +59,36 @@ def connect(path: Optional[str] = None) -> sqlite3.Connection:
     conn.execute("PRAGMA synchronous=NORMAL;")
     conn.execute("PRAGMA foreign_keys=ON;")
     conn.execute("PRAGMA busy_timeout=5000;")
+    # Cap the WAL file left behind after a checkpoint resets it (see gateway.db.checkpoint)
+    conn.execute(f"PRAGMA journal_size_limit={_int_env('GATEWAY_DB_JOURNAL_SIZE_LIMIT', 64 * 1024 * 1024)};")
+    # chain_link() for the events hash chain, computed by the INSERT itself.
+    chain.register(conn)
+    DB_CONNECT_SECONDS.observe(time.perf_counter() - t0)
+    return conn
+
+
+def connect_read(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open a query_only connection for /events and other read paths.
+
+    Reads never take the write lock, so bursty ingest and heavy scans do not
+    contend; mmap/cache/temp_store are tuned for scans (GATEWAY_DB_MMAP_SIZE,
+    GATEWAY_DB_CACHE_SIZE, GATEWAY_DB_TEMP_STORE). The database must already
+    exist in WAL mode (ensure_schema() runs first on every read path).
+    """
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(
+        str(Path(path or db_path())),
+        timeout=5.0,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+
+    mmap_size, cache_size, temp_store = _read_pragmas()
+    conn.execute("PRAGMA query_only=ON;")
+    conn.execute("PRAGMA busy_timeout=5000;")
+    conn.execute(f"PRAGMA mmap_size={mmap_size};")
+    conn.execute(f"PRAGMA cache_size={cache_size};")
+    conn.execute(f"PRAGMA temp_store={temp_store};")
+    DB_CONNECT_SECONDS.observe(time.perf_counter() - t0)
     return conn
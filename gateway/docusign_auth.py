@@ -1,25 +1,26 @@
 # gateway/docusign_auth.py
 
-import os
 import time
 from pathlib import Path
 from typing import Tuple
 
-import jwt
-import requests
-from dotenv import load_dotenv
+from gateway.services.metrics import DOCUSIGN_HTTP_SECONDS
+from gateway.settings import DocuSignSettings, get_settings
 
-# Load .env from project root once
-ROOT_DIR = Path(__file__).resolve().parent.parent
-ENV_PATH = ROOT_DIR / ".env"
-if ENV_PATH.exists():
-    load_dotenv(ENV_PATH)
+# jwt (with cryptography) and requests are imported on first use, not at
+# startup: they dominate import time and most workers never call DocuSign.
 
-DS_INTEGRATION_KEY = os.environ["DS_INTEGRATION_KEY"]
-DS_USER_ID = os.environ["DS_USER_ID"]
-DS_AUTH_SERVER = os.environ.get("DS_AUTH_SERVER", "account-d.docusign.com")
-DS_PRIVATE_KEY_PATH = os.environ["DS_PRIVATE_KEY_PATH"]
-DS_TOKEN_SCOPES = os.environ.get("DS_TOKEN_SCOPES", "signature impersonation")
+
+class DocuSignNotConfigured(RuntimeError):
+    pass
+
+
+def docusign_settings() -> DocuSignSettings:
+    ds = get_settings().docusign
+    missing = ds.missing()
+    if missing:
+        raise DocuSignNotConfigured(f"Missing required env var(s): {', '.join(missing)}")
+    return ds
 
 # simple in-memory cache
 _token_cache: dict[str, str | float | None] = {
@@ -28,35 +29,45 @@ _token_cache: dict[str, str | float | None] = {
 }
 
 
-def _load_private_key() -> str:
-    key_path = Path(DS_PRIVATE_KEY_PATH).expanduser()
+def _load_private_key(ds: DocuSignSettings) -> str:
+    key_path = Path(ds.private_key_path).expanduser()
     return key_path.read_text(encoding="utf-8")
 
 
-def _build_jwt() -> str:
+def _build_jwt(ds: DocuSignSettings) -> str:
+    import jwt
+
     now = int(time.time())
     payload = {
-        "iss": DS_INTEGRATION_KEY,
-        "sub": DS_USER_ID,
-        "aud": DS_AUTH_SERVER,
+        "iss": ds.integration_key,
+        "sub": ds.user_id,
+        "aud": ds.auth_server,
         "iat": now,
         "exp": now + 3600,
-        "scope": DS_TOKEN_SCOPES,
+        "scope": ds.token_scopes,
     }
-    private_key = _load_private_key()
+    private_key = _load_private_key(ds)
     return jwt.encode(payload, private_key, algorithm="RS256")
 
 
-def _exchange_for_token(assertion: str) -> Tuple[str, float]:
-    url = f"https://{DS_AUTH_SERVER}/oauth/token"
-    resp = requests.post(
-        url,
-        data={
-            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
-            "assertion": assertion,
-        },
-        timeout=15,
-    )
+def _exchange_for_token(ds: DocuSignSettings, assertion: str) -> Tuple[str, float]:
+    import requests
+
+    url = f"{ds.auth_base_url}/oauth/token"
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        resp = requests.post(
+            url,
+            data={
+                "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+                "assertion": assertion,
+            },
+            timeout=15,
+        )
+        status = str(resp.status_code)
+    finally:
+        DOCUSIGN_HTTP_SECONDS.labels("oauth_token", status).observe(time.perf_counter() - t0)
     resp.raise_for_status()
     body = resp.json()
     access_token = body["access_token"]
@@ -70,6 +81,7 @@ def get_docusign_access_token() -> str:
     """
     Main entrypoint – call this anywhere in the gateway
     to get a valid DocuSign access token.
+    Raises DocuSignNotConfigured when credentials are missing.
     """
     now = time.time()
     if (
@@ -79,8 +91,9 @@ def get_docusign_access_token() -> str:
     ):
         return _token_cache["access_token"]  # type: ignore[return-value]
 
-    assertion = _build_jwt()
-    token, expires_at = _exchange_for_token(assertion)
+    ds = docusign_settings()
+    assertion = _build_jwt(ds)
+    token, expires_at = _exchange_for_token(ds, assertion)
     _token_cache["access_token"] = token
     _token_cache["expires_at"] = expires_at
     return token
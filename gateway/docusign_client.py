@@ -0,0 +1,174 @@
+# gateway/docusign_client.py
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from gateway.docusign_auth import docusign_settings, get_docusign_access_token
+from gateway.services.http_cache import CacheEntry, Fetched, ResponseCache
+from gateway.services.metrics import DOCUSIGN_HTTP_SECONDS
+from gateway.settings import DocuSignSettings, get_settings
+
+
+class DocuSignHTTPError(RuntimeError):
+    def __init__(self, op: str, status_code: int, body: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"DocuSign {op} failed: HTTP {status_code}")
+        self.op = op
+        self.status_code = status_code
+        self.body = body
+        # Seconds from Retry-After (429/503), None when not sent.
+        self.retry_after = retry_after
+
+
+def _retry_after(resp: Any) -> Optional[float]:
+    value = (resp.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _http_error(op: str, resp: Any) -> DocuSignHTTPError:
+    return DocuSignHTTPError(op, resp.status_code, resp.text, _retry_after(resp))
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def cache_enabled() -> bool:
+    return os.getenv("GATEWAY_DOCUSIGN_CACHE_ENABLED", "1").strip() != "0"
+
+
+# Freshness per resource. Userinfo (accounts, base URIs) rarely changes;
+# envelopes change with every signing step, so they are kept short and
+# revalidated with If-None-Match.
+_TTL_DEFAULTS: Dict[str, float] = {"userinfo": 3600.0, "account": 300.0, "envelope": 15.0}
+
+
+def _ttl(op: str) -> float:
+    return _float_env(f"GATEWAY_DOCUSIGN_CACHE_TTL_{op.upper()}_SECONDS", _TTL_DEFAULTS[op])
+
+
+def _http_get(op: str, url: str, headers: Dict[str, str], params: Optional[Dict[str, str]] = None) -> Any:
+    import requests
+
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        resp = requests.get(url, headers=headers, params=params, timeout=15)
+        status = str(resp.status_code)
+    finally:
+        DOCUSIGN_HTTP_SECONDS.labels(op, status).observe(time.perf_counter() - t0)
+    return resp
+
+
+def _auth_headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {get_docusign_access_token()}", "Accept": "application/json"}
+
+
+class DocuSignClient:
+    """
+    Read-side DocuSign REST calls behind a response cache.
+
+    Only idempotent GETs go through here. Entries are keyed by token scope
+    (integration key, impersonated user, scopes), account and resource, so
+    two identities never share an entry; the access token itself is not part
+    of the key, so token refreshes keep the cache warm.
+    Blocking (requests); call from a worker thread.
+    """
+
+    def __init__(self, cache: Optional[ResponseCache]) -> None:
+        self.cache = cache
+
+    @staticmethod
+    def _scope(ds: DocuSignSettings) -> str:
+        return f"{ds.integration_key}|{ds.user_id}|{ds.token_scopes}"
+
+    def _get(self, op: str, url: str, *, account_id: str, resource: str) -> Any:
+        ds = docusign_settings()
+
+        def fetch(prev: Optional[CacheEntry]) -> Optional[Fetched]:
+            headers = _auth_headers()
+            if prev is not None and prev.etag:
+                headers["If-None-Match"] = prev.etag
+            resp = _http_get(op, url, headers)
+            if resp.status_code == 304 and prev is not None:
+                return None
+            if resp.status_code != 200:
+                raise _http_error(op, resp)
+            return Fetched(resp.json(), len(resp.content), resp.headers.get("ETag"))
+
+        if self.cache is None:
+            got = fetch(None)
+            assert got is not None
+            return got.value
+        return self.cache.get((self._scope(ds), account_id, resource), fetch, op=op, ttl_s=_ttl(op))
+
+    def userinfo(self) -> Dict[str, Any]:
+        ds = docusign_settings()
+        return self._get("userinfo", f"{ds.auth_base_url}/oauth/userinfo", account_id="", resource="/oauth/userinfo")
+
+    def account_base(self, account_id: str) -> str:
+        """
+        REST base URL for an account, from the (cached) userinfo accounts list.
+        """
+        for acct in self.userinfo().get("accounts") or []:
+            if str(acct.get("account_id", "")).lower() == account_id.lower() and acct.get("base_uri"):
+                return f"{acct['base_uri'].rstrip('/')}/restapi/v2.1/accounts/{account_id}"
+        raise DocuSignHTTPError("account_base", 404, f"account {account_id} not in userinfo")
+
+    def account(self, account_id: str) -> Dict[str, Any]:
+        base = self.account_base(account_id)
+        return self._get("account", base, account_id=account_id, resource="")
+
+    def envelope(self, account_id: str, envelope_id: str) -> Dict[str, Any]:
+        base = self.account_base(account_id)
+        resource = f"/envelopes/{envelope_id}"
+        return self._get("envelope", base + resource, account_id=account_id, resource=resource)
+
+    def list_status(self, account_id: str, envelope_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Summaries for many envelopes in one call (GET .../envelopes?envelope_ids=a,b,...).
+        Not cached: callers batch, so each id set is one-off.
+        """
+        url = self.account_base(account_id) + "/envelopes"
+        resp = _http_get("envelopes_list_status", url, _auth_headers(), {"envelope_ids": ",".join(envelope_ids)})
+        if resp.status_code != 200:
+            raise _http_error("envelopes_list_status", resp)
+        return list(resp.json().get("envelopes") or [])
+
+    def invalidate_envelope(self, account_id: str, envelope_id: str) -> bool:
+        """
+        Drop a cached envelope (e.g. a Connect event just reported a change).
+        """
+        ds = get_settings().docusign
+        if self.cache is None or not ds.configured:
+            return False
+        key = (self._scope(ds), account_id, f"/envelopes/{envelope_id}")
+        return self.cache.invalidate(key)
+
+
+def _cache_from_env() -> Optional[ResponseCache]:
+    if not cache_enabled():
+        return None
+    return ResponseCache(
+        "docusign",
+        max_entries=int(_float_env("GATEWAY_DOCUSIGN_CACHE_MAX_ENTRIES", 1024)),
+        max_bytes=int(_float_env("GATEWAY_DOCUSIGN_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+        stale_s=_float_env("GATEWAY_DOCUSIGN_CACHE_STALE_SECONDS", 30.0),
+    )
+
+
+CLIENT = DocuSignClient(_cache_from_env())
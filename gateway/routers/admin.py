@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Query
+
+from gateway.db import integrity
+from gateway.db.reader import READS
+from gateway.docusign_client import CLIENT as docusign_client
+from gateway.services import profiler
+from gateway.services.admission import LIMITER
+from gateway.services.enrichment import ENRICHER
+from gateway.services.ingest import SCHEDULER
+from gateway.services.reorder import REORDER
+
+# Operator endpoints. Protect behind edge auth (Traefik) like /events/*.
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/profile")
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+) -> Dict[str, Any]:
+    """
+    Sample all threads of this worker for `seconds` and write a collapsed-stack
+    profile for offline flamegraphs. Returns 409 if a profile is already running.
+    """
+    sampler = profiler.claim_on_demand(interval=interval_ms / 1000.0)
+    if sampler is None:
+        raise HTTPException(status_code=409, detail="a profile is already running in this worker")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.release(sampler)
+
+    path = sampler.write(f"on-demand-{seconds:g}s")
+    return {
+        "ok": path is not None,
+        "path": str(path) if path else None,
+        "samples": sampler.samples,
+        "distinct_stacks": len(sampler.stacks),
+    }
+
+
+@router.get("/ingest")
+async def ingest_status() -> Dict[str, Any]:
+    """
+    Per-provider ingest queues, worker budgets and in-flight counts (this worker).
+    """
+    return SCHEDULER.status()
+
+
+@router.get("/admission")
+async def admission_status() -> Dict[str, Any]:
+    """
+    Adaptive ingress limiter state (this worker): limit, in-flight, shed count.
+    """
+    return LIMITER.status()
+
+
+@router.get("/reorder")
+async def reorder_status() -> Dict[str, Any]:
+    """
+    Envelope reorder buffer state (this worker): delay, buffered/spilled
+    entries, released/late counts, stream subscribers.
+    """
+    return REORDER.status()
+
+
+@router.get("/cache")
+async def cache_status() -> Dict[str, Any]:
+    """
+    DocuSign read cache (this worker): entries, bytes, lookups by result, hit ratio.
+    """
+    cache = docusign_client.cache
+    return {"docusign": cache.status() if cache is not None else {"enabled": False}}
+
+
+@router.get("/enrichment")
+async def enrichment_status() -> Dict[str, Any]:
+    """
+    Batched envelope enrichment (this worker): pending events, calls made,
+    events resolved per call, drops and errors.
+    """
+    return ENRICHER.status()
+
+
+@router.get("/reads")
+async def reads_status() -> Dict[str, Any]:
+    """
+    /events reader pool (this worker): threads, budget, reads in flight,
+    completed, and interrupted by reason (budget, disconnected, cancelled).
+    """
+    return READS.status()
+
+
+@router.get("/integrity")
+async def integrity_status() -> Dict[str, Any]:
+    """
+    Events hash chain: head, sealed checkpoints, last seal / incremental /
+    full verification runs and recent failures (all workers), plus this
+    worker's auditor state.
+    """
+    out = await asyncio.to_thread(integrity.report)
+    out["auditor"] = integrity.AUDITOR.status()
+    return out
+
+
+@router.post("/integrity/verify", status_code=202)
+async def integrity_verify(
+    jobs: int = Query(0, ge=0, le=64),
+    deep: bool = Query(False),
+) -> Dict[str, Any]:
+    """
+    Start a full verification of the chain across `jobs` processes (default:
+    all cores); the result appears under last_runs.full. Returns 409 if one
+    is already running in this worker.
+    """
+    if not integrity.AUDITOR.start_full(jobs=jobs, deep=deep):
+        raise HTTPException(status_code=409, detail="a full verification is already running in this worker")
+    return {"started": True, "jobs": jobs or None, "deep": deep}
+
+
+@router.get("/integrity/proof/{event_id}")
+async def integrity_proof(event_id: str) -> Dict[str, Any]:
+    """
+    Merkle audit path from one event's row hash to its checkpoint root.
+    """
+    out = await asyncio.to_thread(integrity.proof, event_id)
+    if out is None:
+        raise HTTPException(status_code=404, detail="event not found")
+    return out
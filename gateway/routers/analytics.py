@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from gateway.db.snapshots import COMPACTOR
+from gateway.services import analytics
+from gateway.services.metrics import ANALYTICS_QUERY_SECONDS
+
+# Ops dashboards over the hourly columnar snapshots (gateway/db/snapshots.py).
+# Protect behind edge auth (Traefik) like /events/*.
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+_BUCKETS_MS = {"minute": 60_000, "hour": 3_600_000, "day": 86_400_000}
+
+
+def _parse_time(value: str, name: str) -> datetime:
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid {name}: expected ISO-8601")
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def _window(since: Optional[str], until: Optional[str], days: float, bucket_ms: int) -> Tuple[int, int]:
+    """
+    [since, until) in epoch ms, widened to whole buckets. Defaults: until = now,
+    since = until - days.
+    """
+    end = _parse_time(until, "until") if until else datetime.now(timezone.utc)
+    start = _parse_time(since, "since") if since else end - timedelta(days=days)
+    since_ms, until_ms = analytics.to_ms(start), analytics.to_ms(end)
+    if until_ms <= since_ms:
+        raise HTTPException(status_code=400, detail="until must be after since")
+    since_ms -= since_ms % bucket_ms
+    until_ms += -until_ms % bucket_ms
+    return since_ms, until_ms
+
+
+def _filters(**values: Optional[str]) -> Dict[str, str]:
+    out = {k: v for k, v in values.items() if v}
+    if "account" in out:
+        out["account"] = out["account"].lower()
+    return out
+
+
+async def _run(route: str, fn: Any, **kwargs: Any) -> Dict[str, Any]:
+    if not analytics.numpy_available():
+        raise HTTPException(status_code=503, detail="analytics needs numpy (pip install -r requirements.txt)")
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(fn, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        ANALYTICS_QUERY_SECONDS.labels(route).observe(time.perf_counter() - t0)
+    result["compute_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return result
+
+
+def _coverage() -> Dict[str, Any]:
+    cov = analytics.STORE.coverage()
+    return {"from": cov["from"], "until": cov["until"], "segments": cov["segments"]}
+
+
+@router.get("/deliveries")
+async def deliveries(
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$"),
+    by: Optional[str] = Query("event_type", max_length=32, description="dimension, or 'none'"),
+    since: Optional[str] = Query(None, max_length=40),
+    until: Optional[str] = Query(None, max_length=40),
+    days: float = Query(7.0, gt=0, le=366),
+    top: int = Query(20, ge=1, le=500),
+    source: Optional[str] = Query(None, max_length=64),
+    kind: Optional[str] = Query(None, max_length=64),
+    event_type: Optional[str] = Query(None, max_length=128),
+    account: Optional[str] = Query(None, max_length=64),
+    verify_status: Optional[str] = Query(None, max_length=64),
+) -> JSONResponse:
+    """
+    Delivery counts per minute/hour/day, one dense series per group of `by`
+    (source|kind|event_type|account|verify_status|none), top groups by total.
+    Covers sealed hours only; see "coverage" for what the snapshots hold.
+    """
+    bucket_ms = _BUCKETS_MS[bucket]
+    since_ms, until_ms = _window(since, until, days, bucket_ms)
+    result = await _run(
+        "/analytics/deliveries",
+        analytics.delivery_counts,
+        since_ms=since_ms,
+        until_ms=until_ms,
+        bucket_ms=bucket_ms,
+        by=None if by in (None, "", "none") else by,
+        filters=_filters(source=source, kind=kind, event_type=event_type, account=account,
+                         verify_status=verify_status),
+        top=top,
+    )
+    # Minute series over long windows are large; skip jsonable_encoder.
+    return JSONResponse({"ready": True, "bucket": bucket, "by": by, "coverage": _coverage(), **result})
+
+
+@router.get("/body-size")
+async def body_size(
+    by: Optional[str] = Query("account", max_length=32, description="dimension, or 'none'"),
+    q: str = Query("0.5,0.95,0.99", max_length=64, description="comma-separated quantiles in [0, 1]"),
+    since: Optional[str] = Query(None, max_length=40),
+    until: Optional[str] = Query(None, max_length=40),
+    days: float = Query(7.0, gt=0, le=366),
+    top: int = Query(50, ge=1, le=1000),
+    source: Optional[str] = Query(None, max_length=64),
+    kind: Optional[str] = Query(None, max_length=64),
+    event_type: Optional[str] = Query(None, max_length=128),
+    account: Optional[str] = Query(None, max_length=64),
+    verify_status: Optional[str] = Query(None, max_length=64),
+) -> Dict[str, Any]:
+    """
+    Body size (uncompressed bytes) quantiles, mean and max per group of `by`,
+    for the `top` groups by delivery count.
+    """
+    try:
+        quantiles = sorted({float(x) for x in q.split(",") if x.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="q must be comma-separated numbers")
+    if not quantiles or any(not 0.0 <= x <= 1.0 for x in quantiles):
+        raise HTTPException(status_code=400, detail="quantiles must be in [0, 1]")
+    since_ms, until_ms = _window(since, until, days, 1000)
+    result = await _run(
+        "/analytics/body-size",
+        analytics.body_size_quantiles,
+        since_ms=since_ms,
+        until_ms=until_ms,
+        by=None if by in (None, "", "none") else by,
+        filters=_filters(source=source, kind=kind, event_type=event_type, account=account,
+                         verify_status=verify_status),
+        quantiles=quantiles,
+        top=top,
+    )
+    return {
+        "ready": True,
+        "by": by,
+        "since": analytics.ms_to_iso(since_ms),
+        "until": analytics.ms_to_iso(until_ms),
+        "coverage": _coverage(),
+        **result,
+    }
+
+
+@router.get("/snapshots")
+async def snapshots() -> Dict[str, Any]:
+    """
+    Compactor state (this worker) and what the snapshot directory covers.
+    """
+    return {
+        "numpy": analytics.numpy_available(),
+        "compactor": COMPACTOR.status(),
+        "coverage": await asyncio.to_thread(analytics.STORE.coverage),
+    }
@@ -1,22 +1,15 @@
 from __future__ import annotations
 
-import os
 import time
 import json
 from typing import Any, Dict
 
-import jwt  # PyJWT
-import requests
 from fastapi import APIRouter, HTTPException
 
-router = APIRouter()
-
+from gateway.services.metrics import DOCUSIGN_HTTP_SECONDS
+from gateway.settings import get_settings
 
-def _require_env(name: str) -> str:
-    v = os.getenv(name, "").strip()
-    if not v:
-        raise HTTPException(status_code=500, detail=f"Missing required env var: {name}")
-    return v
+router = APIRouter()
 
 
 def _read_private_key(path: str) -> str:
@@ -44,10 +37,18 @@ def jwt_test() -> Dict[str, Any]:
       2) exchanging it for an access token at /oauth/token
       3) calling /oauth/userinfo using that access token
     """
-    ds_client_id = _require_env("DS_CLIENT_ID")
-    ds_user_guid = _require_env("DS_IMPERSONATED_USER_GUID")
-    ds_auth_server = _require_env("DS_AUTH_SERVER")  # e.g. account-d.docusign.com
-    ds_private_key_path = _require_env("DS_PRIVATE_KEY_PATH")
+    # Imported here so startup does not pay for PyJWT/cryptography and requests.
+    import jwt  # PyJWT
+    import requests
+
+    ds = get_settings().docusign
+    missing = ds.missing()
+    if missing:
+        raise HTTPException(status_code=500, detail=f"Missing required env var: {missing[0]}")
+    ds_client_id = ds.integration_key
+    ds_user_guid = ds.user_id
+    ds_auth_server = ds.auth_server  # e.g. account-d.docusign.com
+    ds_private_key_path = ds.private_key_path
 
     private_key_pem = _read_private_key(ds_private_key_path)
 
@@ -66,16 +67,19 @@ def jwt_test() -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"JWT signing failed: {e}")
 
-    token_url = f"https://{ds_auth_server}/oauth/token"
+    token_url = f"{ds.auth_base_url}/oauth/token"
     data = {
         "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
         "assertion": assertion,
     }
 
+    t0 = time.perf_counter()
     try:
         token_resp = requests.post(token_url, data=data, timeout=20)
     except Exception as e:
+        DOCUSIGN_HTTP_SECONDS.labels("oauth_token", "error").observe(time.perf_counter() - t0)
         raise HTTPException(status_code=502, detail=f"Token request to DocuSign failed: {e}")
+    DOCUSIGN_HTTP_SECONDS.labels("oauth_token", str(token_resp.status_code)).observe(time.perf_counter() - t0)
 
     if token_resp.status_code != 200:
         raise HTTPException(
@@ -96,13 +100,16 @@ def jwt_test() -> Dict[str, Any]:
             detail={"step": "oauth_token", "error": "No access_token in response", "body": token_json},
         )
 
-    userinfo_url = f"https://{ds_auth_server}/oauth/userinfo"
+    userinfo_url = f"{ds.auth_base_url}/oauth/userinfo"
     headers = {"Authorization": f"Bearer {access_token}"}
 
+    t0 = time.perf_counter()
     try:
         ui_resp = requests.get(userinfo_url, headers=headers, timeout=20)
     except Exception as e:
+        DOCUSIGN_HTTP_SECONDS.labels("oauth_userinfo", "error").observe(time.perf_counter() - t0)
         raise HTTPException(status_code=502, detail=f"Userinfo request to DocuSign failed: {e}")
+    DOCUSIGN_HTTP_SECONDS.labels("oauth_userinfo", str(ui_resp.status_code)).observe(time.perf_counter() - t0)
 
     if ui_resp.status_code != 200:
         raise HTTPException(
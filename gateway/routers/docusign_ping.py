@@ -1,12 +1,9 @@
 # gateway/routers/docusign_ping.py
 
 from fastapi import APIRouter, HTTPException
-import requests
 
-from gateway.docusign_auth import (
-    get_docusign_access_token,
-    DS_AUTH_SERVER,
-)
+from gateway.docusign_auth import DocuSignNotConfigured, docusign_settings
+from gateway.docusign_client import CLIENT, DocuSignHTTPError
 
 router = APIRouter(prefix="/docusign", tags=["docusign"])
 
@@ -16,22 +13,19 @@ def docusign_ping():
     """
     Smoke test:
     - Uses JWT helper to get a token
-    - Calls DocuSign /oauth/userinfo
+    - Calls DocuSign /oauth/userinfo (through the response cache)
     """
-    token = get_docusign_access_token()
-
-    url = f"https://{DS_AUTH_SERVER}/oauth/userinfo"
-    resp = requests.get(
-        url,
-        headers={"Authorization": f"Bearer {token}"},
-        timeout=15,
-    )
-
-    if resp.status_code != 200:
-        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    try:
+        ds = docusign_settings()
+        userinfo = CLIENT.userinfo()
+    except DocuSignNotConfigured as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DocuSignHTTPError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.body)
 
     return {
         "status": "ok",
-        "auth_server": DS_AUTH_SERVER,
-        "userinfo": resp.json(),
+        "auth_server": ds.auth_server,
+        "auth_base_url": ds.auth_base_url,
+        "userinfo": userinfo,
     }
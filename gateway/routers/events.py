@@ -1,16 +1,62 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
-from typing import Any, Dict, List, Optional, Tuple, Union
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 
+from gateway.db.blobs import blob_path
+from gateway.db.codecs import decode_body
+from gateway.db.envelopes import encode_cursor, history_query
+from gateway.db.headers import rebuild_headers_json
 from gateway.db.init_db import ensure_schema
-from gateway.db.sqlite import connect
+from gateway.db.reader import READS, ReadInterrupted
+from gateway.services.metrics import EVENTS_QUERY_SECONDS
+from gateway.services.reorder import REORDER
+from gateway.services.timing import span
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
+def _timed(route: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Record handler latency under gateway_events_query_seconds{route=...};
+    streamed responses are observed when their last chunk is sent.
+    functools.wraps keeps the signature FastAPI inspects for query params.
+    """
+    hist = EVENTS_QUERY_SECONDS.labels(route)
+
+    async def observed(body: AsyncIterator[Any], t0: float) -> AsyncIterator[Any]:
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            hist.observe(time.perf_counter() - t0)
+
+    def deco(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            t0 = time.perf_counter()
+            streamed = False
+            try:
+                out = await fn(*args, **kwargs)
+                if isinstance(out, StreamingResponse):
+                    out.body_iterator = observed(out.body_iterator, t0)
+                    streamed = True
+                return out
+            finally:
+                if not streamed:
+                    hist.observe(time.perf_counter() - t0)
+
+        return wrapper
+
+    return deco
+
+
 def _as_dict(obj: Any) -> Dict[str, Any]:
     """
     Convert a DBStatus-like object (or dict/bool) into a plain dict.
@@ -81,13 +127,31 @@ def _truncate(s: Optional[str], max_len: int) -> Optional[str]:
     return s[:max_len] + f"...({len(s)} chars)"
 
 
-def _body_to_text(body: Optional[Union[bytes, bytearray, str]], max_len: int) -> Optional[str]:
+def _body_to_text(
+    body: Optional[Union[bytes, bytearray, str]],
+    max_len: int,
+    codec: Optional[str] = None,
+    size: Optional[int] = None,
+) -> Optional[str]:
     """
-    body_raw is stored as a BLOB in SQLite (bytes).
+    body_raw is stored as a BLOB in SQLite (bytes), compressed when body_codec is set.
     Convert to display-safe text with truncation.
+
+    Compressed bodies are only inflated as far as the view needs (a UTF-8 char
+    is at most 4 bytes); when the rest was never inflated the suffix reports
+    the stored body_size in bytes instead of a char count.
     """
     if body is None:
         return None
+    if codec and isinstance(body, (bytes, bytearray)):
+        try:
+            data, complete = decode_body(body, codec, max_bytes=max_len * 4)
+        except Exception as e:
+            return f"<undecodable body (codec={codec}): {e}>"
+        txt = data.decode("utf-8", errors="replace")
+        if complete:
+            return _truncate(txt, max_len)
+        return txt[:max_len] + (f"...({size} bytes)" if size is not None else "...")
     if isinstance(body, (bytes, bytearray)):
         txt = bytes(body).decode("utf-8", errors="replace")
         return _truncate(txt, max_len)
@@ -123,6 +187,50 @@ def _fetchone_dict(conn, sql: str, params: Tuple[Any, ...]) -> Optional[Dict[str
     return dict(zip(cols, r))
 
 
+def _dumps(obj: Any) -> str:
+    # Same compact encoding as FastAPI's JSONResponse.
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _stream_events(
+    head: Dict[str, Any],
+    first: List[str],
+    rest: AsyncIterator[List[str]],
+    tail: Optional[Callable[[int], Dict[str, Any]]] = None,
+) -> StreamingResponse:
+    """
+    Write head + "events" + "returned" as one JSON object, a chunk at a time
+    as rows are read. Chunks hold events already encoded with _dumps (on the
+    reader pool). A read that fails after the first chunk ends the list
+    early and adds "truncated": <reason>. tail(returned) adds fields after
+    the list.
+    """
+
+    async def body() -> AsyncIterator[bytes]:
+        yield (_dumps(head)[:-1] + ',"events":[').encode("utf-8")
+        n, error = 0, None
+        chunk = first
+        try:
+            while chunk:
+                yield (("," if n else "") + ",".join(chunk)).encode("utf-8")
+                n += len(chunk)
+                chunk = await anext(rest, [])
+        except ReadInterrupted as e:
+            error = e.reason
+        except Exception as e:
+            error = str(e)
+        finally:
+            await rest.aclose()
+        out: Dict[str, Any] = {"returned": n}
+        if tail is not None:
+            out.update(tail(n))
+        if error is not None:
+            out["truncated"] = error
+        yield ("]," + _dumps(out)[1:]).encode("utf-8")
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
 def _maybe_parse_json(text: Optional[str], include_parsed: int) -> Optional[Any]:
     """
     json_parsed is stored as TEXT. It may already be JSON or may be None.
@@ -137,18 +245,22 @@ def _maybe_parse_json(text: Optional[str], include_parsed: int) -> Optional[Any]
 
 
 @router.get("/latest")
+@_timed("/events/latest")
 async def latest_events(
+    request: Request,
     limit: int = Query(50, ge=1, le=200),
     include_body: int = Query(0, ge=0, le=1),
     body_max_chars: int = Query(4000, ge=256, le=200000),
     include_json_obj: int = Query(0, ge=0, le=1),
-) -> Dict[str, Any]:
+) -> Any:
     """
     DB-backed latest events (schema-aligned).
     Safe-by-default: body omitted unless include_body=1.
+    Rows are read on the reader pool and streamed in chunks.
     Returns HTTP 200 even when DB is disabled/degraded.
     """
-    status = _db_status()
+    with span("db_status"):
+        status = _db_status()
     if not status["ready"]:
         return {"ready": False, "db": status["db"], "returned": 0, "events": []}
 
@@ -166,36 +278,23 @@ async def latest_events(
           path,
           remote_addr,
           status_code,
-          headers_json,
+          e.headers_json as headers_json,
+          hs.headers_json as header_set_json,
           body_sha256,
           json_parsed,
           verify_status,
           verify_reason,
           dedupe_key,
-          body_raw
-        from events
+          body_raw,
+          body_codec,
+          body_size
+        from events e
+        left join header_sets hs on hs.set_hash = e.header_set_hash
         order by received_at desc
         limit ?
     """
 
-    try:
-        c = connect()
-        rows = _fetchall_dicts(c, sql, (limit,))
-    except Exception as e:
-        return {
-            "ready": False,
-            "db": {**status["db"], "mode": "error", "detail": str(e)},
-            "returned": 0,
-            "events": [],
-        }
-    finally:
-        try:
-            c.close()
-        except Exception:
-            pass
-
-    events: List[Dict[str, Any]] = []
-    for r in rows:
+    def render(r: Dict[str, Any]) -> str:
         evt = {
             "event_id": r.get("event_id"),
             "kind": r.get("kind"),
@@ -209,7 +308,7 @@ async def latest_events(
             "path": r.get("path"),
             "remote_addr": r.get("remote_addr"),
             "status_code": r.get("status_code"),
-            "headers_json": r.get("headers_json"),
+            "headers_json": rebuild_headers_json(r.get("header_set_json"), r.get("headers_json")),
             "body_sha256": r.get("body_sha256"),
             "json_parsed": r.get("json_parsed"),
             "json_obj": _maybe_parse_json(r.get("json_parsed"), include_json_obj),
@@ -218,15 +317,30 @@ async def latest_events(
             "dedupe_key": r.get("dedupe_key"),
         }
         if include_body:
-            evt["body_raw"] = _body_to_text(r.get("body_raw"), body_max_chars)
+            evt["body_raw"] = _body_to_text(
+                r.get("body_raw"), body_max_chars, r.get("body_codec"), r.get("body_size")
+            )
+        return _dumps(evt)
 
-        events.append(evt)
+    rows = READS.stream(sql, (limit,), request=request, map=render)
+    try:
+        with span("db_query"):
+            first = await anext(rows, [])
+    except Exception as e:
+        return {
+            "ready": False,
+            "db": {**status["db"], "mode": "error", "detail": str(e)},
+            "returned": 0,
+            "events": [],
+        }
 
-    return {"ready": True, "db": status["db"], "returned": len(events), "events": events}
+    return _stream_events({"ready": True, "db": status["db"]}, first, rows)
 
 
 @router.get("/{event_id}")
+@_timed("/events/{event_id}")
 async def get_event(
+    request: Request,
     event_id: str,
     include_body: int = Query(1, ge=0, le=1),
     body_max_chars: int = Query(200000, ge=256, le=200000),
@@ -237,13 +351,14 @@ async def get_event(
     Returns HTTP 200 with event=None if not found.
     Never crashes if DB disabled/degraded.
     """
-    status = _db_status()
+    with span("db_status"):
+        status = _db_status()
     if not status["ready"]:
         return {"ready": False, "db": status["db"], "event": None}
 
     sql = """
         select
-          event_id,
+          e.event_id as event_id,
           kind,
           source,
           namespace,
@@ -255,32 +370,36 @@ async def get_event(
           path,
           remote_addr,
           status_code,
-          headers_json,
+          e.headers_json as headers_json,
+          hs.headers_json as header_set_json,
           body_sha256,
           json_parsed,
           verify_status,
           verify_reason,
           dedupe_key,
-          body_raw
-        from events
-        where event_id = ?
+          body_raw,
+          body_codec,
+          body_size,
+          en.result as enrichment_result,
+          en.status as enrichment_status,
+          en.status_changed_at as enrichment_status_changed_at,
+          en.enriched_at as enriched_at
+        from events e
+        left join header_sets hs on hs.set_hash = e.header_set_hash
+        left join event_enrichment en on en.event_id = e.event_id
+        where e.event_id = ?
         limit 1
     """
 
     try:
-        c = connect()
-        r = _fetchone_dict(c, sql, (event_id,))
+        with span("db_query"):
+            r = await READS.run(lambda c: _fetchone_dict(c, sql, (event_id,)), request=request)
     except Exception as e:
         return {
             "ready": False,
             "db": {**status["db"], "mode": "error", "detail": str(e)},
             "event": None,
         }
-    finally:
-        try:
-            c.close()
-        except Exception:
-            pass
 
     if not r:
         return {"ready": True, "db": status["db"], "event": None}
@@ -298,26 +417,41 @@ async def get_event(
         "path": r.get("path"),
         "remote_addr": r.get("remote_addr"),
         "status_code": r.get("status_code"),
-        "headers_json": r.get("headers_json"),
+        "headers_json": rebuild_headers_json(r.get("header_set_json"), r.get("headers_json")),
         "body_sha256": r.get("body_sha256"),
         "json_parsed": r.get("json_parsed"),
         "json_obj": _maybe_parse_json(r.get("json_parsed"), include_json_obj),
         "verify_status": r.get("verify_status"),
         "verify_reason": r.get("verify_reason"),
         "dedupe_key": r.get("dedupe_key"),
+        "enrichment": (
+            {
+                "result": r.get("enrichment_result"),
+                "envelope_status": r.get("enrichment_status"),
+                "status_changed_at": r.get("enrichment_status_changed_at"),
+                "enriched_at": r.get("enriched_at"),
+            }
+            if r.get("enrichment_result")
+            else None
+        ),
     }
     if include_body:
-        evt["body_raw"] = _body_to_text(r.get("body_raw"), body_max_chars)
+        evt["body_raw"] = _body_to_text(
+            r.get("body_raw"), body_max_chars, r.get("body_codec"), r.get("body_size")
+        )
 
     return {"ready": True, "db": status["db"], "event": evt}
 
 
 @router.get("/stats/summary")
-async def stats_summary() -> Dict[str, Any]:
+@_timed("/events/stats/summary")
+async def stats_summary(request: Request) -> Dict[str, Any]:
     """
-    Minimal stats for demos/ops. Always returns HTTP 200.
+    Minimal stats for demos/ops. Always returns HTTP 200; a scan over the
+    read budget (GATEWAY_DB_READ_BUDGET_SECONDS) returns ready=false.
     """
-    status = _db_status()
+    with span("db_status"):
+        status = _db_status()
     if not status["ready"]:
         return {
             "ready": False,
@@ -325,14 +459,17 @@ async def stats_summary() -> Dict[str, Any]:
             "stats": {"events_total": 0, "by_source": {}, "by_kind": {}, "by_namespace": {}},
         }
 
-    try:
-        c = connect()
-        total_row = _fetchone_dict(c, "select count(*) as n from events", ())
-        by_source = _fetchall_dicts(c, "select source, count(*) as n from events group by source", ())
-        by_kind = _fetchall_dicts(c, "select kind, count(*) as n from events group by kind", ())
-        by_namespace = _fetchall_dicts(
-            c, "select namespace, count(*) as n from events group by namespace", ()
+    def scan(c) -> Tuple[Any, ...]:
+        return (
+            _fetchone_dict(c, "select count(*) as n from events", ()),
+            _fetchall_dicts(c, "select source, count(*) as n from events group by source", ()),
+            _fetchall_dicts(c, "select kind, count(*) as n from events group by kind", ()),
+            _fetchall_dicts(c, "select namespace, count(*) as n from events group by namespace", ()),
         )
+
+    try:
+        with span("db_query"):
+            total_row, by_source, by_kind, by_namespace = await READS.run(scan, request=request)
         total = int((total_row or {}).get("n", 0))
     except Exception as e:
         return {
@@ -340,11 +477,6 @@ async def stats_summary() -> Dict[str, Any]:
             "db": {**status["db"], "mode": "error", "detail": str(e)},
             "stats": {"events_total": 0, "by_source": {}, "by_kind": {}, "by_namespace": {}},
         }
-    finally:
-        try:
-            c.close()
-        except Exception:
-            pass
 
     return {
         "ready": True,
@@ -358,3 +490,100 @@ async def stats_summary() -> Dict[str, Any]:
             },
         },
     }
+
+
+@router.get("/envelopes/stream")
+async def envelope_stream(envelope_id: Optional[str] = Query(None, max_length=64)):
+    """
+    Live SSE stream of envelope events, ordered per envelope by provider
+    timestamp after the reorder delay (GATEWAY_REORDER_DELAY_MS). Each
+    message's id is its history cursor; a client that falls too far behind
+    is disconnected and resumes from /events/envelopes/{envelope_id}?after=<id>.
+    """
+    if not REORDER.enabled:
+        raise HTTPException(status_code=503, detail="envelope stream disabled (GATEWAY_REORDER_ENABLED=0)")
+    sub = REORDER.subscribe(envelope_id)
+
+    async def event_gen():
+        try:
+            while True:
+                evt = await sub.queue.get()
+                if evt is None:
+                    break
+                yield f"id: {evt['cursor']}\nevent: envelope\ndata: {json.dumps(evt, default=str)}\n\n"
+        except asyncio.CancelledError:
+            pass
+        finally:
+            REORDER.unsubscribe(sub)
+
+    return StreamingResponse(event_gen(), media_type="text/event-stream")
+
+
+@router.get("/envelopes/{envelope_id}")
+@_timed("/events/envelopes/{envelope_id}")
+async def envelope_events(
+    request: Request,
+    envelope_id: str,
+    after: Optional[str] = Query(None, max_length=256),
+    limit: int = Query(500, ge=1, le=5000),
+    include_json_obj: int = Query(0, ge=0, le=1),
+) -> Any:
+    """
+    One envelope's deliveries in provider order (provider timestamp, then
+    event-type hint, then arrival), read from the envelope_events index in a
+    single range scan and streamed in chunks. Page with after=<next_cursor>.
+    Returns HTTP 200 even when DB is disabled/degraded.
+    """
+    with span("db_status"):
+        status = _db_status()
+    if not status["ready"]:
+        return {"ready": False, "db": status["db"], "envelope_id": envelope_id, "returned": 0, "events": []}
+
+    try:
+        sql, params = history_query(envelope_id, after=after, limit=limit, include_json=bool(include_json_obj))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+    last: Dict[str, Any] = {}
+
+    def render(r: Dict[str, Any]) -> str:
+        evt = {k: r.get(k) for k in (
+            "event_id", "source", "event_type", "status", "recipient_id",
+            "provider_ts", "ts_source", "received_at",
+        )}
+        evt["cursor"] = last["cursor"] = encode_cursor(r)
+        if include_json_obj:
+            evt["json_obj"] = _maybe_parse_json(r.get("json_parsed"), 1)
+        return _dumps(evt)
+
+    def tail(returned: int) -> Dict[str, Any]:
+        return {"next_cursor": last["cursor"] if returned == limit else None}
+
+    rows = READS.stream(sql, params, request=request, map=render)
+    try:
+        with span("db_query"):
+            first = await anext(rows, [])
+    except Exception as e:
+        return {
+            "ready": False,
+            "db": {**status["db"], "mode": "error", "detail": str(e)},
+            "envelope_id": envelope_id,
+            "returned": 0,
+            "events": [],
+        }
+
+    return _stream_events(
+        {"ready": True, "db": status["db"], "envelope_id": envelope_id.lower()}, first, rows, tail
+    )
+
+
+@router.get("/documents/{sha256}")
+async def get_document(sha256: str):
+    """
+    A document taken out of a Connect payload, by the sha256 in its
+    "blob" reference (gateway/services/connect_parser.py).
+    """
+    path = blob_path(sha256)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="document not found")
+    return FileResponse(path, media_type="application/pdf", filename=f"{sha256.lower()}.pdf")
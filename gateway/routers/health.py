@@ -1,6 +1,13 @@
-from fastapi import APIRouter
+import asyncio
+from typing import Any, Dict
 
+from fastapi import APIRouter, Request
+
+from gateway.db.checkpoint import scheduler_status
 from gateway.db.init_db import ensure_schema
+from gateway.db.spool import SPOOL
+from gateway.services.admission import LIMITER
+from gateway.services.roles import ROLES
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -10,14 +17,33 @@ async def health_check():
     return {"status": "ok", "source": "python-unified-gateway"}
 
 
+def _blocking_status() -> Dict[str, Any]:
+    # Schema check, WAL size, spool backlog and lease holders touch the
+    # filesystem and SQLite (and can wait on a lock), so they run in a
+    # thread: a slow DB must not stall the loop serving this probe.
+    s = ensure_schema()
+    return {
+        "ready": bool(s.ready),
+        "db": {"enabled": s.enabled, "mode": s.mode, "detail": s.detail},
+        "wal_checkpoint": scheduler_status(),
+        "spool": SPOOL.status(),
+        "roles": ROLES.status(),
+    }
+
+
 @router.get("/ready")
-async def readiness_check():
+async def readiness_check(request: Request):
     """
     Readiness should never crash the process.
     It reports whether persistence is currently available.
     """
-    s = ensure_schema()
+    out = await asyncio.to_thread(_blocking_status)
     return {
-        "ready": bool(s.ready),
-        "db": {"enabled": s.enabled, "mode": s.mode, "detail": s.detail},
+        "ready": out["ready"],
+        "db": out["db"],
+        "wal_checkpoint": out["wal_checkpoint"],
+        "startup": getattr(request.app.state, "startup", None),
+        "spool": out["spool"],
+        "admission": {"limit": int(LIMITER.limit), "inflight": LIMITER.inflight, "shed": LIMITER.shed},
+        "roles": out["roles"],
     }
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from gateway.services.metrics import render
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """
+    Prometheus scrape endpoint.
+    Aggregates sibling worker snapshots when GATEWAY_METRICS_DIR is set.
+    """
+    return Response(content=render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,15 +1,36 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 import asyncio
 import json
-
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse, StreamingResponse
-
-from gateway.db.events_store import persist_inbound_event
+import math
+import time
+import uuid
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+from gateway.db.envelopes import extract_ref
+from gateway.docusign_client import CLIENT as docusign_client
+from gateway.db.events_store import build_row, persist_row
+from gateway.db.spool import SPOOL, spool_meta
+from gateway.services.admission import record_overload, record_persist_latency
+from gateway.services.connect_parser import parse_blocks, parse_delivery
+from gateway.services.enrichment import ENRICHER
+from gateway.services.ingest import SCHEDULER, IngestRejected
+from gateway.services.metrics import (
+    SSE_QUEUE_DEPTH,
+    SSE_SUBSCRIBERS,
+    WEBHOOK_ACK_SECONDS,
+    WEBHOOK_BODY_BYTES,
+)
+from gateway.services.profiler import run_followed
+from gateway.services.providers import PROVIDERS, ProviderSpec
+from gateway.services.reorder import REORDER
+from gateway.services.timing import span
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
@@ -17,6 +38,28 @@ router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 _webhook_events: List[Dict[str, Any]] = []
 _subscribers: List[asyncio.Queue] = []
 
+SSE_SUBSCRIBERS.set_function(lambda: len(_subscribers))
+SSE_QUEUE_DEPTH.set_function(lambda: sum(q.qsize() for q in list(_subscribers)))
+
+
+@dataclass(frozen=True)
+class _Route:
+    spec: ProviderSpec
+    ack_seconds: Any
+    body_bytes: Any
+
+
+# Precomputed per-provider dispatch: registry lookups and metric label
+# resolution happen once at import, not per delivery.
+_DISPATCH: Dict[str, _Route] = {
+    name: _Route(spec, WEBHOOK_ACK_SECONDS.labels(name), WEBHOOK_BODY_BYTES.labels(name))
+    for name, spec in PROVIDERS.items()
+}
+
+# Bodies at least this large are parsed on a worker thread, as are XML and
+# bodies with embedded documents of any size.
+_PARSE_INLINE_BYTES = 256 * 1024
+
 
 async def _broadcast_event(event: Dict[str, Any]) -> None:
     dead: List[asyncio.Queue] = []
@@ -30,33 +73,152 @@ async def _broadcast_event(event: Dict[str, Any]) -> None:
             _subscribers.remove(q)
 
 
-@router.post("/docusign")
-async def docusign_webhook(request: Request):
-    raw_body = await request.body()
-    headers = dict(request.headers)
+def _rejected(e: IngestRejected) -> JSONResponse:
+    return JSONResponse(
+        {"status": "rejected", "provider": e.provider, "reason": e.reason},
+        status_code=e.status_code,
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
 
+def _resolve(fut: "asyncio.Future[float]", value: float) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+async def _write(
+    provider: str, persist: Callable[[], Dict[str, Any]], db_started: "asyncio.Future[float]"
+) -> Dict[str, Any]:
+    """
+    Run persist through the scheduler. Only the DB part, from db_started
+    (resolved by persist once the row is built), is held to
+    SPOOL.persist_timeout_s (asyncio.TimeoutError): queue wait behind a
+    burst and body compression are not the DB being slow.
+    """
+    task = asyncio.ensure_future(SCHEDULER.submit(provider, persist))
+    await asyncio.wait({db_started, task}, return_when=asyncio.FIRST_COMPLETED)
+    if not db_started.done():
+        return await task  # rejected before it ran
+    remaining = SPOOL.persist_timeout_s - (time.perf_counter() - db_started.result())
+    # Shielded: a write that overruns still commits; replay dedupes it.
+    return await asyncio.wait_for(asyncio.shield(task), max(0.0, remaining))
+
+
+async def _ingest(request: Request, route: _Route):
+    t0 = time.perf_counter()
+    provider = route.spec.name
     try:
-        parsed = json.loads(raw_body)
-    except Exception:
-        parsed = None
-
-    # Best-effort persistence (fail-open)
-    persist_result = persist_inbound_event(
-        source="docusign",
-        method=request.method,
-        host=headers.get("host", ""),
-        path=str(request.url.path),
-        remote_addr=request.client.host if request.client else None,
-        headers=headers,
-        raw_body=raw_body,
-        json_parsed=parsed if isinstance(parsed, dict) else None,
-        correlation_id=headers.get("x-correlation-id") or headers.get("x-request-id"),
-    )
+        SCHEDULER.admit(provider)
+    except IngestRejected as e:
+        return _rejected(e)
+
+    with span("read_body"):
+        raw_body = await request.body()
+    headers = dict(request.headers)
+    route.body_bytes.observe(len(raw_body))
+
+    with span("parse"):
+        content_type = headers.get("content-type")
+        if len(raw_body) < _PARSE_INLINE_BYTES and not parse_blocks(raw_body, content_type):
+            parsed = parse_delivery(raw_body, content_type)
+        else:
+            # XML, embedded documents (blob writes) or just a large body:
+            # parsing would hold up the loop.
+            parsed = await asyncio.to_thread(run_followed, parse_delivery, raw_body, content_type)
+
+    correlation_id = next((headers[h] for h in route.spec.correlation_headers if headers.get(h)), None)
+    # Ids are fixed up front so a DB write and a spool replay of the same
+    # delivery produce the same row.
+    event_id = str(uuid.uuid4())
+    received_at = datetime.utcnow().isoformat() + "Z"
+    host = headers.get("host", "")
+    path = str(request.url.path)
+    remote_addr = request.client.host if request.client else None
+    envelope = extract_ref(provider, parsed if isinstance(parsed, dict) else None, received_at)
+
+    loop = asyncio.get_running_loop()
+    db_started: "asyncio.Future[float]" = loop.create_future()
+
+    def persist() -> Dict[str, Any]:
+        with span("persist"):
+            row = build_row(
+                source=provider,
+                method=request.method,
+                host=host,
+                path=path,
+                remote_addr=remote_addr,
+                headers=headers,
+                raw_body=raw_body,
+                json_parsed=parsed if isinstance(parsed, dict) else None,
+                correlation_id=correlation_id,
+                event_id=event_id,
+                received_at=received_at,
+                envelope=envelope,
+            )
+            loop.call_soon_threadsafe(_resolve, db_started, time.perf_counter())
+            return persist_row(row)
+
+    async def spool(reason: str) -> Dict[str, Any]:
+        with span("spool"):
+            meta = spool_meta(
+                event_id=event_id,
+                received_at=received_at,
+                source=provider,
+                method=request.method,
+                host=host,
+                path=path,
+                remote_addr=remote_addr,
+                headers=headers,
+                correlation_id=correlation_id,
+            )
+            return await SPOOL.append(meta, raw_body, reason)
+
+    # Best-effort persistence, scheduled fairly across providers. When the DB
+    # fails, a write overruns the timeout or the queue is full, the delivery
+    # goes to the durable spool and is replayed by the drainer once the DB
+    # recovers.
+    # The admission limiter is driven by the persist wait, not the whole
+    # request; spooling because the DB is bypassed, slow or backlogged counts
+    # as overload however fast the spool ACK is.
+    if SPOOL.should_bypass_db():
+        record_overload(request.scope)
+        persist_result = await spool("bypass")
+    else:
+        t_persist = time.perf_counter()
+        try:
+            if SPOOL.enabled:
+                persist_result = await _write(provider, persist, db_started)
+            else:
+                persist_result = await SCHEDULER.submit(provider, persist)
+        except asyncio.TimeoutError:
+            record_persist_latency(request.scope, time.perf_counter() - t_persist)
+            record_overload(request.scope)
+            SPOOL.mark_degraded()
+            # Deliveries queued behind the stuck write go to the spool now.
+            SCHEDULER.shed_queued()
+            persist_result = await spool("timeout")
+        except IngestRejected as e:
+            if not SPOOL.enabled or e.reason not in ("queue_full", "db_degraded"):
+                return _rejected(e)
+            record_overload(request.scope)
+            # queue_full is a backlog, not a DB fault: spool this one and
+            # keep writing the rest.
+            persist_result = await spool(e.reason)
+        else:
+            record_persist_latency(request.scope, time.perf_counter() - t_persist)
+            if persist_result.get("db_mode") != "degraded":
+                SPOOL.mark_healthy()
+            else:
+                record_overload(request.scope)
+                if SPOOL.enabled:
+                    SPOOL.mark_degraded()
+                    SCHEDULER.shed_queued()
+                    persist_result = await spool("degraded")
 
     event = {
         "id": len(_webhook_events) + 1,
-        "source": "docusign",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "source": provider,
+        "timestamp": received_at,
         "headers": headers,
         "body_raw": raw_body.decode(errors="replace"),
         "json": parsed,
@@ -68,15 +230,38 @@ async def docusign_webhook(request: Request):
     if len(_webhook_events) > 200:
         _webhook_events.pop(0)
 
-    await _broadcast_event(event)
-
+    with span("broadcast"):
+        await _broadcast_event(event)
+        if envelope is not None and not persist_result.get("deduplicated"):
+            REORDER.offer(envelope, event_id=event_id, source=provider, received_at=received_at)
+            if envelope.account_id:
+                # The envelope just changed: drop any cached GET, and queue the
+                # event for batched enrichment once it is in the DB.
+                docusign_client.invalidate_envelope(envelope.account_id, envelope.envelope_id)
+                if persist_result.get("persisted"):
+                    ENRICHER.submit(envelope.account_id, envelope.envelope_id, event_id)
+
+    route.ack_seconds.observe(time.perf_counter() - t0)
     return {
         "status": "received",
         "length": len(raw_body),
         "persisted": bool(persist_result.get("persisted")),
+        "spooled": bool(persist_result.get("spooled")),
     }
 
 
+def _route_for(provider: str) -> _Route:
+    route = _DISPATCH.get(provider)
+    if route is None:
+        raise HTTPException(status_code=404, detail=f"unknown webhook provider: {provider}")
+    return route
+
+
+@router.post("/docusign")
+async def docusign_webhook(request: Request):
+    return await _ingest(request, _route_for("docusign"))
+
+
 @router.get("/monitor")
 async def monitor_webhooks(limit: int = 50):
     recent = _webhook_events[-limit:]
@@ -95,6 +280,9 @@ async def monitor_stream():
                 yield f"data: {json.dumps(event, default=str)}\n\n"
         except asyncio.CancelledError:
             pass
+        finally:
+            if queue in _subscribers:
+                _subscribers.remove(queue)
 
     return StreamingResponse(event_gen(), media_type="text/event-stream")
 
@@ -104,6 +292,11 @@ async def monitor_ui():
     return HTMLResponse(MONITOR_HTML)
 
 
+@router.post("/{provider}")
+async def provider_webhook(provider: str, request: Request):
+    return await _ingest(request, _route_for(provider))
+
+
 MONITOR_HTML = r"""<!doctype html>
 <html lang="en">
 <head>
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from gateway.services.metrics import (
+    ADMISSION_INFLIGHT,
+    ADMISSION_LIMIT,
+    ADMISSION_SHED_TOTAL,
+)
+
+INGRESS = "ingress"
+PRIORITY = "priority"
+
+# Scope keys where the ingest route leaves how long persistence took, and
+# whether it ended in an overload outcome.
+PERSIST_LATENCY_KEY = "gateway.persist_latency_s"
+PERSIST_OVERLOAD_KEY = "gateway.persist_overloaded"
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def admission_enabled() -> bool:
+    return os.getenv("GATEWAY_ADMISSION_ENABLED", "1").strip() != "0"
+
+
+def classify(scope: Dict[str, Any]) -> str:
+    """
+    Only webhook deliveries are subject to the limiter. Health, metrics,
+    monitor UI/stream, /events and /admin are a separate class that is never
+    shed, so readiness probes keep answering while ingress backs off.
+    """
+    path = scope.get("path", "")
+    if scope.get("method") == "POST" and path.startswith("/webhooks/") and not path.startswith("/webhooks/monitor"):
+        return INGRESS
+    return PRIORITY
+
+
+def record_persist_latency(scope: Dict[str, Any], latency_s: float) -> None:
+    """
+    Called by the ingest route once the DB write has finished (or timed out
+    into the spool). Only this part feeds the limiter: body upload time
+    depends on the client's link, not on how loaded the gateway is.
+    """
+    scope[PERSIST_LATENCY_KEY] = latency_s
+
+
+def record_overload(scope: Dict[str, Any]) -> None:
+    """
+    Called by the ingest route when a delivery could not be written because
+    the gateway or its DB is overloaded (write timeout, full queue, DB
+    bypassed). The limiter backs off as for a slow persist, however fast the
+    spooled ACK was.
+    """
+    scope[PERSIST_OVERLOAD_KEY] = True
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit driven by observed persist latency.
+
+    - A delivery whose persist finishes under target_s while the limit is in
+      use raises the limit by 1/limit (about +1 per limit's worth of
+      deliveries).
+    - A persist slower than target_s, an overload outcome (write timeout,
+      full queue, DB bypassed) or a 5xx cuts the limit by `backoff`, at most
+      once per target_s so one slow burst is not counted many times.
+    - A delivery that never reached persistence for other reasons (rate
+      limited, bad request) only frees its slot.
+
+    Runs on the event loop only; no locking.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        target_s: float,
+        backoff: float = 0.9,
+    ) -> None:
+        self.min_limit = max(1.0, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial))
+        self.target_s = target_s
+        self.backoff = backoff
+        self.inflight = 0
+        self.ewma_s = 0.0
+        self.admitted = 0
+        self.shed = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= int(self.limit):
+            self.shed += 1
+            return False
+        self.inflight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, latency_s: Optional[float], ok: bool, overloaded: bool = False) -> None:
+        self.inflight -= 1
+        if latency_s is not None:
+            self.ewma_s = latency_s if self.ewma_s == 0.0 else 0.8 * self.ewma_s + 0.2 * latency_s
+        slow = overloaded or (latency_s is not None and latency_s > self.target_s)
+        if not ok or slow:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_s:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif latency_s is not None and (self.inflight + 1) * 2 >= self.limit:
+            # Only grow while the limit is actually being exercised.
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "limit_exact": round(self.limit, 3),
+            "min_limit": int(self.min_limit),
+            "max_limit": int(self.max_limit),
+            "inflight": self.inflight,
+            "target_ms": round(self.target_s * 1000, 1),
+            "latency_ewma_ms": round(self.ewma_s * 1000, 3),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "decreases": self.decreases,
+        }
+
+
+def limiter_from_env() -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        initial=_float_env("GATEWAY_ADMISSION_INITIAL_LIMIT", 32),
+        min_limit=_float_env("GATEWAY_ADMISSION_MIN_LIMIT", 4),
+        max_limit=_float_env("GATEWAY_ADMISSION_MAX_LIMIT", 256),
+        target_s=_float_env("GATEWAY_ADMISSION_TARGET_MS", 250.0) / 1000.0,
+    )
+
+
+LIMITER = limiter_from_env()
+ADMISSION_LIMIT.set_function(lambda: int(LIMITER.limit))
+ADMISSION_INFLIGHT.set_function(lambda: LIMITER.inflight)
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware in front of webhook ingress.
+
+    Over the adaptive limit a delivery gets an immediate 503 with Retry-After
+    (DocuSign Connect retries) instead of queuing behind a slow database.
+    Disabled with GATEWAY_ADMISSION_ENABLED=0.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self.enabled = admission_enabled()
+        self.retry_after = str(max(1, int(_float_env("GATEWAY_ADMISSION_RETRY_AFTER_SECONDS", 5))))
+        self._shed = ADMISSION_SHED_TOTAL.labels(INGRESS)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if not self.enabled or scope["type"] != "http" or classify(scope) != INGRESS:
+            await self.app(scope, receive, send)
+            return
+
+        if not LIMITER.try_acquire():
+            self._shed.inc()
+            await self._reject(send)
+            return
+
+        status: List[int] = [0]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 429 is a per-provider rate limit, not a sign of overload.
+            LIMITER.release(
+                scope.get(PERSIST_LATENCY_KEY),
+                ok=0 < status[0] < 500,
+                overloaded=bool(scope.get(PERSIST_OVERLOAD_KEY)),
+            )
+
+    async def _reject(self, send: Any) -> None:
+        body = json.dumps({"status": "rejected", "reason": "overloaded"}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"retry-after", self.retry_after.encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
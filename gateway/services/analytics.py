@@ -0,0 +1,351 @@
+"""
+Aggregations over the hourly columnar snapshots (gateway/db/snapshots.py).
+
+Segments are memory-mapped and read as NumPy views, so a query touches
+only the columns it needs and never the live database. Group-bys are
+vectorized: per segment the dictionary codes are remapped to query-wide
+codes with one take, then counted with np.bincount into a flat
+(bucket x returned group) array; quantiles sort one packed
+(group << 32 | size) key.
+
+NumPy is imported on first use so it stays out of gateway start-up.
+"""
+from __future__ import annotations
+
+import importlib.util
+import mmap
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from gateway.db.snapshots import CODE_COLUMNS, hour_of_segment, list_segments, read_meta, snapshot_dir
+
+HOUR_MS = 3_600_000
+OTHER = "(other)"
+NONE = "(none)"  # label for rows without a value ("" in segment dictionaries)
+# Largest (bucket x series) grid delivery_counts builds: 40 MB of int64.
+MAX_GRID_CELLS = 5_000_000
+
+
+def numpy_available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+
+def _np() -> Any:
+    import numpy
+
+    return numpy
+
+
+def to_ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def ms_to_iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class _Segment:
+    path: Path
+    stamp: Tuple[int, int]  # (mtime_ns, size)
+    start_ms: int
+    meta: Dict[str, Any]
+    buf: mmap.mmap
+    _views: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta["rows"])
+
+    @property
+    def end_ms(self) -> int:
+        return self.start_ms + HOUR_MS
+
+    def column(self, name: str) -> Any:
+        view = self._views.get(name)
+        if view is None:
+            col = self.meta["columns"][name]
+            np = _np()
+            view = self._views[name] = np.frombuffer(
+                self.buf, dtype=np.dtype(col["dtype"]), count=self.rows,
+                offset=int(self.meta["data_offset"]) + int(col["offset"]),
+            )
+        return view
+
+    def dictionary(self, name: str) -> List[str]:
+        return self.meta["dicts"][name]
+
+
+def _open_segment(path: Path) -> Optional[_Segment]:
+    hour = hour_of_segment(path)
+    if hour is None:
+        return None
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return None
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    meta = read_meta(buf)
+    return _Segment(path, (st.st_mtime_ns, st.st_size), to_ms(hour), meta, buf)
+
+
+class SnapshotStore:
+    """
+    Open segments of a snapshot directory, refreshed by mtime on each query.
+    Replaced segments (rebuilt hours) are re-mapped; the old mapping is
+    released once no array refers to it.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self._directory = directory
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory or snapshot_dir()
+
+    def refresh(self) -> List[_Segment]:
+        with self._lock:
+            seen: Dict[str, _Segment] = {}
+            for path in list_segments(self.directory):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                cur = self._segments.get(path.name)
+                if cur is None or cur.stamp != (st.st_mtime_ns, st.st_size):
+                    try:
+                        cur = _open_segment(path)
+                    except (OSError, ValueError):
+                        cur = None
+                if cur is not None:
+                    seen[path.name] = cur
+            self._segments = seen
+            return sorted(seen.values(), key=lambda s: s.start_ms)
+
+    def between(self, since_ms: int, until_ms: int) -> List[_Segment]:
+        return [s for s in self.refresh() if s.end_ms > since_ms and s.start_ms < until_ms]
+
+    def coverage(self) -> Dict[str, Any]:
+        segs = self.refresh()
+        return {
+            "dir": str(self.directory),
+            "segments": len(segs),
+            "rows": sum(s.rows for s in segs),
+            "from": ms_to_iso(segs[0].start_ms) if segs else None,
+            "until": ms_to_iso(segs[-1].end_ms) if segs else None,
+        }
+
+
+STORE = SnapshotStore()
+
+
+class _Dimension:
+    """
+    Query-wide dictionary for one code column, built from segment metadata.
+    """
+
+    def __init__(self, name: Optional[str], segments: Sequence[_Segment]) -> None:
+        self.name = name
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        if name is None:
+            self.names.append("all")
+            return
+        for seg in segments:
+            for value in seg.dictionary(name):
+                if value not in self.index:
+                    self.index[value] = len(self.names)
+                    self.names.append(value)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def label(self, i: int) -> str:
+        return self.names[i] or NONE
+
+    def codes(self, seg: _Segment, mask: Any) -> Any:
+        np = _np()
+        if self.name is None:
+            n = seg.rows if mask is None else int(np.count_nonzero(mask))
+            return np.zeros(n, dtype=np.int64)
+        remap = np.fromiter((self.index[v] for v in seg.dictionary(self.name)), dtype=np.int64)
+        local = seg.column(self.name)
+        return remap[local if mask is None else local[mask]]
+
+
+def _mask(seg: _Segment, since_ms: int, until_ms: int, filters: Dict[str, str]) -> Tuple[bool, Any]:
+    """
+    (any rows left, boolean mask or None for "all rows").
+    """
+    mask = None
+    if seg.start_ms < since_ms or seg.end_ms > until_ms:
+        ts = seg.column("ts_ms")
+        mask = (ts >= since_ms) & (ts < until_ms)
+    for name, value in filters.items():
+        try:
+            code = seg.dictionary(name).index(value)
+        except ValueError:
+            return False, None
+        hit = seg.column(name) == code
+        mask = hit if mask is None else mask & hit
+    if mask is not None and not mask.any():
+        return False, None
+    return True, mask
+
+
+def _check_dimension(name: Optional[str]) -> None:
+    if name is not None and name not in CODE_COLUMNS:
+        raise ValueError(f"unknown dimension {name!r}; expected one of {', '.join(CODE_COLUMNS)}")
+
+
+def _top_groups(totals: Any, top: int) -> Tuple[Any, bool]:
+    np = _np()
+    order = np.argsort(-totals, kind="stable")
+    order = order[totals[order] > 0]
+    return order[:top], len(order) > top
+
+
+def delivery_counts(
+    *,
+    since_ms: int,
+    until_ms: int,
+    bucket_ms: int,
+    by: Optional[str],
+    filters: Dict[str, str],
+    top: int,
+    store: SnapshotStore = STORE,
+) -> Dict[str, Any]:
+    """
+    Deliveries per time bucket, split by one dimension (top groups by total;
+    the rest are folded into "(other)"). Raises ValueError on bad arguments
+    or when buckets x returned series would exceed MAX_GRID_CELLS.
+    """
+    _check_dimension(by)
+    for name in filters:
+        _check_dimension(name)
+    np = _np()
+    n_buckets = max(1, -(-(until_ms - since_ms) // bucket_ms))
+    if n_buckets > MAX_GRID_CELLS:
+        raise ValueError(f"{n_buckets} buckets is over the {MAX_GRID_CELLS} limit; use a coarser bucket")
+    segments = store.between(since_ms, until_ms)
+    dim = _Dimension(by, segments)
+    ng = max(1, len(dim))
+
+    # Pick the groups from per-group totals first, so the grid is only as
+    # wide as the answer: kept groups, then one "(other)" column.
+    totals = np.zeros(ng, dtype=np.int64)
+    for seg in segments:
+        keep, mask = _mask(seg, since_ms, until_ms, filters)
+        if keep:
+            totals += np.bincount(dim.codes(seg, mask), minlength=ng)
+    keep_idx, folded = _top_groups(totals, top)
+    width = len(keep_idx) + 1
+    if n_buckets * width > MAX_GRID_CELLS:
+        raise ValueError(
+            f"{n_buckets} buckets x {len(keep_idx)} groups is over the {MAX_GRID_CELLS} cell limit; "
+            "use a coarser bucket, a shorter window or a smaller top"
+        )
+    column = np.full(ng, width - 1, dtype=np.int64)
+    column[keep_idx] = np.arange(len(keep_idx))
+
+    counts = np.zeros(n_buckets * width, dtype=np.int64)
+    for seg in segments:
+        keep, mask = _mask(seg, since_ms, until_ms, filters)
+        if not keep:
+            continue
+        ts = seg.column("ts_ms")
+        b = (ts if mask is None else ts[mask]) - since_ms
+        b //= bucket_ms
+        g = column[dim.codes(seg, mask)]
+        # A segment spans one hour, i.e. a short run of buckets: count into
+        # that slice only instead of a full-width bincount per segment.
+        b0, b1 = int(b.min()), int(b.max())
+        part = np.bincount((b - b0) * width + g, minlength=(b1 - b0 + 1) * width)
+        counts[b0 * width:(b1 + 1) * width] += part
+
+    grid = counts.reshape(n_buckets, width)
+    series = {dim.label(i): grid[:, j].tolist() for j, i in enumerate(keep_idx)}
+    group_totals = {dim.label(i): int(totals[i]) for i in keep_idx}
+    rows = int(totals.sum())
+    if folded:
+        series[OTHER] = grid[:, -1].tolist()
+        group_totals[OTHER] = rows - sum(group_totals.values())
+    return {
+        "start": ms_to_iso(since_ms),
+        "end": ms_to_iso(since_ms + n_buckets * bucket_ms),
+        "step_s": bucket_ms / 1000,
+        "buckets": n_buckets,
+        "rows": rows,
+        "segments": len(segments),
+        "totals": group_totals,
+        "series": series,
+    }
+
+
+def body_size_quantiles(
+    *,
+    since_ms: int,
+    until_ms: int,
+    by: Optional[str],
+    filters: Dict[str, str],
+    quantiles: Sequence[float],
+    top: int,
+    store: SnapshotStore = STORE,
+) -> Dict[str, Any]:
+    """
+    Body size quantiles (linear interpolation), mean and max per group, for
+    the `top` groups by delivery count. Raises ValueError on bad arguments.
+    """
+    _check_dimension(by)
+    for name in filters:
+        _check_dimension(name)
+    np = _np()
+    segments = store.between(since_ms, until_ms)
+    dim = _Dimension(by, segments)
+    keys = []
+    for seg in segments:
+        keep, mask = _mask(seg, since_ms, until_ms, filters)
+        if not keep:
+            continue
+        sizes = seg.column("body_size")
+        sizes = (sizes if mask is None else sizes[mask]).astype(np.int64)
+        keys.append((dim.codes(seg, mask) << 32) | sizes)
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    if not keys:
+        return {"rows": 0, "segments": len(segments), "groups": groups}
+    key = np.concatenate(keys)
+    key.sort()
+    g = key >> 32
+    values = (key & 0xFFFFFFFF).astype(np.float64)
+    ng = len(dim)
+    ids = np.arange(ng)
+    starts = np.searchsorted(g, ids, side="left")
+    ends = np.searchsorted(g, ids, side="right")
+    n = ends - starts
+    sums = np.bincount(g, weights=values, minlength=ng)
+
+    keep_idx, _ = _top_groups(n, top)
+    s, e, cnt = starts[keep_idx], ends[keep_idx], n[keep_idx]
+    out: Dict[str, Any] = {
+        "n": cnt,
+        "mean": sums[keep_idx] / cnt,
+        "max": values[e - 1],
+    }
+    for q in quantiles:
+        pos = s + q * (cnt - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, e - 1)
+        out[f"p{q * 100:g}"] = values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+    for j, i in enumerate(keep_idx):
+        groups[dim.label(i)] = {
+            name: (int(arr[j]) if name in ("n", "max") else round(float(arr[j]), 1)) for name, arr in out.items()
+        }
+    return {"rows": int(len(key)), "segments": len(segments), "groups": groups}
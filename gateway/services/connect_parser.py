@@ -0,0 +1,353 @@
+"""
+Parse Connect webhook bodies (JSON or legacy XML) into the stored json_parsed.
+
+JSON deliveries parse as before. Legacy Connect configurations post
+DocuSignEnvelopeInformation XML; it is read with expat in fixed-size chunks
+and mapped onto the JSON (SIM) shape, so envelope ordering, enrichment and
+analytics treat both formats alike:
+
+    {"event": "envelope-completed", "generatedDateTime": TimeGenerated,
+     "connectFormat": "xml",
+     "data": {"accountId", "envelopeId", "envelopeSummary": {"status",
+              "emailSubject", "sender", "recipients", "customFields",
+              "statusChangedDateTime", ..., "envelopeDocuments"}}}
+
+XML carries no event name; it is "envelope-" + the envelope status.
+accountId comes from the AccountId envelope custom field when present.
+
+Embedded documents (XML DocumentPDF/PDFBytes, JSON
+envelopeSummary.envelopeDocuments[].PDFBytes) are base64-decoded chunk by
+chunk into content-addressed blobs (gateway/db/blobs.py) and replaced by
+
+    "blob": {"sha256": ..., "size": <decoded bytes>, "stored": true}
+
+so parsed payloads stay small and an attachment is never held decoded in
+memory. For XML the encoded text is not collected either: expat hands it
+over in pieces of at most _CHUNK bytes. The raw body is still stored as
+received.
+
+Bodies that are neither (or fail to parse) give None, as before.
+"""
+from __future__ import annotations
+
+import binascii
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from xml.parsers import expat
+
+from gateway.db.blobs import BlobWriter, blob_dir
+from gateway.services.metrics import CONNECT_DOCUMENT_BYTES, CONNECT_DOCUMENTS_TOTAL, CONNECT_PARSED_TOTAL
+
+log = logging.getLogger("gateway.connect_parser")
+
+_CHUNK = 64 * 1024
+_MAX_DEPTH = 64
+
+# Legacy RecipientStatus/Type -> JSON recipients group.
+_RECIPIENT_GROUPS: Dict[str, str] = {
+    "Signer": "signers",
+    "CarbonCopy": "carbonCopies",
+    "CertifiedDelivery": "certifiedDeliveries",
+    "Agent": "agents",
+    "Editor": "editors",
+    "InPersonSigner": "inPersonSigners",
+    "Intermediary": "intermediaries",
+}
+_ENVELOPE_TIMES: Dict[str, str] = {
+    "Created": "createdDateTime",
+    "Sent": "sentDateTime",
+    "Delivered": "deliveredDateTime",
+    "Signed": "signedDateTime",
+    "Completed": "completedDateTime",
+    "Declined": "declinedDateTime",
+    "Voided": "voidedDateTime",
+}
+_RECIPIENT_TIMES: Dict[str, str] = {
+    "Sent": "sentDateTime",
+    "Delivered": "deliveredDateTime",
+    "Signed": "signedDateTime",
+    "Declined": "declinedDateTime",
+}
+
+
+class _Document:
+    """
+    Streaming base64 decoder for one embedded document into a BlobWriter.
+    """
+
+    def __init__(self, directory: Optional[Path]) -> None:
+        self.writer = BlobWriter(directory)
+        self.invalid = False
+        self._tail = ""
+
+    def feed(self, text: str) -> None:
+        if self.invalid:
+            return
+        # XML encoders wrap base64 lines; decode whole quads only.
+        text = self._tail + "".join(text.split())
+        cut = len(text) - len(text) % 4
+        self._tail = text[cut:]
+        if not cut:
+            return
+        quads = text[:cut]
+        try:
+            data = binascii.a2b_base64(quads)
+        except (binascii.Error, ValueError):
+            data = b""
+        # a2b_base64 skips characters outside the alphabet; any skipped one
+        # shows up as a short result (cheaper than a validating regex).
+        if len(data) != cut // 4 * 3 - (quads[-2:].count("=")):
+            self.invalid = True
+            self.writer.abort()
+            return
+        self.writer.write(data)
+
+    def finish(self) -> Dict[str, Any]:
+        if self._tail:
+            self.invalid = True
+        if self.invalid:
+            self.writer.abort()
+            CONNECT_DOCUMENTS_TOTAL.labels("invalid").inc()
+            return {"invalid": True}
+        digest, result = self.writer.close()
+        CONNECT_DOCUMENTS_TOTAL.labels(result).inc()
+        CONNECT_DOCUMENT_BYTES.observe(self.writer.size)
+        return {"sha256": digest, "size": self.writer.size, "stored": result != "unstored"}
+
+
+def _local(name: str) -> str:
+    return name.rpartition(":")[2]
+
+
+class _Node:
+    __slots__ = ("name", "children", "parts", "nil", "document")
+
+    def __init__(self, name: str, nil: bool) -> None:
+        self.name = name
+        self.children: List[_Node] = []
+        self.parts: List[str] = []
+        self.nil = nil
+        self.document: Optional[Dict[str, Any]] = None
+
+    def child(self, name: str) -> Optional[_Node]:
+        return next((c for c in self.children if c.name == name), None)
+
+    def all(self, name: str) -> List[_Node]:
+        return [c for c in self.children if c.name == name]
+
+    def text(self, name: str) -> Optional[str]:
+        c = self.child(name)
+        if c is None or c.nil:
+            return None
+        return "".join(c.parts).strip() or None
+
+
+class _XmlReader:
+    """
+    expat handlers building a small element tree; PDFBytes text goes
+    straight to a _Document instead of the tree.
+    """
+
+    def __init__(self, directory: Optional[Path]) -> None:
+        self.directory = directory
+        self.root: Optional[_Node] = None
+        self._stack: List[_Node] = []
+        self._doc: Optional[_Document] = None
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.buffer_size = _CHUNK
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+        self.parser.CharacterDataHandler = self._chars
+        # Connect never sends a DTD; refusing one rules out entity expansion.
+        self.parser.StartDoctypeDeclHandler = self._reject
+        self.parser.EntityDeclHandler = self._reject
+
+    def _reject(self, *args: Any) -> None:
+        raise ValueError("DTDs are not accepted")
+
+    def _start(self, name: str, attrs: Dict[str, str]) -> None:
+        if len(self._stack) >= _MAX_DEPTH:
+            raise ValueError("XML nested too deeply")
+        nil = any(_local(k) == "nil" and v == "true" for k, v in attrs.items())
+        node = _Node(_local(name), nil)
+        if self._stack:
+            self._stack[-1].children.append(node)
+        else:
+            self.root = node
+        self._stack.append(node)
+        if node.name == "PDFBytes":
+            self._doc = _Document(self.directory)
+
+    def _end(self, name: str) -> None:
+        node = self._stack.pop()
+        if self._doc is not None and node.name == "PDFBytes":
+            node.document = self._doc.finish()
+            self._doc = None
+
+    def _chars(self, data: str) -> None:
+        if self._doc is not None:
+            self._doc.feed(data)
+        elif self._stack:
+            self._stack[-1].parts.append(data)
+
+    def read(self, raw: bytes) -> Optional[_Node]:
+        view = memoryview(raw)
+        try:
+            for i in range(0, len(view), _CHUNK):
+                self.parser.Parse(bytes(view[i:i + _CHUNK]), False)
+            self.parser.Parse(b"", True)
+        finally:
+            if self._doc is not None:
+                self._doc.writer.abort()
+                self._doc = None
+        return self.root
+
+
+def _recipients(status: _Node) -> Dict[str, Any]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    container = status.child("RecipientStatuses")
+    for r in container.all("RecipientStatus") if container is not None else []:
+        kind = r.text("Type") or "Signer"
+        group = _RECIPIENT_GROUPS.get(kind) or kind[:1].lower() + kind[1:] + "s"
+        out: Dict[str, Any] = {
+            "recipientIdGuid": r.text("RecipientId"),
+            "name": r.text("UserName"),
+            "email": r.text("Email"),
+            "routingOrder": r.text("RoutingOrder"),
+            "status": (r.text("Status") or "").lower() or None,
+        }
+        for tag, key in _RECIPIENT_TIMES.items():
+            if r.text(tag):
+                out[key] = r.text(tag)
+        if r.text("DeclineReason"):
+            out["declinedReason"] = r.text("DeclineReason")
+        groups.setdefault(group, []).append(out)
+    result: Dict[str, Any] = dict(groups)
+    result["recipientCount"] = str(sum(len(v) for v in groups.values()))
+    return result
+
+
+def _documents(root: _Node, status: _Node) -> List[Dict[str, Any]]:
+    docs: List[Dict[str, Any]] = []
+    by_id: Dict[str, Dict[str, Any]] = {}
+    statuses = status.child("DocumentStatuses")
+    for d in statuses.all("DocumentStatus") if statuses is not None else []:
+        doc = {"documentId": d.text("ID"), "name": d.text("Name"), "type": "content", "order": d.text("Sequence")}
+        docs.append(doc)
+        if doc["documentId"]:
+            by_id[doc["documentId"]] = doc
+    pdfs = root.child("DocumentPDFs")
+    for p in pdfs.all("DocumentPDF") if pdfs is not None else []:
+        doc_id = p.text("DocumentID")
+        doc = by_id.get(doc_id) if doc_id else None
+        if doc is None:
+            doc = {"documentId": doc_id, "name": p.text("Name")}
+            docs.append(doc)
+        doc["type"] = (p.text("DocumentType") or "content").lower()
+        node = p.child("PDFBytes")
+        if node is not None and node.document is not None:
+            doc["blob"] = node.document
+    return docs
+
+
+def _from_xml(root: _Node) -> Optional[Dict[str, Any]]:
+    status = root if root.name == "EnvelopeStatus" else root.child("EnvelopeStatus")
+    if status is None or not status.text("EnvelopeID"):
+        return None
+    state = (status.text("Status") or "").lower() or None
+    custom: List[Dict[str, Any]] = []
+    fields = status.child("CustomFields")
+    for f in fields.all("CustomField") if fields is not None else []:
+        custom.append({"name": f.text("Name"), "value": f.text("Value")})
+    account = next((f["value"] for f in custom if f["name"] == "AccountId" and f["value"]), None)
+
+    summary: Dict[str, Any] = {
+        "status": state,
+        "emailSubject": status.text("Subject"),
+        "sender": {"userName": status.text("UserName"), "email": status.text("Email")},
+        "recipients": _recipients(status),
+    }
+    for tag, key in _ENVELOPE_TIMES.items():
+        if status.text(tag):
+            summary[key] = status.text(tag)
+    if status.text("VoidReason"):
+        summary["voidedReason"] = status.text("VoidReason")
+    summary["statusChangedDateTime"] = (
+        summary.get(_ENVELOPE_TIMES.get((state or "").capitalize(), "")) or status.text("TimeGenerated")
+    )
+    if custom:
+        summary["customFields"] = {"textCustomFields": custom}
+    documents = _documents(root, status)
+    if documents:
+        summary["envelopeDocuments"] = documents
+
+    data: Dict[str, Any] = {"envelopeId": status.text("EnvelopeID"), "envelopeSummary": summary}
+    if account:
+        data = {"accountId": account, **data}
+    return {
+        "event": f"envelope-{state}" if state else None,
+        "generatedDateTime": status.text("TimeGenerated"),
+        "connectFormat": "xml",
+        "data": data,
+    }
+
+
+def _extract_json_documents(parsed: Dict[str, Any], directory: Optional[Path]) -> None:
+    data = parsed.get("data")
+    summary = data.get("envelopeSummary") if isinstance(data, dict) else None
+    docs = summary.get("envelopeDocuments") if isinstance(summary, dict) else None
+    for doc in docs if isinstance(docs, list) else []:
+        encoded = doc.get("PDFBytes") if isinstance(doc, dict) else None
+        if not isinstance(encoded, str):
+            continue
+        d = _Document(directory)
+        for i in range(0, len(encoded), _CHUNK):
+            d.feed(encoded[i:i + _CHUNK])
+        del doc["PDFBytes"]
+        doc["blob"] = d.finish()
+
+
+def _is_xml(raw: bytes, content_type: Optional[str]) -> bool:
+    head = raw[:64].lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"<"):
+        return True
+    return bool(content_type) and "xml" in content_type.lower() and not head.startswith((b"{", b"["))
+
+
+def parse_blocks(raw: bytes, content_type: Optional[str] = None) -> bool:
+    """
+    Whether parse_delivery may do more than decode small JSON: XML is walked
+    in Python and either format may write document blobs. Such bodies
+    should be parsed off the event loop whatever their size.
+    """
+    return _is_xml(raw, content_type) or b'"PDFBytes"' in raw
+
+
+def parse_delivery(raw: bytes, content_type: Optional[str] = None, *, directory: Optional[Path] = None) -> Any:
+    """
+    json_parsed for a webhook body: the decoded JSON, the JSON-shaped form
+    of a Connect XML delivery, or None. Writes embedded documents to the
+    blob directory (GATEWAY_BLOB_DIR) unless `directory` is given.
+    """
+    directory = directory or blob_dir()
+    if _is_xml(raw, content_type):
+        try:
+            root = _XmlReader(directory).read(raw)
+            parsed = _from_xml(root) if root is not None else None
+        except (expat.ExpatError, ValueError) as e:
+            log.debug("XML delivery not parsed: %r", e)
+            parsed = None
+        CONNECT_PARSED_TOTAL.labels("xml", "ok" if parsed is not None else "error").inc()
+        return parsed
+    try:
+        parsed = json.loads(raw)
+    except Exception:
+        CONNECT_PARSED_TOTAL.labels("json", "error").inc()
+        return None
+    if isinstance(parsed, dict):
+        _extract_json_documents(parsed, directory)
+    CONNECT_PARSED_TOTAL.labels("json", "ok").inc()
+    return parsed
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from gateway.db.enrichment import EnrichmentRow, store_enrichment
+from gateway.services.metrics import (
+    ENRICH_API_CALLS_SAVED_TOTAL,
+    ENRICH_API_CALLS_TOTAL,
+    ENRICH_BATCH_ENVELOPES,
+    ENRICH_DROPPED_TOTAL,
+    ENRICH_EVENTS_TOTAL,
+    ENRICH_LAG_SECONDS,
+)
+
+log = logging.getLogger("gateway.enrichment")
+
+# list_status(account_id, envelope_ids) -> envelope summaries (blocking).
+ListStatusFn = Callable[[str, Sequence[str]], List[Dict[str, Any]]]
+
+# Account pause after a 429 that carried no Retry-After.
+_DEFAULT_RETRY_AFTER_S = 5.0
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _docusign_list_status(account_id: str, envelope_ids: Sequence[str]) -> List[Dict[str, Any]]:
+    from gateway.docusign_client import CLIENT
+
+    return CLIENT.list_status(account_id, envelope_ids)
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class _Waiting:
+    __slots__ = ("since", "envelopes")
+
+    def __init__(self, since: float) -> None:
+        self.since = since
+        # envelope_id -> [(event_id, queued_at)]
+        self.envelopes: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+
+
+class EnvelopeEnricher:
+    """
+    Resolves the current DocuSign envelope state for newly persisted events
+    with batched list-status calls instead of one GET per event.
+
+    Envelope ids are collected per account for up to `linger_s` (or until
+    `batch_size` distinct envelopes are waiting) and resolved with a single
+    GET .../envelopes?envelope_ids=...; every event that named one of those
+    envelopes in the window gets the result (event_enrichment). A burst of
+    lifecycle events for the same envelopes therefore costs one call per
+    batch, not one per event.
+
+    A 429 pauses that account's flushes until its Retry-After and puts the
+    batch back in the queue; events still unresolved after `max_wait_s` are
+    dropped. Other failures drop the batch. Per worker, at most
+    `max_pending` events wait (extra ones are dropped). Drops are counted by
+    reason. Event loop only; API calls and DB writes run in threads.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        batch_size: int,
+        linger_s: float,
+        max_pending: int,
+        concurrency: int,
+        max_wait_s: float = 300.0,
+        list_status: Optional[ListStatusFn] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+        self.linger_s = max(0.0, linger_s)
+        self.max_pending = max(1, max_pending)
+        self.concurrency = max(1, concurrency)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self.list_status: ListStatusFn = list_status or _docusign_list_status
+        self.active = False
+        self.reason = "not started"
+        self.pending = 0
+        self.counts: Dict[str, int] = {
+            "events": 0, "calls": 0, "rate_limited": 0, "enriched": 0, "missing": 0, "error": 0, "dropped": 0,
+        }
+        self._waiting: Dict[str, _Waiting] = {}
+        # account_id -> monotonic time its flushes may resume (after a 429).
+        self._paused_until: Dict[str, float] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._flushes: "set[asyncio.Task[None]]" = set()
+
+    def use(self, list_status: ListStatusFn) -> None:
+        """
+        Resolve with another backend (a local stub in benches) and activate.
+        """
+        self.list_status = list_status
+        self.active = self.enabled
+        self.reason = "custom backend" if self.enabled else "GATEWAY_ENRICH_ENABLED=0"
+
+    def submit(self, account_id: str, envelope_id: str, event_id: str) -> None:
+        if not self.active or self._wake is None:
+            return
+        if self.pending >= self.max_pending:
+            self._drop("queue_full", 1)
+            return
+        now = time.monotonic()
+        w = self._waiting.get(account_id)
+        if w is None:
+            # New linger window: wake the batcher so it arms the timer.
+            w = self._waiting[account_id] = _Waiting(now)
+            self._wake.set()
+        w.envelopes.setdefault(envelope_id, []).append((event_id, now))
+        self.pending += 1
+        self.counts["events"] += 1
+        if len(w.envelopes) >= self.batch_size:
+            self._wake.set()
+
+    def submit_threadsafe(self, account_id: str, envelope_id: str, event_id: str) -> None:
+        """
+        submit() from another thread (spool replay); no-op when not running.
+        """
+        loop = self._loop
+        if loop is None or not self.active:
+            return
+        try:
+            loop.call_soon_threadsafe(self.submit, account_id, envelope_id, event_id)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def _drop(self, reason: str, n_events: int) -> None:
+        self.counts["dropped"] += n_events
+        ENRICH_DROPPED_TOTAL.labels(reason).inc(n_events)
+
+    def _due(self, account_id: str, w: _Waiting) -> float:
+        """
+        When this account's window should be flushed (monotonic).
+        """
+        due = w.since + self.linger_s
+        if len(w.envelopes) >= self.batch_size:
+            due = w.since
+        return max(due, self._paused_until.get(account_id, 0.0))
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            now = time.monotonic()
+            ready = [a for a, w in self._waiting.items() if self._due(a, w) <= now]
+            for account_id in ready:
+                self._paused_until.pop(account_id, None)
+                w = self._waiting.pop(account_id)
+                items = list(w.envelopes.items())
+                for i in range(0, len(items), self.batch_size):
+                    self._spawn(account_id, items[i:i + self.batch_size])
+            self._wake.clear()
+            if self._waiting:
+                soonest = min(self._due(a, w) for a, w in self._waiting.items())
+                timeout = max(0.0, soonest - time.monotonic())
+            else:
+                timeout = None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, account_id: str, batch: List[Tuple[str, List[Tuple[str, float]]]]) -> None:
+        task = asyncio.get_running_loop().create_task(self._flush(account_id, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, account_id: str, batch: List[Tuple[str, List[Tuple[str, float]]]]) -> None:
+        assert self._slots is not None
+        n_events = sum(len(evts) for _, evts in batch)
+        async with self._slots:
+            try:
+                found = await asyncio.to_thread(self.list_status, account_id, [env for env, _ in batch])
+            except Exception as e:
+                self.counts["calls"] += 1
+                if getattr(e, "status_code", None) == 429:
+                    self.counts["rate_limited"] += 1
+                    ENRICH_API_CALLS_TOTAL.labels("rate_limited").inc()
+                    self._requeue(account_id, batch, getattr(e, "retry_after", None))
+                    return
+                self.pending -= n_events
+                ENRICH_API_CALLS_TOTAL.labels("error").inc()
+                self._drop("api_error", n_events)
+                log.warning("enrichment list-status for %d envelopes failed: %r", len(batch), e)
+                return
+            self.counts["calls"] += 1
+            ENRICH_API_CALLS_TOTAL.labels("ok").inc()
+            ENRICH_BATCH_ENVELOPES.observe(len(batch))
+
+            by_id = {str(e.get("envelopeId", "")).lower(): e for e in found}
+            now_iso = _utc_now_iso()
+            rows: List[EnrichmentRow] = []
+            for envelope_id, events in batch:
+                env = by_id.get(envelope_id)
+                envelope_json = json.dumps(env, separators=(",", ":"), default=str) if env else None
+                for event_id, _ in events:
+                    rows.append(
+                        EnrichmentRow(
+                            event_id=event_id,
+                            envelope_id=envelope_id,
+                            account_id=account_id,
+                            result="enriched" if env else "missing",
+                            status=env.get("status") if env else None,
+                            status_changed_at=env.get("statusChangedDateTime") if env else None,
+                            envelope_json=envelope_json,
+                            enriched_at=now_iso,
+                            batch_envelopes=len(batch),
+                        )
+                    )
+            try:
+                await asyncio.to_thread(store_enrichment, rows)
+            except Exception as e:
+                self.counts["error"] += n_events
+                ENRICH_EVENTS_TOTAL.labels("error").inc(n_events)
+                log.warning("enrichment store failed: %r", e)
+                return
+            finally:
+                self.pending -= n_events
+
+        done = time.monotonic()
+        for _, events in batch:
+            for _, queued in events:
+                ENRICH_LAG_SECONDS.observe(done - queued)
+        enriched = sum(1 for r in rows if r.result == "enriched")
+        self.counts["enriched"] += enriched
+        self.counts["missing"] += len(rows) - enriched
+        ENRICH_EVENTS_TOTAL.labels("enriched").inc(enriched)
+        ENRICH_EVENTS_TOTAL.labels("missing").inc(len(rows) - enriched)
+        ENRICH_API_CALLS_SAVED_TOTAL.inc(max(0, len(rows) - 1))
+
+    def _requeue(
+        self, account_id: str, batch: List[Tuple[str, List[Tuple[str, float]]]], retry_after: Optional[float]
+    ) -> None:
+        """
+        Pause the account until Retry-After and put the batch back ahead of
+        anything queued for it since; events past max_wait_s are dropped.
+        """
+        now = time.monotonic()
+        pause = retry_after if retry_after is not None else _DEFAULT_RETRY_AFTER_S
+        self._paused_until[account_id] = max(self._paused_until.get(account_id, 0.0), now + pause)
+        if self._wake is None:
+            # Stopped while the call was in flight.
+            return
+        envelopes: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+        expired = 0
+        for envelope_id, events in batch:
+            keep = [(event_id, queued) for event_id, queued in events if now - queued < self.max_wait_s]
+            expired += len(events) - len(keep)
+            if keep:
+                envelopes[envelope_id] = keep
+        if expired:
+            self.pending -= expired
+            self._drop("rate_limited", expired)
+        if not envelopes:
+            return
+        w = self._waiting.get(account_id)
+        if w is not None:
+            for envelope_id, events in w.envelopes.items():
+                envelopes.setdefault(envelope_id, []).extend(events)
+            since = min(w.since, now)
+        else:
+            since = now
+        requeued = _Waiting(since)
+        requeued.envelopes = envelopes
+        self._waiting[account_id] = requeued
+        self._wake.set()
+        log.info("enrichment for account %s rate limited; retrying in %.1fs", account_id, pause)
+
+    def start(self) -> None:
+        if not self.enabled:
+            self.active, self.reason = False, "GATEWAY_ENRICH_ENABLED=0"
+            return
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run(), name="enrich-batcher")
+        self.active, self.reason = True, "ok"
+        if self.list_status is _docusign_list_status:
+            from gateway.settings import get_settings
+
+            missing = get_settings().docusign.missing()
+            if missing:
+                self.active, self.reason = False, f"DocuSign not configured ({', '.join(missing)})"
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushes:
+            await asyncio.wait(list(self._flushes), timeout=5.0)
+        self._wake = None
+        self._loop = None
+        self._waiting.clear()
+        self._paused_until.clear()
+        self.pending = 0
+
+    def status(self) -> Dict[str, Any]:
+        calls = self.counts["calls"]
+        resolved = self.counts["enriched"] + self.counts["missing"]
+        return {
+            "active": self.active,
+            "reason": self.reason,
+            "batch_size": self.batch_size,
+            "linger_ms": round(self.linger_s * 1000, 1),
+            "pending": self.pending,
+            "paused_accounts": sum(1 for t in self._paused_until.values() if t > time.monotonic()),
+            **self.counts,
+            "events_per_call": round(resolved / calls, 2) if calls else None,
+        }
+
+
+def enricher_from_env() -> EnvelopeEnricher:
+    return EnvelopeEnricher(
+        enabled=os.getenv("GATEWAY_ENRICH_ENABLED", "1").strip() != "0",
+        batch_size=int(_float_env("GATEWAY_ENRICH_BATCH_SIZE", 50)),
+        linger_s=_float_env("GATEWAY_ENRICH_LINGER_MS", 500.0) / 1000.0,
+        max_pending=int(_float_env("GATEWAY_ENRICH_MAX_PENDING", 10000)),
+        concurrency=int(_float_env("GATEWAY_ENRICH_CONCURRENCY", 2)),
+        max_wait_s=_float_env("GATEWAY_ENRICH_MAX_WAIT_SECONDS", 300.0),
+    )
+
+
+ENRICHER = enricher_from_env()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from gateway.services.metrics import (
+    HTTP_CACHE_BYTES,
+    HTTP_CACHE_ENTRIES,
+    HTTP_CACHE_REQUESTS_TOTAL,
+    HTTP_CACHE_REVALIDATIONS_TOTAL,
+)
+
+log = logging.getLogger("gateway.http_cache")
+
+
+@dataclass(frozen=True)
+class Fetched:
+    """
+    What a fetch callback returns for a 200: decoded value, its size in
+    bytes (for the byte budget) and the validator, if the API sent one.
+    """
+
+    value: Any
+    size: int
+    etag: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    size: int
+    etag: Optional[str]
+    fresh_until: float  # monotonic
+    stale_until: float  # monotonic; served while revalidating in the background
+
+
+# fetch(previous entry or None) -> Fetched, or None for "not modified" (only
+# when a previous entry with an etag was passed). Anything raised propagates
+# to every caller waiting on that key and nothing is cached.
+FetchFn = Callable[[Optional[CacheEntry]], Optional[Fetched]]
+
+
+class ResponseCache:
+    """
+    Size-bounded TTL cache for idempotent upstream reads (LRU by entries and bytes).
+
+    - fresh: served from memory.
+    - stale (within stale_s after expiry): served from memory while one
+      background revalidation runs (stale-while-revalidate).
+    - expired or missing: fetched. Concurrent misses for the same key wait on
+      a single upstream call instead of each making one.
+
+    Revalidation passes the previous entry to fetch so it can send
+    If-None-Match; a 304 (fetch returns None) just extends the entry.
+
+    invalidate() bumps the key's generation: a load that started before it
+    still answers its own callers but is not stored, and later callers start
+    a new load instead of joining it.
+
+    Thread-safe; fetch runs in the caller's thread, or in a small
+    background pool for stale revalidation.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int,
+        max_bytes: int,
+        stale_s: float,
+        revalidate_workers: int = 2,
+    ) -> None:
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.stale_s = max(0.0, stale_s)
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, "Future[Any]"] = {}
+        # Per key with loads running: how many, and the generation they must
+        # still match to be stored. Dropped once the last load finishes.
+        self._running: Dict[Hashable, int] = {}
+        self._gens: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, revalidate_workers), thread_name_prefix=f"{name}-swr")
+        self.counts: Dict[str, int] = {"hit": 0, "stale": 0, "coalesced": 0, "miss": 0}
+        HTTP_CACHE_ENTRIES.labels(name).set_function(lambda: len(self._entries))
+        HTTP_CACHE_BYTES.labels(name).set_function(lambda: self._bytes)
+
+    def get(self, key: Hashable, fetch: FetchFn, *, op: str, ttl_s: float) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                return self._count(op, "hit", entry.value)
+            waiter = self._inflight.get(key)
+            if entry is not None and now < entry.stale_until:
+                if waiter is None:
+                    fut, gen = self._begin_load(key)
+                    self._pool.submit(self._load, key, fetch, entry, op, ttl_s, True, fut, gen)
+                self._entries.move_to_end(key)
+                return self._count(op, "stale", entry.value)
+            leader: Optional[Tuple["Future[Any]", int]] = None
+            if waiter is None:
+                leader = self._begin_load(key)
+        if leader is None:
+            assert waiter is not None
+            self._count(op, "coalesced", None)
+            return waiter.result()
+        self._count(op, "miss", None)
+        return self._load(key, fetch, entry, op, ttl_s, False, *leader)
+
+    def _begin_load(self, key: Hashable) -> Tuple["Future[Any]", int]:
+        # Under self._lock.
+        fut: "Future[Any]" = Future()
+        self._inflight[key] = fut
+        self._running[key] = self._running.get(key, 0) + 1
+        return fut, self._gens.get(key, 0)
+
+    def _count(self, op: str, result: str, value: Any) -> Any:
+        self.counts[result] += 1
+        HTTP_CACHE_REQUESTS_TOTAL.labels(self.name, op, result).inc()
+        return value
+
+    def _load(
+        self,
+        key: Hashable,
+        fetch: FetchFn,
+        prev: Optional[CacheEntry],
+        op: str,
+        ttl_s: float,
+        background: bool,
+        fut: "Future[Any]",
+        gen: int,
+    ) -> Any:
+        try:
+            got = fetch(prev)
+            now = time.monotonic()
+            if got is None:
+                if prev is None:
+                    raise RuntimeError(f"{self.name}: 'not modified' without a cached entry")
+                entry = replace(prev, fresh_until=now + ttl_s, stale_until=now + ttl_s + self.stale_s)
+                result = "not_modified"
+            else:
+                entry = CacheEntry(got.value, got.size, got.etag, now + ttl_s, now + ttl_s + self.stale_s)
+                result = "modified"
+            if prev is not None:
+                HTTP_CACHE_REVALIDATIONS_TOTAL.labels(self.name, op, result).inc()
+            self._store(key, entry, gen)
+            fut.set_result(entry.value)
+            return entry.value
+        except BaseException as e:
+            if prev is not None:
+                HTTP_CACHE_REVALIDATIONS_TOTAL.labels(self.name, op, "error").inc()
+            fut.set_exception(e)
+            if background:
+                # The stale entry keeps being served until stale_until.
+                log.warning("%s: background revalidation of %r failed: %r", self.name, key, e)
+                return None
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is fut:
+                    del self._inflight[key]
+                running = self._running[key] - 1
+                if running:
+                    self._running[key] = running
+                else:
+                    del self._running[key]
+                    self._gens.pop(key, None)
+
+    def _store(self, key: Hashable, entry: CacheEntry, gen: int) -> None:
+        with self._lock:
+            if self._gens.get(key, 0) != gen:
+                return  # invalidated while loading
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size > self.max_bytes // 4:
+                return  # one oversized response must not flush the cache
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            self._new_generation(key)
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry.size
+            return True
+
+    def _new_generation(self, key: Hashable) -> None:
+        # Under self._lock. Only keys with loads running need one.
+        if key in self._running:
+            self._gens[key] = self._gens.get(key, 0) + 1
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._running):
+                self._new_generation(key)
+            self._entries.clear()
+            self._bytes = 0
+
+    def status(self) -> Dict[str, Any]:
+        served = self.counts["hit"] + self.counts["stale"] + self.counts["coalesced"]
+        total = served + self.counts["miss"]
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "stale_s": self.stale_s,
+            "inflight": len(self._inflight),
+            "requests": dict(self.counts),
+            "hit_ratio": round(served / total, 4) if total else None,
+        }
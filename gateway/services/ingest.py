@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from gateway.services.metrics import (
+    INGEST_INFLIGHT,
+    INGEST_QUEUE_DEPTH,
+    INGEST_QUEUE_WAIT_SECONDS,
+    INGEST_REJECTED_TOTAL,
+)
+from gateway.services.profiler import run_followed
+from gateway.services.providers import PROVIDERS, ProviderSpec
+
+
+class IngestRejected(Exception):
+    """
+    Delivery not accepted; the provider should retry after retry_after seconds.
+    """
+
+    def __init__(self, provider: str, reason: str, status_code: int, retry_after: float) -> None:
+        super().__init__(f"{provider}: {reason}")
+        self.provider = provider
+        self.reason = reason  # queue_full|rate_limited|db_degraded
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int) -> None:
+        self.rate = rate_per_s
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """
+        Take one token. Returns 0.0 on success, else seconds until one is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    ctx: contextvars.Context
+    future: "asyncio.Future[Any]"
+    enqueued: float
+
+
+class _Lane:
+    def __init__(self, spec: ProviderSpec) -> None:
+        self.spec = spec
+        self.queue: Deque[_Job] = deque()
+        self.inflight = 0
+        self.current = 0  # smooth WRR state
+        self.bucket = TokenBucket(spec.rate_per_s, spec.burst) if spec.rate_per_s > 0 else None
+        self.accepted = 0
+        # Metric children resolved once; the hot path only touches these.
+        self.m_wait = INGEST_QUEUE_WAIT_SECONDS.labels(spec.name)
+        self.m_queue_full = INGEST_REJECTED_TOTAL.labels(spec.name, "queue_full")
+        self.m_rate_limited = INGEST_REJECTED_TOTAL.labels(spec.name, "rate_limited")
+        INGEST_QUEUE_DEPTH.labels(spec.name).set_function(lambda: len(self.queue))
+        INGEST_INFLIGHT.labels(spec.name).set_function(lambda: self.inflight)
+
+    def eligible(self) -> bool:
+        return bool(self.queue) and self.inflight < self.spec.workers
+
+
+class FairScheduler:
+    """
+    Per-provider bounded queues in front of a shared pool of persistence
+    workers. Free workers are handed out by smooth weighted round-robin over
+    providers that have work and are under their own worker budget, so a
+    provider flooding retries only ever gets its weight's share of capacity.
+
+    Jobs run on the scheduler's own thread pool (persistence is blocking
+    SQLite work), sized to the worker count and not shared with
+    asyncio.to_thread users, under the submitting request's contextvars, so
+    timing spans still attach to it.
+    """
+
+    def __init__(self, specs: Dict[str, ProviderSpec], workers: int) -> None:
+        self.workers = max(1, workers)
+        self._lanes: Dict[str, _Lane] = {name: _Lane(spec) for name, spec in specs.items()}
+        self._free = self.workers
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # The loop keeps only weak references to tasks; hold running jobs here.
+        self._jobs: Set["asyncio.Task[None]"] = set()
+
+    def admit(self, provider: str) -> None:
+        """
+        Cheap pre-check before the body is read: queue space, then rate
+        limit, so a delivery refused for a full queue costs no token.
+        Raises IngestRejected.
+        """
+        lane = self._lanes[provider]
+        self._check_queue(lane)
+        if lane.bucket is not None:
+            wait = lane.bucket.take()
+            if wait > 0:
+                lane.m_rate_limited.inc()
+                raise IngestRejected(provider, "rate_limited", 429, wait)
+
+    def _check_queue(self, lane: _Lane) -> None:
+        if len(lane.queue) >= lane.spec.queue_size:
+            lane.m_queue_full.inc()
+            raise IngestRejected(lane.spec.name, "queue_full", 503, 1.0)
+
+    async def submit(self, provider: str, fn: Callable[[], Any]) -> Any:
+        """
+        Queue fn for the provider and wait for its result. Raises IngestRejected
+        when the provider's queue is full.
+        """
+        lane = self._lanes[provider]
+        self._check_queue(lane)
+        self._ensure_started()
+        fut: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        lane.queue.append(_Job(fn, contextvars.copy_context(), fut, time.perf_counter()))
+        lane.accepted += 1
+        assert self._wake is not None
+        self._wake.set()
+        return await fut
+
+    def shed_queued(self) -> int:
+        """
+        Fail every job still waiting for a worker with IngestRejected
+        "db_degraded" (the DB was just found degraded: callers spool them
+        instead of queuing behind stuck writes). Returns how many.
+        """
+        shed = 0
+        for lane in self._lanes.values():
+            while lane.queue:
+                job = lane.queue.popleft()
+                if not job.future.done():
+                    job.future.set_exception(IngestRejected(lane.spec.name, "db_degraded", 503, 1.0))
+                    shed += 1
+        return shed
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        # First use, or a new event loop (tests, bench runs): reset loop-bound state.
+        self._loop = loop
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest")
+        self._wake = asyncio.Event()
+        self._free = self.workers
+        for lane in self._lanes.values():
+            lane.queue.clear()
+            lane.inflight = 0
+        self._task = loop.create_task(self._dispatch(), name="ingest-dispatch")
+
+    def _pick(self) -> Optional[_Lane]:
+        eligible = [lane for lane in self._lanes.values() if lane.eligible()]
+        if not eligible:
+            return None
+        total = 0
+        best = eligible[0]
+        for lane in eligible:
+            lane.current += lane.spec.weight
+            total += lane.spec.weight
+            if lane.current > best.current:
+                best = lane
+        best.current -= total
+        return best
+
+    async def _dispatch(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._wake.clear()
+            while self._free > 0:
+                lane = self._pick()
+                if lane is None:
+                    break
+                job = lane.queue.popleft()
+                lane.inflight += 1
+                self._free -= 1
+                task = asyncio.create_task(self._run(lane, job))
+                self._jobs.add(task)
+                task.add_done_callback(self._jobs.discard)
+            await self._wake.wait()
+
+    async def _run(self, lane: _Lane, job: _Job) -> None:
+        lane.m_wait.observe(time.perf_counter() - job.enqueued)
+        try:
+            assert self._executor is not None
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, job.ctx.run, run_followed, job.fn
+            )
+        except BaseException as e:  # propagate to the waiting request
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            lane.inflight -= 1
+            self._free += 1
+            if self._wake is not None:
+                self._wake.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            # Writes already running finish on their threads.
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def status(self) -> Dict[str, Any]:
+        lanes: List[Dict[str, Any]] = []
+        for lane in self._lanes.values():
+            s = lane.spec
+            lanes.append(
+                {
+                    "provider": s.name,
+                    "weight": s.weight,
+                    "workers": s.workers,
+                    "queue_size": s.queue_size,
+                    "rate_per_s": s.rate_per_s or None,
+                    "queued": len(lane.queue),
+                    "inflight": lane.inflight,
+                    "accepted": lane.accepted,
+                }
+            )
+        return {"workers": self.workers, "free": self._free, "providers": lanes}
+
+
+def _workers_from_env() -> int:
+    try:
+        return int(os.getenv("GATEWAY_INGEST_WORKERS", "4"))
+    except ValueError:
+        return 4
+
+
+SCHEDULER = FairScheduler(PROVIDERS, _workers_from_env())
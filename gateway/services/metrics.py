@@ -0,0 +1,730 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+log = logging.getLogger("gateway.metrics")
+
+# Latency buckets (seconds): sub-millisecond SQLite work up to slow upstream calls.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Size buckets (bytes): small Connect JSON up to large base64 document payloads.
+SIZE_BUCKETS: Tuple[float, ...] = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864,
+)
+# Compression ratio buckets (raw/stored): Connect JSON/XML lands around 5-10x.
+RATIO_BUCKETS: Tuple[float, ...] = (1.1, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 10.0, 15.0, 25.0)
+# Count buckets (items per batch).
+COUNT_BUCKETS: Tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+LabelValues = Tuple[str, ...]
+
+
+def metrics_dir() -> str:
+    """
+    Directory shared by all worker processes for per-process snapshots.
+    Empty means single-process mode (scrape reports this process only).
+    """
+    return os.getenv("GATEWAY_METRICS_DIR", "").strip()
+
+
+def flush_interval() -> float:
+    try:
+        return max(0.5, float(os.getenv("GATEWAY_METRICS_FLUSH_SECONDS", "5")))
+    except ValueError:
+        return 5.0
+
+
+class _Child:
+    __slots__ = ("_lock",)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+
+class _CounterChild(_Child):
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_Child):
+    __slots__ = ("value", "fn")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.value = 0.0
+        self.fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """
+        Evaluate fn at scrape/flush time instead of tracking a stored value.
+        """
+        self.fn = fn
+
+    def read(self) -> float:
+        if self.fn is None:
+            return self.value
+        try:
+            return float(self.fn())
+        except Exception:
+            return math.nan
+
+
+class _HistogramChild(_Child):
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        super().__init__()
+        self.bounds = bounds
+        # one slot per finite bound plus +Inf; non-cumulative until render
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._new_child()
+                self._children[key] = child
+        return child
+
+    def _default(self) -> Any:
+        return self.labels()
+
+    def items(self) -> List[Tuple[LabelValues, Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",  # sum|max across live worker processes
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._default().set_function(fn)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+_REGISTRY: Dict[str, _Metric] = {}
+
+
+def _register(metric: _Metric) -> None:
+    if metric.name in _REGISTRY:
+        raise ValueError(f"metric already registered: {metric.name}")
+    _REGISTRY[metric.name] = metric
+
+
+# ---------------------------------------------------------------------------
+# Snapshots (per-process state, JSON-serialisable)
+# ---------------------------------------------------------------------------
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Point-in-time copy of this process's metrics.
+    """
+    metrics: Dict[str, Any] = {}
+    for name, m in _REGISTRY.items():
+        samples: List[Any] = []
+        for key, child in m.items():
+            if isinstance(child, _HistogramChild):
+                with child._lock:
+                    samples.append([list(key), {"counts": list(child.counts), "sum": child.sum, "count": child.count}])
+            elif isinstance(child, _GaugeChild):
+                samples.append([list(key), child.read()])
+            else:
+                samples.append([list(key), child.value])
+        entry: Dict[str, Any] = {"samples": samples}
+        if isinstance(m, Histogram):
+            entry["buckets"] = list(m.buckets)
+        metrics[name] = entry
+    return {"pid": os.getpid(), "written_at": time.time(), "metrics": metrics}
+
+
+def _snapshot_file(directory: str, pid: int) -> Path:
+    return Path(directory) / f"metrics-{pid}.json"
+
+
+def flush() -> None:
+    """
+    Write this process's snapshot for sibling workers to aggregate.
+    Atomic replace so readers never see a partial file. Never raises.
+    """
+    d = metrics_dir()
+    if not d:
+        return
+    try:
+        Path(d).mkdir(parents=True, exist_ok=True)
+        target = _snapshot_file(d, os.getpid())
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot(), allow_nan=True), encoding="utf-8")
+        os.replace(tmp, target)
+    except Exception:
+        log.exception("metrics flush failed")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _load_snapshots() -> List[Tuple[Dict[str, Any], bool]]:
+    """
+    Return (snapshot, live) pairs: this process first, then sibling files.
+    """
+    out: List[Tuple[Dict[str, Any], bool]] = [(snapshot(), True)]
+    d = metrics_dir()
+    if not d:
+        return out
+    me = os.getpid()
+    try:
+        files = sorted(Path(d).glob("metrics-*.json"))
+    except Exception:
+        return out
+    for f in files:
+        try:
+            pid = int(f.stem.split("-", 1)[1])
+        except ValueError:
+            continue
+        if pid == me:
+            continue
+        try:
+            snap = json.loads(f.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # mid-rotation or corrupt; next scrape picks it up
+        out.append((snap, _pid_alive(pid)))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+
+
+def _fmt(v: float) -> str:
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labelstr(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render() -> str:
+    """
+    Prometheus text exposition (format 0.0.4), aggregated across workers.
+
+    Counters and histograms are summed over every snapshot (including exited
+    workers, so totals stay monotonic). Gauges only count live processes.
+    """
+    snaps = _load_snapshots()
+    lines: List[str] = []
+
+    for name, m in _REGISTRY.items():
+        lines.append(f"# HELP {name} {m.documentation}")
+        lines.append(f"# TYPE {name} {m.kind}")
+
+        if isinstance(m, Histogram):
+            agg: Dict[LabelValues, Dict[str, Any]] = {}
+            for snap, _live in snaps:
+                entry = snap.get("metrics", {}).get(name)
+                if not entry or [float(b) for b in entry.get("buckets", [])] != list(m.buckets):
+                    continue  # bucket layout changed between deploys; skip stale file
+                for key, h in entry["samples"]:
+                    a = agg.setdefault(tuple(key), {"counts": [0] * (len(m.buckets) + 1), "sum": 0.0, "count": 0})
+                    a["counts"] = [x + y for x, y in zip(a["counts"], h["counts"])]
+                    a["sum"] += h["sum"]
+                    a["count"] += h["count"]
+            for key in sorted(agg):
+                a = agg[key]
+                cum = 0
+                for bound, c in zip(m.buckets, a["counts"]):
+                    cum += c
+                    lines.append(f"{name}_bucket{_labelstr(m.labelnames, key, ('le', _fmt(bound)))} {cum}")
+                lines.append(f"{name}_bucket{_labelstr(m.labelnames, key, ('le', '+Inf'))} {a['count']}")
+                lines.append(f"{name}_sum{_labelstr(m.labelnames, key)} {_fmt(a['sum'])}")
+                lines.append(f"{name}_count{_labelstr(m.labelnames, key)} {a['count']}")
+            continue
+
+        values: Dict[LabelValues, float] = {}
+        for snap, live in snaps:
+            entry = snap.get("metrics", {}).get(name)
+            if not entry:
+                continue
+            if isinstance(m, Gauge) and not live:
+                continue
+            for key, v in entry["samples"]:
+                k = tuple(key)
+                v = float(v)
+                if isinstance(m, Gauge) and m.multiprocess_mode == "max":
+                    values[k] = max(values.get(k, v), v)
+                else:
+                    values[k] = values.get(k, 0.0) + v
+        for key in sorted(values):
+            lines.append(f"{name}{_labelstr(m.labelnames, key)} {_fmt(values[key])}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Background flusher (multi-worker mode only)
+# ---------------------------------------------------------------------------
+
+_FLUSHER: Optional[threading.Thread] = None
+_FLUSHER_STOP = threading.Event()
+
+
+def start_flusher() -> None:
+    global _FLUSHER
+    if not metrics_dir() or (_FLUSHER is not None and _FLUSHER.is_alive()):
+        return
+    _FLUSHER_STOP.clear()
+
+    def _run() -> None:
+        interval = flush_interval()
+        while not _FLUSHER_STOP.wait(interval):
+            flush()
+
+    _FLUSHER = threading.Thread(target=_run, name="metrics-flusher", daemon=True)
+    _FLUSHER.start()
+    flush()
+
+
+def stop_flusher() -> None:
+    global _FLUSHER
+    _FLUSHER_STOP.set()
+    if _FLUSHER is not None:
+        _FLUSHER.join(timeout=2.0)
+        _FLUSHER = None
+    flush()
+
+
+# ---------------------------------------------------------------------------
+# Gateway metric catalogue (defined centrally so /metrics always lists them)
+# ---------------------------------------------------------------------------
+
+WEBHOOK_ACK_SECONDS = Histogram(
+    "gateway_webhook_ack_seconds",
+    "Time from webhook request start to ACK response.",
+    ["provider"],
+)
+WEBHOOK_BODY_BYTES = Histogram(
+    "gateway_webhook_body_bytes",
+    "Inbound webhook body size in bytes.",
+    ["provider"],
+    buckets=SIZE_BUCKETS,
+)
+ADMISSION_LIMIT = Gauge(
+    "gateway_admission_limit",
+    "Current adaptive concurrency limit for webhook ingress.",
+)
+ADMISSION_INFLIGHT = Gauge(
+    "gateway_admission_inflight",
+    "Webhook deliveries currently admitted by the limiter.",
+)
+ADMISSION_SHED_TOTAL = Counter(
+    "gateway_admission_shed_total",
+    "Requests rejected with 503 by the admission limiter, by priority class.",
+    ["class"],
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    "gateway_ingest_queue_depth",
+    "Deliveries waiting for a persistence worker, per provider.",
+    ["provider"],
+)
+INGEST_INFLIGHT = Gauge(
+    "gateway_ingest_inflight",
+    "Deliveries currently being persisted, per provider.",
+    ["provider"],
+)
+INGEST_QUEUE_WAIT_SECONDS = Histogram(
+    "gateway_ingest_queue_wait_seconds",
+    "Time a delivery waited in its provider queue before persistence started.",
+    ["provider"],
+)
+INGEST_REJECTED_TOTAL = Counter(
+    "gateway_ingest_rejected_total",
+    "Deliveries turned away before persistence (queue_full|rate_limited).",
+    ["provider", "reason"],
+)
+SPOOL_APPENDS_TOTAL = Counter(
+    "gateway_spool_appends_total",
+    "Deliveries written to the durable spool instead of the DB (degraded|timeout|bypass).",
+    ["reason"],
+)
+SPOOL_REPLAYED_TOTAL = Counter(
+    "gateway_spool_replayed_total",
+    "Spooled deliveries replayed into events (inserted|duplicate).",
+    ["result"],
+)
+SPOOL_CORRUPT_TOTAL = Counter(
+    "gateway_spool_corrupt_records_total",
+    "Spool records skipped because of a bad frame or checksum.",
+)
+SPOOL_BACKLOG_BYTES = Gauge(
+    "gateway_spool_backlog_bytes",
+    "Spool bytes not yet replayed into the DB.",
+    multiprocess_mode="max",
+)
+SPOOL_FSYNC_SECONDS = Histogram(
+    "gateway_spool_fsync_seconds",
+    "Duration of spool fsyncs (group commit or per append).",
+)
+REORDER_BUFFERED = Gauge(
+    "gateway_reorder_buffered",
+    "Envelope events held in memory by the reorder buffer.",
+)
+REORDER_SPILLED = Gauge(
+    "gateway_reorder_spilled",
+    "Envelope events spilled from the reorder buffer to SQLite.",
+)
+REORDER_RELEASED_TOTAL = Counter(
+    "gateway_reorder_released_total",
+    "Envelope events released to the ordered stream (in_order|late|forced).",
+    ["result"],
+)
+REORDER_HOLD_SECONDS = Histogram(
+    "gateway_reorder_hold_seconds",
+    "Time an envelope event was held by the reorder buffer.",
+)
+REORDER_SPILL_TOTAL = Counter(
+    "gateway_reorder_spill_total",
+    "Reorder buffer spill traffic in entries (spill|unspill), and failed attempts (error).",
+    ["op"],
+)
+BODY_HASH_SECONDS = Histogram(
+    "gateway_body_hash_seconds",
+    "Time spent hashing raw bodies (sha256) before persistence.",
+)
+BODY_COMPRESS_SECONDS = Histogram(
+    "gateway_body_compress_seconds",
+    "CPU time compressing raw bodies before persistence.",
+    ["codec"],
+)
+BODY_DECOMPRESS_SECONDS = Histogram(
+    "gateway_body_decompress_seconds",
+    "CPU time decompressing stored bodies for reads (full or prefix).",
+    ["codec", "mode"],
+)
+BODY_COMPRESSION_RATIO = Histogram(
+    "gateway_body_compression_ratio",
+    "Raw/stored size ratio of compressed bodies.",
+    ["codec"],
+    buckets=RATIO_BUCKETS,
+)
+BODY_CODEC_BYTES_TOTAL = Counter(
+    "gateway_body_codec_bytes_total",
+    "Body bytes by codec, before (raw) and after (stored) compression.",
+    ["codec", "kind"],
+)
+DB_CONNECT_SECONDS = Histogram(
+    "gateway_db_connect_seconds",
+    "Time to open a SQLite connection and apply pragmas.",
+)
+DB_COMMIT_SECONDS = Histogram(
+    "gateway_db_commit_seconds",
+    "Time spent in SQLite commit for event writes.",
+)
+DB_CHECKPOINT_SECONDS = Histogram(
+    "gateway_db_checkpoint_seconds",
+    "Duration of background WAL checkpoints.",
+    ["mode"],
+)
+DB_CHECKPOINTS_TOTAL = Counter(
+    "gateway_db_checkpoints_total",
+    "Background WAL checkpoints by mode and result (ok|busy|error).",
+    ["mode", "result"],
+)
+DB_WAL_BYTES = Gauge(
+    "gateway_db_wal_bytes",
+    "Size of the SQLite -wal file at the last checkpoint tick.",
+    multiprocess_mode="max",
+)
+EVENTS_PERSISTED_TOTAL = Counter(
+    "gateway_events_persisted_total",
+    "Inbound events written to the ledger.",
+    ["source"],
+)
+DEDUPE_HITS_TOTAL = Counter(
+    "gateway_events_dedupe_hits_total",
+    "Inbound events ignored because the dedupe key already existed.",
+    ["source"],
+)
+PERSIST_FAILURES_TOTAL = Counter(
+    "gateway_events_persist_failures_total",
+    "Inbound events that could not be persisted (degraded/disabled DB).",
+    ["source", "mode"],
+)
+SSE_SUBSCRIBERS = Gauge(
+    "gateway_sse_subscribers",
+    "Connected /webhooks/monitor/stream subscribers.",
+)
+SSE_QUEUE_DEPTH = Gauge(
+    "gateway_sse_queue_depth",
+    "Events queued across SSE subscriber queues.",
+)
+EVENTS_QUERY_SECONDS = Histogram(
+    "gateway_events_query_seconds",
+    "Latency of /events/* read handlers.",
+    ["route"],
+)
+ENRICH_EVENTS_TOTAL = Counter(
+    "gateway_enrich_events_total",
+    "Events by enrichment outcome (enriched|missing|error).",
+    ["result"],
+)
+ENRICH_API_CALLS_TOTAL = Counter(
+    "gateway_enrich_api_calls_total",
+    "Batched DocuSign list-status calls made by the enricher (ok|rate_limited|error).",
+    ["result"],
+)
+ENRICH_DROPPED_TOTAL = Counter(
+    "gateway_enrich_dropped_events_total",
+    "Events given up on without a result (queue_full|api_error|rate_limited).",
+    ["reason"],
+)
+ENRICH_API_CALLS_SAVED_TOTAL = Counter(
+    "gateway_enrich_api_calls_saved_total",
+    "Per-envelope GETs avoided by batching: events resolved minus calls made.",
+)
+ENRICH_BATCH_ENVELOPES = Histogram(
+    "gateway_enrich_batch_envelopes",
+    "Distinct envelopes per list-status call.",
+    buckets=COUNT_BUCKETS,
+)
+ENRICH_LAG_SECONDS = Histogram(
+    "gateway_enrich_lag_seconds",
+    "Time from an event being queued for enrichment to its result being stored.",
+)
+HTTP_CACHE_REQUESTS_TOTAL = Counter(
+    "gateway_http_cache_requests_total",
+    "Upstream read cache lookups (hit|stale|coalesced|miss); all but miss avoided an upstream call.",
+    ["cache", "op", "result"],
+)
+HTTP_CACHE_REVALIDATIONS_TOTAL = Counter(
+    "gateway_http_cache_revalidations_total",
+    "Refreshes of expired or stale entries (not_modified|modified|error).",
+    ["cache", "op", "result"],
+)
+HTTP_CACHE_ENTRIES = Gauge(
+    "gateway_http_cache_entries",
+    "Entries held by an upstream read cache.",
+    ["cache"],
+)
+HTTP_CACHE_BYTES = Gauge(
+    "gateway_http_cache_bytes",
+    "Response bytes held by an upstream read cache.",
+    ["cache"],
+)
+DOCUSIGN_HTTP_SECONDS = Histogram(
+    "gateway_docusign_http_seconds",
+    "Latency of outbound DocuSign HTTP calls.",
+    ["op", "status"],
+)
+SNAPSHOT_SEGMENTS = Gauge(
+    "gateway_snapshot_segments",
+    "Hourly columnar snapshot segments on disk.",
+    multiprocess_mode="max",
+)
+SNAPSHOT_ROWS_TOTAL = Counter(
+    "gateway_snapshot_rows_total",
+    "Event rows written into snapshot segments (rebuilt hours count again).",
+)
+SNAPSHOT_COMPACT_SECONDS = Histogram(
+    "gateway_snapshot_compact_seconds",
+    "Duration of one snapshot compaction run.",
+)
+ANALYTICS_QUERY_SECONDS = Histogram(
+    "gateway_analytics_query_seconds",
+    "Latency of /analytics/* aggregations over snapshot segments.",
+    ["route"],
+)
+ROLES_HELD = Gauge(
+    "gateway_roles_held",
+    "Background role leases (roles and shards) held by the worker.",
+)
+ROLE_FAILOVERS_TOTAL = Counter(
+    "gateway_role_failovers_total",
+    "Role leases this worker took over from another holder.",
+    ["role"],
+)
+ROLE_LEASE_ERRORS_TOTAL = Counter(
+    "gateway_role_lease_errors_total",
+    "Failed lease heartbeats (DB busy or unavailable).",
+)
+INTEGRITY_SEALED_SEQ = Gauge(
+    "gateway_integrity_sealed_seq",
+    "Last chain_seq covered by a sealed integrity checkpoint.",
+    multiprocess_mode="max",
+)
+INTEGRITY_ROWS_VERIFIED_TOTAL = Counter(
+    "gateway_integrity_rows_verified_total",
+    "Event rows re-hashed by integrity runs.",
+    ["run"],
+)
+INTEGRITY_VERIFY_SECONDS = Histogram(
+    "gateway_integrity_verify_seconds",
+    "Duration of one integrity run (seal, incremental or full).",
+    ["run"],
+)
+INTEGRITY_FINDINGS_TOTAL = Counter(
+    "gateway_integrity_findings_total",
+    "Integrity findings reported by runs (content, link, gap, ...).",
+    ["kind"],
+)
+DB_READS_IN_FLIGHT = Gauge(
+    "gateway_db_reads_in_flight",
+    "/events reads queued or running on the reader pool (this worker).",
+)
+DB_READ_WAIT_SECONDS = Histogram(
+    "gateway_db_read_wait_seconds",
+    "Time a read call waited for a reader pool thread.",
+)
+DB_READS_INTERRUPTED_TOTAL = Counter(
+    "gateway_db_reads_interrupted_total",
+    "Reads stopped with sqlite3 interrupt, by reason (budget, disconnected, cancelled).",
+    ["reason"],
+)
+CONNECT_PARSED_TOTAL = Counter(
+    "gateway_connect_parsed_total",
+    "Webhook bodies run through the Connect parser, by format (json, xml) and result (ok, error).",
+    ["format", "result"],
+)
+CONNECT_DOCUMENTS_TOTAL = Counter(
+    "gateway_connect_documents_total",
+    "Embedded base64 documents moved out of parsed payloads, by result (stored, existing, unstored, invalid).",
+    ["result"],
+)
+CONNECT_DOCUMENT_BYTES = Histogram(
+    "gateway_connect_document_bytes",
+    "Decoded size of embedded documents.",
+    buckets=SIZE_BUCKETS,
+)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, TypeVar
+
+from gateway.db.sqlite import db_path
+
+log = logging.getLogger("gateway.profiler")
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_ACTIVE: Optional["StackSampler"] = None
+# The per-request sampler of the request being handled; worker threads see it
+# through the request's copied contextvars.
+_REQUEST: ContextVar[Optional["StackSampler"]] = ContextVar("gateway_request_sampler", default=None)
+
+
+def profile_dir() -> Path:
+    """
+    Where collapsed-stack profiles are written (next to the DB by default).
+    """
+    d = os.getenv("GATEWAY_PROFILE_DIR", "").strip()
+    return Path(d) if d else Path(db_path()).parent / "profiles"
+
+
+def sample_interval() -> float:
+    try:
+        return max(0.001, float(os.getenv("GATEWAY_PROFILE_INTERVAL_MS", "5")) / 1000.0)
+    except ValueError:
+        return 0.005
+
+
+def _fold(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class StackSampler:
+    """
+    Wall-clock stack sampler built on sys._current_frames().
+
+    thread_id=None samples every thread except the sampler itself (stacks are
+    prefixed with the thread name). With a thread_id, threads doing work for
+    it (follow()/unfollow(), see following()) are sampled too, prefixed with
+    their name. Output is the collapsed-stack format read by flamegraph.pl,
+    speedscope and inferno.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: Optional[float] = None) -> None:
+        self.thread_id = thread_id
+        self.interval = interval or sample_interval()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self._followed: Set[int] = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def follow(self, thread_id: int) -> None:
+        with _lock:
+            self._followed.add(thread_id)
+
+    def unfollow(self, thread_id: int) -> None:
+        with _lock:
+            self._followed.discard(thread_id)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                f = frames.get(self.thread_id)
+                if f is not None:
+                    self.stacks[_fold(f)] += 1
+                with _lock:
+                    followed = list(self._followed)
+                if followed:
+                    names = {t.ident: t.name for t in threading.enumerate() if t.ident}
+                    for tid in followed:
+                        f = frames.get(tid)
+                        if f is not None:
+                            self.stacks[f"{names.get(tid, tid)};{_fold(f)}"] += 1
+            else:
+                names: Dict[int, str] = {t.ident: t.name for t in threading.enumerate() if t.ident}
+                for tid, f in frames.items():
+                    if tid == me:
+                        continue
+                    self.stacks[f"{names.get(tid, tid)};{_fold(f)}"] += 1
+            self.samples += 1
+
+    def write(self, label: str) -> Optional[Path]:
+        """
+        Write collapsed stacks to profile_dir(). Never raises.
+        """
+        if not self.stacks:
+            return None
+        try:
+            d = profile_dir()
+            d.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_at))
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")[:80]
+            path = d / f"{stamp}-{os.getpid()}-{slug}.folded"
+            with path.open("w", encoding="utf-8") as f:
+                for stack, n in self.stacks.most_common():
+                    f.write(f"{stack} {n}\n")
+            return path
+        except Exception:
+            log.exception("profile write failed")
+            return None
+
+
+def try_start_request_sampler(thread_id: int) -> Optional[StackSampler]:
+    """
+    Start a per-request sampler unless one is already running in this
+    process (one sampler at a time bounds profiling overhead).
+    """
+    global _ACTIVE
+    with _lock:
+        if _ACTIVE is not None:
+            return None
+        _ACTIVE = StackSampler(thread_id=thread_id)
+    return _ACTIVE.start()
+
+
+def bind_request(sampler: StackSampler) -> Any:
+    """
+    Make sampler the current request's sampler (for following()); returns
+    the token for unbind_request().
+    """
+    return _REQUEST.set(sampler)
+
+
+def unbind_request(token: Any) -> None:
+    _REQUEST.reset(token)
+
+
+class _NoopFollow:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP_FOLLOW = _NoopFollow()
+
+
+class _Follow:
+    __slots__ = ("sampler", "tid")
+
+    def __init__(self, sampler: StackSampler) -> None:
+        self.sampler = sampler
+        self.tid = 0
+
+    def __enter__(self) -> None:
+        self.tid = threading.get_ident()
+        self.sampler.follow(self.tid)
+
+    def __exit__(self, *exc: Any) -> None:
+        self.sampler.unfollow(self.tid)
+
+
+def following() -> Any:
+    """
+    In a worker thread doing a request's work under its contextvars, add
+    this thread to the request's profile while the block runs:
+
+        with following():
+            persist()
+
+    A shared no-op unless the request is being sampled.
+    """
+    sampler = _REQUEST.get()
+    if sampler is None:
+        return _NOOP_FOLLOW
+    return _Follow(sampler)
+
+
+def run_followed(fn: Callable[..., T], *args: Any) -> T:
+    """
+    fn(*args) inside following(); for handing to executors.
+    """
+    with following():
+        return fn(*args)
+
+
+def finish_request_sampler(sampler: StackSampler, *, keep: bool, label: str) -> Optional[Path]:
+    global _ACTIVE
+    sampler.stop()
+    with _lock:
+        if _ACTIVE is sampler:
+            _ACTIVE = None
+    if not keep:
+        return None
+    path = sampler.write(label)
+    if path is not None:
+        log.info("slow request profile written: %s (%d samples)", path, sampler.samples)
+    return path
+
+
+def busy() -> bool:
+    return _ACTIVE is not None
+
+
+def claim_on_demand(interval: Optional[float] = None) -> Optional[StackSampler]:
+    """
+    Reserve the process-wide sampler slot for an on-demand (all threads) profile.
+    Returns None when another profile is running.
+    """
+    global _ACTIVE
+    with _lock:
+        if _ACTIVE is not None:
+            return None
+        _ACTIVE = StackSampler(thread_id=None, interval=interval)
+    return _ACTIVE.start()
+
+
+def release(sampler: StackSampler) -> None:
+    global _ACTIVE
+    sampler.stop()
+    with _lock:
+        if _ACTIVE is sampler:
+            _ACTIVE = None
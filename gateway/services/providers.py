@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """
+    Ingress settings for one webhook provider.
+
+    weight      share of persistence capacity when providers compete (WRR)
+    queue_size  deliveries waiting for persistence before new ones get 503
+    workers     max deliveries of this provider persisting at once
+    rate_per_s  token-bucket refill rate; 0 disables rate limiting
+    burst       token-bucket size
+    """
+
+    name: str
+    weight: int = 1
+    queue_size: int = 256
+    workers: int = 1
+    rate_per_s: float = 0.0
+    burst: int = 0
+    correlation_headers: Tuple[str, ...] = ("x-correlation-id", "x-request-id")
+
+
+# DocuSign is the production feed: larger share and queue, never rate limited.
+# The others are planned integrations with conservative defaults.
+_BUILTIN: Tuple[ProviderSpec, ...] = (
+    ProviderSpec("docusign", weight=4, queue_size=1024, workers=4),
+    ProviderSpec("microsoft", weight=1, queue_size=256, workers=1, rate_per_s=50.0, burst=100,
+                 correlation_headers=("client-request-id", "request-id", "x-correlation-id")),
+    ProviderSpec("salesforce", weight=1, queue_size=256, workers=1, rate_per_s=50.0, burst=100,
+                 correlation_headers=("x-sfdc-request-id", "x-correlation-id", "x-request-id")),
+)
+
+
+def _env_override(spec: ProviderSpec) -> ProviderSpec:
+    """
+    GATEWAY_PROVIDER_<NAME>_{WEIGHT,QUEUE,WORKERS,RATE,BURST} override the defaults.
+    """
+    prefix = f"GATEWAY_PROVIDER_{spec.name.upper()}_"
+    fields = {
+        "WEIGHT": ("weight", int),
+        "QUEUE": ("queue_size", int),
+        "WORKERS": ("workers", int),
+        "RATE": ("rate_per_s", float),
+        "BURST": ("burst", int),
+    }
+    changes = {}
+    for suffix, (attr, conv) in fields.items():
+        raw = os.getenv(prefix + suffix)
+        if raw is None or not raw.strip():
+            continue
+        try:
+            changes[attr] = conv(raw)
+        except ValueError:
+            continue
+    spec = replace(spec, **changes) if changes else spec
+    return replace(
+        spec,
+        weight=max(1, spec.weight),
+        queue_size=max(1, spec.queue_size),
+        workers=max(1, spec.workers),
+        rate_per_s=max(0.0, spec.rate_per_s),
+        burst=max(1, spec.burst or int(spec.rate_per_s) or 1),
+    )
+
+
+def load_providers() -> Dict[str, ProviderSpec]:
+    """
+    GATEWAY_WEBHOOK_PROVIDERS (comma-separated) limits which built-ins are
+    accepted; default is all of them.
+    """
+    allowed = {p.strip().lower() for p in os.getenv("GATEWAY_WEBHOOK_PROVIDERS", "").split(",") if p.strip()}
+    return {s.name: _env_override(s) for s in _BUILTIN if not allowed or s.name in allowed}
+
+
+PROVIDERS: Dict[str, ProviderSpec] = load_providers()
+
+
+def get_provider(name: str) -> Optional[ProviderSpec]:
+    return PROVIDERS.get(name)
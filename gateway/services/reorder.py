@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from gateway.db import envelopes
+from gateway.db.envelopes import EnvelopeRef
+from gateway.db.init_db import ensure_schema
+from gateway.db.sqlite import connect
+from gateway.services.metrics import (
+    REORDER_BUFFERED,
+    REORDER_HOLD_SECONDS,
+    REORDER_RELEASED_TOTAL,
+    REORDER_SPILL_TOTAL,
+    REORDER_SPILLED,
+)
+
+log = logging.getLogger("gateway.reorder")
+
+# (provider_ts, seq_hint, received_at, event_id): the envelope_events order.
+Key = Tuple[str, int, str, str]
+# (key, deadline, payload); keys are unique, so payloads are never compared.
+Entry = Tuple[Key, float, Dict[str, Any]]
+
+# Envelopes whose last released key is remembered for late detection.
+_LAST_KEYS_MAX = 10000
+_SUBSCRIBER_QUEUE = 1000
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Envelope:
+    __slots__ = ("heap", "spilled")
+
+    def __init__(self) -> None:
+        self.heap: List[Entry] = []
+        self.spilled = 0
+
+
+class _Subscriber:
+    __slots__ = ("queue", "envelope_id")
+
+    def __init__(self, envelope_id: Optional[str]) -> None:
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(_SUBSCRIBER_QUEUE)
+        self.envelope_id = envelope_id
+
+
+class ReorderBuffer:
+    """
+    Per-envelope reorder stage in front of the live envelope stream.
+
+    Each delivery is held for `delay_s` (the watermark delay) in its
+    envelope's heap, ordered like envelope_events. When an entry's hold
+    expires, it and every buffered entry of that envelope sorting before it
+    are released in order; an entry that sorts before something already
+    released is still emitted, flagged late. Provider timestamps therefore
+    only have to arrive within delay_s of each other to come out in order.
+
+    Memory is bounded by `max_buffered`: on each tick the entries with the
+    most hold time left are spilled to reorder_spill and read back when
+    their envelope is released. If the DB cannot take the spill, the oldest
+    envelopes are released early instead.
+
+    The buffer only runs while someone is subscribed; the envelope history
+    API reads envelope_events and does not depend on it. Per worker, like
+    /webhooks/monitor/stream. Event loop only; DB work runs in a thread.
+    """
+
+    def __init__(self, *, enabled: bool, delay_s: float, max_buffered: int) -> None:
+        self.enabled = enabled
+        self.delay_s = max(0.0, delay_s)
+        self.max_buffered = max(1, max_buffered)
+        self.tick_s = min(0.25, max(0.01, self.delay_s / 4))
+        self.owner = str(os.getpid())
+        self.buffered = 0
+        self.spilled = 0
+        self.released = 0
+        self.late = 0
+        self.forced = 0
+        self._envelopes: Dict[str, _Envelope] = {}
+        self._due: List[Tuple[float, str]] = []
+        self._last: "OrderedDict[str, Key]" = OrderedDict()
+        self._subscribers: List[_Subscriber] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    # -- intake ---------------------------------------------------------------
+
+    def offer(self, ref: EnvelopeRef, *, event_id: str, source: str, received_at: str) -> None:
+        if not self.enabled or not self._subscribers:
+            return
+        key: Key = (ref.provider_ts, ref.seq_hint, received_at, event_id)
+        deadline = time.monotonic() + self.delay_s
+        payload = {
+            "envelope_id": ref.envelope_id,
+            "event_id": event_id,
+            "source": source,
+            "event_type": ref.event_type,
+            "status": ref.status,
+            "recipient_id": ref.recipient_id,
+            "provider_ts": ref.provider_ts,
+            "ts_source": ref.ts_source,
+            "received_at": received_at,
+            "cursor": envelopes.encode_cursor(
+                {"provider_ts": key[0], "seq_hint": key[1], "received_at": key[2], "event_id": key[3]}
+            ),
+        }
+        env = self._envelopes.get(ref.envelope_id)
+        if env is None:
+            env = self._envelopes[ref.envelope_id] = _Envelope()
+        heapq.heappush(env.heap, (key, deadline, payload))
+        heapq.heappush(self._due, (deadline, ref.envelope_id))
+        self.buffered += 1
+
+    # -- subscribers ----------------------------------------------------------
+
+    def subscribe(self, envelope_id: Optional[str] = None) -> _Subscriber:
+        sub = _Subscriber(envelope_id.lower() if envelope_id else None)
+        self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+
+    def _publish(self, events: List[Dict[str, Any]]) -> None:
+        for sub in list(self._subscribers):
+            for evt in events:
+                if sub.envelope_id is not None and sub.envelope_id != evt["envelope_id"]:
+                    continue
+                try:
+                    sub.queue.put_nowait(evt)
+                except asyncio.QueueFull:
+                    # Too slow to keep up: end its stream (the client resumes
+                    # from the last cursor via the history API).
+                    self.unsubscribe(sub)
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    sub.queue.put_nowait(None)
+                    break
+
+    # -- release --------------------------------------------------------------
+
+    def _release(self, envelope_id: str, env: _Envelope, now: float, force: bool = False) -> List[Dict[str, Any]]:
+        expired = [key for key, deadline, _ in env.heap if force or deadline <= now]
+        out: List[Dict[str, Any]] = []
+        if expired:
+            cut = max(expired)
+            last = self._last.get(envelope_id)
+            while env.heap and env.heap[0][0] <= cut:
+                key, deadline, payload = heapq.heappop(env.heap)
+                self.buffered -= 1
+                late = last is not None and key < last
+                result = "forced" if force else "late" if late else "in_order"
+                REORDER_RELEASED_TOTAL.labels(result).inc()
+                REORDER_HOLD_SECONDS.observe(max(0.0, now - (deadline - self.delay_s)))
+                out.append({**payload, "late": late})
+                if not late:
+                    last = key
+            self.released += len(out)
+            self.late += sum(1 for e in out if e["late"])
+            if force:
+                self.forced += len(out)
+            if last is not None:
+                self._last[envelope_id] = last
+                self._last.move_to_end(envelope_id)
+                while len(self._last) > _LAST_KEYS_MAX:
+                    self._last.popitem(last=False)
+        if not env.heap and not env.spilled:
+            self._envelopes.pop(envelope_id, None)
+        return out
+
+    async def tick(self) -> None:
+        now = time.monotonic()
+        out: List[Dict[str, Any]] = []
+        while self._due and self._due[0][0] <= now:
+            _, envelope_id = heapq.heappop(self._due)
+            env = self._envelopes.get(envelope_id)
+            if env is None:
+                continue
+            if env.spilled and not await self._unspill(envelope_id, env):
+                heapq.heappush(self._due, (now + self.tick_s, envelope_id))
+                continue
+            out.extend(self._release(envelope_id, env, now))
+        if self.buffered > self.max_buffered:
+            out.extend(await self._shrink(now))
+        if out:
+            self._publish(out)
+
+    # -- spill ----------------------------------------------------------------
+
+    async def _shrink(self, now: float) -> List[Dict[str, Any]]:
+        """
+        Spill the entries with the most hold time left until back under
+        max_buffered; if the spill fails, release the oldest envelopes early.
+        """
+        excess = self.buffered - self.max_buffered
+        candidates = [(entry[1], envelope_id, entry) for envelope_id, env in self._envelopes.items()
+                      for entry in env.heap]
+        chosen = heapq.nlargest(excess, candidates, key=lambda c: c[0])
+        try:
+            await asyncio.to_thread(self._write_spill, [(eid, e[0], e[1], e[2]) for _, eid, e in chosen])
+        except Exception as e:
+            REORDER_SPILL_TOTAL.labels("error").inc()
+            log.warning("reorder spill failed; releasing early: %r", e)
+            out: List[Dict[str, Any]] = []
+            oldest = sorted(self._envelopes.items(), key=lambda kv: min((x[1] for x in kv[1].heap), default=now))
+            for envelope_id, env in oldest:
+                if self.buffered <= self.max_buffered:
+                    break
+                out.extend(self._release(envelope_id, env, now, force=True))
+            return out
+
+        # Offers during the write only pushed entries, so the chosen ones are still there.
+        by_env: Dict[str, set] = {}
+        for _, envelope_id, entry in chosen:
+            by_env.setdefault(envelope_id, set()).add(entry[0])
+        for envelope_id, keys in by_env.items():
+            env = self._envelopes[envelope_id]
+            env.heap = [x for x in env.heap if x[0] not in keys]
+            heapq.heapify(env.heap)
+            env.spilled += len(keys)
+        self.buffered -= len(chosen)
+        self.spilled += len(chosen)
+        REORDER_SPILL_TOTAL.labels("spill").inc(len(chosen))
+        return []
+
+    def _write_spill(self, entries: List[Tuple[str, Key, float, Dict[str, Any]]]) -> None:
+        if not ensure_schema().ready:
+            raise RuntimeError("DB not ready")
+        conn = connect()
+        try:
+            envelopes.spill(conn, self.owner, entries)
+        finally:
+            conn.close()
+
+    async def _unspill(self, envelope_id: str, env: _Envelope) -> bool:
+        def load() -> List[Entry]:
+            conn = connect()
+            try:
+                return envelopes.unspill(conn, self.owner, envelope_id)
+            finally:
+                conn.close()
+
+        try:
+            entries = await asyncio.to_thread(load)
+        except Exception as e:
+            REORDER_SPILL_TOTAL.labels("error").inc()
+            log.warning("reorder unspill failed for %s; will retry: %r", envelope_id, e)
+            return False
+        for entry in entries:
+            heapq.heappush(env.heap, entry)
+        self.buffered += len(entries)
+        self.spilled -= env.spilled
+        env.spilled = 0
+        REORDER_SPILL_TOTAL.labels("unspill").inc(len(entries))
+        return True
+
+    def _purge_stale_spill(self) -> None:
+        """
+        Spill rows of exited workers (or of an earlier process with our pid).
+        """
+        if not ensure_schema().ready:
+            return
+
+        def stale(owner: str) -> bool:
+            try:
+                return owner == self.owner or not _pid_alive(int(owner))
+            except ValueError:
+                return True
+
+        conn = connect()
+        try:
+            n = envelopes.purge_spill(conn, stale)
+        finally:
+            conn.close()
+        if n:
+            log.info("reorder: dropped %d spilled entries of exited workers", n)
+
+    # -- lifecycle ------------------------------------------------------------
+
+    async def _run(self) -> None:
+        try:
+            await asyncio.to_thread(self._purge_stale_spill)
+        except Exception as e:
+            log.warning("reorder spill purge failed: %r", e)
+        while True:
+            await asyncio.sleep(self.tick_s)
+            try:
+                await self.tick()
+            except Exception:
+                log.exception("reorder tick failed")
+
+    def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="reorder-tick")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sub in list(self._subscribers):
+            self.unsubscribe(sub)
+            try:
+                sub.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "delay_ms": round(self.delay_s * 1000, 1),
+            "max_buffered": self.max_buffered,
+            "subscribers": len(self._subscribers),
+            "envelopes": len(self._envelopes),
+            "buffered": self.buffered,
+            "spilled": self.spilled,
+            "released": self.released,
+            "late": self.late,
+            "forced": self.forced,
+        }
+
+
+def buffer_from_env() -> ReorderBuffer:
+    return ReorderBuffer(
+        enabled=os.getenv("GATEWAY_REORDER_ENABLED", "1").strip() != "0",
+        delay_s=_float_env("GATEWAY_REORDER_DELAY_MS", 2000.0) / 1000.0,
+        max_buffered=int(_float_env("GATEWAY_REORDER_MAX_BUFFERED", 5000)),
+    )
+
+
+REORDER = buffer_from_env()
+REORDER_BUFFERED.set_function(lambda: REORDER.buffered)
+REORDER_SPILLED.set_function(lambda: REORDER.spilled)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from gateway.db import leases
+from gateway.db.init_db import ensure_schema
+from gateway.db.sqlite import connect, connect_read
+from gateway.services.metrics import ROLE_FAILOVERS_TOTAL, ROLE_LEASE_ERRORS_TOTAL, ROLES_HELD
+
+log = logging.getLogger("gateway.roles")
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _holder_gone(holder: str) -> bool:
+    pid = leases.holder_pid(holder)
+    return pid is not None and pid != os.getpid() and not _pid_alive(pid)
+
+
+# lease_events reasons that moved a role from one process to another.
+_FAILOVER_REASONS = ("expired", "holder-exited", "handoff")
+
+
+def shard_name(role: str, shard: int) -> str:
+    return f"{role}#{shard}"
+
+
+@dataclass
+class _Held:
+    token: int
+    valid_until: float  # monotonic; a little before the DB expiry
+
+
+class RoleManager:
+    """
+    Runs each named background role in exactly one process across uvicorn
+    workers (and hosts sharing the DB), using leases in gateway.db.
+
+    - register(role): a singleton role; token(role) is its fencing token
+      while this process holds it, else None. Jobs keep their own loops and
+      skip a tick when they are not the holder.
+    - register(role, shards=n): a parallelizable role split into n leases;
+      each live process takes about n / members of them (held_shards()),
+      and hands extras back when another process joins.
+
+    A heartbeat thread renews every renew_s; a lease not renewed for ttl_s
+    can be taken by another process, immediately if the holder's pid is gone
+    (same host). Leases are released on shutdown so a successor starts on
+    its next heartbeat. A holder counts itself deposed at 80% of ttl_s
+    without a successful renewal, before anyone else may take over.
+
+    Local mode (GATEWAY_ROLES_ENABLED=0, or DB disabled): every role is held
+    by this process with token 0, as for a single worker.
+    """
+
+    def __init__(self, *, enabled: bool, ttl_s: float, renew_s: float) -> None:
+        self.enabled = enabled
+        self.ttl_s = max(1.0, ttl_s)
+        self.renew_s = min(max(0.1, renew_s), self.ttl_s / 2)
+        self.holder = ""
+        self.local = True
+        self.members = 1
+        self.started_at = 0.0
+        self.last_error = ""
+        self._roles: Dict[str, int] = {}
+        self._held: Dict[str, _Held] = {}
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- role API -------------------------------------------------------------
+
+    def register(self, role: str, shards: int = 1) -> None:
+        with self._lock:
+            self._roles[role] = max(1, shards)
+        if self._thread is not None:
+            # Let a job that starts right away find its lease.
+            self.tick()
+
+    def token(self, role: str) -> Optional[int]:
+        if self.local:
+            return 0 if role in self._roles else None
+        held = self._held.get(role)
+        if held is None or time.monotonic() >= held.valid_until:
+            return None
+        return held.token
+
+    def held_shards(self, role: str) -> Dict[int, int]:
+        """
+        shard -> fencing token for the shards of `role` this process holds.
+        """
+        n = self._roles.get(role, 0)
+        if self.local:
+            return {k: 0 for k in range(n)}
+        out = {}
+        for k in range(n):
+            tok = self.token(shard_name(role, k))
+            if tok is not None:
+                out[k] = tok
+        return out
+
+    # -- heartbeat ------------------------------------------------------------
+
+    def _lease_names(self) -> List[str]:
+        with self._lock:
+            roles = dict(self._roles)
+        names = []
+        for role, n in roles.items():
+            names.extend([role] if n == 1 else [shard_name(role, k) for k in range(n)])
+        return names
+
+    def tick(self) -> None:
+        if self.local:
+            return
+        with self._tick_lock:
+            self._tick()
+
+    def _tick(self) -> None:
+        try:
+            conn = connect()
+        except Exception as e:
+            self._error(e)
+            return
+        try:
+            self.members = leases.heartbeat_member(
+                conn, self.holder, started_at=self.started_at, stale_s=self.ttl_s, holder_gone=_holder_gone
+            )
+            with self._lock:
+                roles = dict(self._roles)
+            for role, n in roles.items():
+                if n == 1:
+                    self._acquire(conn, role)
+                else:
+                    self._balance(conn, role, n)
+            self.last_error = ""
+        except Exception as e:
+            self._error(e)
+        finally:
+            conn.close()
+        ROLES_HELD.set(len(self._held))
+
+    def _error(self, e: Exception) -> None:
+        self.last_error = repr(e)
+        ROLE_LEASE_ERRORS_TOTAL.inc()
+        log.warning("lease heartbeat failed: %r", e)
+
+    def _acquire(self, conn: Any, name: str) -> bool:
+        t0 = time.monotonic()
+        lease = leases.acquire(conn, name, self.holder, ttl_s=self.ttl_s, holder_gone=_holder_gone)
+        prev = self._held.get(name)
+        if lease is None:
+            if prev is not None:
+                del self._held[name]
+                log.warning("lost lease %s (token %d)", name, prev.token)
+            return False
+        if prev is None or prev.token != lease.token:
+            if lease.token > 1:
+                ROLE_FAILOVERS_TOTAL.labels(name.split("#", 1)[0]).inc()
+            log.info("acquired lease %s (token %d)", name, lease.token)
+        self._held[name] = _Held(lease.token, t0 + self.ttl_s * 0.8)
+        return True
+
+    def _balance(self, conn: Any, role: str, n: int) -> None:
+        fair = math.ceil(n / max(1, self.members))
+        names = [shard_name(role, k) for k in range(n)]
+        mine = [nm for nm in names if nm in self._held]
+        # Renew what we hold; hand back the surplus when members joined.
+        for nm in mine[fair:]:
+            leases.release(conn, nm, self.holder)
+            self._held.pop(nm, None)
+        count = 0
+        for nm in mine[:fair]:
+            count += self._acquire(conn, nm)
+        for nm in names:
+            if count >= fair:
+                break
+            if nm not in self._held:
+                count += self._acquire(conn, nm)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.renew_s):
+            self.tick()
+
+    # -- lifecycle --------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.local = not self.enabled or not ensure_schema().enabled
+        if self.local:
+            return
+        self.holder = leases.holder_id()
+        self.started_at = time.time()
+        self._stop.clear()
+        self.tick()
+        self._thread = threading.Thread(target=self._run, name="roles-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        if self.local or not self.holder:
+            return
+        try:
+            conn = connect()
+            try:
+                for name in list(self._held):
+                    leases.release(conn, name, self.holder)
+                leases.leave(conn, self.holder)
+            finally:
+                conn.close()
+        except Exception as e:
+            log.warning("releasing leases failed: %r", e)
+        self._held.clear()
+        ROLES_HELD.set(0)
+
+    def status(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "mode": "local" if self.local else "lease",
+            "holder": self.holder or None,
+            "ttl_s": self.ttl_s,
+            "renew_s": self.renew_s,
+            "members": self.members,
+            "roles": dict(self._roles),
+            "held": sorted(self._held) if not self.local else self._lease_names(),
+            "last_error": self.last_error or None,
+        }
+        if self.local:
+            return out
+        try:
+            conn = connect_read()
+            try:
+                out["holders"] = leases.holders(conn)
+                events = leases.recent_events(conn, 100)
+                out["failovers"] = [e for e in events if e["reason"] in _FAILOVER_REASONS][-10:]
+            finally:
+                conn.close()
+        except Exception as e:
+            out["holders_error"] = repr(e)
+        return out
+
+
+def roles_from_env() -> RoleManager:
+    return RoleManager(
+        enabled=os.getenv("GATEWAY_ROLES_ENABLED", "1").strip() != "0",
+        ttl_s=_float_env("GATEWAY_ROLES_LEASE_TTL_SECONDS", 15.0),
+        renew_s=_float_env("GATEWAY_ROLES_RENEW_SECONDS", 5.0),
+    )
+
+
+ROLES = roles_from_env()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from gateway.services import profiler
+
+log = logging.getLogger("gateway.timing")
+
+
+def timing_enabled() -> bool:
+    return os.getenv("GATEWAY_TIMING_ENABLED", "0").strip() == "1"
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class RequestTimings:
+    """
+    Per-request span accumulator. Repeated span names are summed.
+    """
+
+    __slots__ = ("start", "spans")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        s = self.spans.get(name)
+        if s is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            s[0] += seconds
+            s[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={v[0] * 1000:.2f}" for name, v in self.spans.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+    def as_ms(self) -> Dict[str, float]:
+        return {name: round(v[0] * 1000, 3) for name, v in self.spans.items()}
+
+
+_CURRENT: ContextVar[Optional[RequestTimings]] = ContextVar("gateway_request_timings", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("timings", "name", "t0")
+
+    def __init__(self, timings: RequestTimings, name: str) -> None:
+        self.timings = timings
+        self.name = name
+        self.t0 = 0.0
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.timings.add(self.name, time.perf_counter() - self.t0)
+
+
+def span(name: str) -> Any:
+    """
+    Time a phase of the current request:
+
+        with span("db_commit"):
+            conn.commit()
+
+    Returns a shared no-op when no request is being timed, so call sites
+    cost one ContextVar lookup when timing is disabled.
+    """
+    t = _CURRENT.get()
+    if t is None:
+        return _NOOP
+    return _Span(t, name)
+
+
+def current() -> Optional[RequestTimings]:
+    return _CURRENT.get()
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware body buffering).
+
+    Enabled with GATEWAY_TIMING_ENABLED=1:
+      - adds a Server-Timing header with the request's spans
+      - logs one structured JSON line per request (INFO when slow, else DEBUG)
+      - samples stack profiles for GATEWAY_PROFILE_SAMPLE_RATE of requests
+        and keeps the ones slower than GATEWAY_TIMING_SLOW_MS
+    Disabled: a single attribute check per request.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self.enabled = timing_enabled()
+        self.slow_s = _float_env("GATEWAY_TIMING_SLOW_MS", 250.0) / 1000.0
+        self.sample_rate = min(1.0, max(0.0, _float_env("GATEWAY_PROFILE_SAMPLE_RATE", 0.0)))
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _CURRENT.set(timings)
+        status: List[int] = [0]
+        streaming: List[bool] = [False]
+
+        sampler: Optional[profiler.StackSampler] = None
+        # /admin/profile owns the sampler slot itself; never sample it per-request
+        if (
+            self.sample_rate
+            and random.random() < self.sample_rate
+            and not scope.get("path", "").startswith("/admin/")
+        ):
+            sampler = profiler.try_start_request_sampler(threading.get_ident())
+        # Pool threads running this request's jobs join its profile.
+        sampler_token = profiler.bind_request(sampler) if sampler is not None else None
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers: List[Tuple[bytes, bytes]] = list(message.get("headers", []))
+                for k, v in headers:
+                    if k.lower() == b"content-type" and v.startswith(b"text/event-stream"):
+                        streaming[0] = True
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _CURRENT.reset(token)
+            if sampler_token is not None:
+                profiler.unbind_request(sampler_token)
+            total = timings.elapsed()
+            slow = total >= self.slow_s and not streaming[0]
+
+            if sampler is not None:
+                profiler.finish_request_sampler(
+                    sampler,
+                    keep=slow,
+                    label=f"{scope.get('method', '')} {scope.get('path', '')} {total * 1000:.0f}ms",
+                )
+
+            if not streaming[0]:
+                level = logging.INFO if slow else logging.DEBUG
+                if log.isEnabledFor(level):
+                    log.log(
+                        level,
+                        json.dumps(
+                            {
+                                "msg": "request_timing",
+                                "method": scope.get("method"),
+                                "path": scope.get("path"),
+                                "status": status[0],
+                                "total_ms": round(total * 1000, 3),
+                                "spans_ms": timings.as_ms(),
+                                "slow": slow,
+                            },
+                            separators=(",", ":"),
+                        ),
+                    )
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Mapping, Optional
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+ENV_PATH = ROOT_DIR / ".env"
+
+
+def _first(env: Mapping[str, str], *names: str, default: str = "") -> str:
+    for n in names:
+        v = (env.get(n) or "").strip()
+        if v:
+            return v
+    return default
+
+
+@dataclass(frozen=True)
+class DocuSignSettings:
+    integration_key: str
+    user_id: str
+    auth_server: str
+    private_key_path: str
+    token_scopes: str
+    # Where /oauth/* is called: https://{auth_server} unless DS_AUTH_BASE_URL
+    # points elsewhere (e.g. bench/emulator.py). REST calls follow the
+    # base_uri that userinfo returns.
+    auth_base_url: str = ""
+
+    def missing(self) -> List[str]:
+        """
+        Env vars still needed for JWT grant (names as operators set them).
+        """
+        out = []
+        if not self.integration_key:
+            out.append("DS_INTEGRATION_KEY")
+        if not self.user_id:
+            out.append("DS_USER_ID")
+        if not self.private_key_path:
+            out.append("DS_PRIVATE_KEY_PATH")
+        return out
+
+    @property
+    def configured(self) -> bool:
+        return not self.missing()
+
+
+@dataclass(frozen=True)
+class Settings:
+    docusign: DocuSignSettings
+    startup_budget_ms: float
+
+
+def load_settings(env: Optional[Mapping[str, str]] = None) -> Settings:
+    """
+    Resolve configuration from the environment (and .env at the repo root,
+    without overriding variables already set). Never raises for missing
+    provider credentials; those are reported when the provider is used.
+    """
+    if env is None:
+        if ENV_PATH.exists():
+            from dotenv import load_dotenv
+
+            load_dotenv(ENV_PATH)
+        env = os.environ
+    try:
+        budget = float(env.get("GATEWAY_STARTUP_BUDGET_MS", "2000"))
+    except ValueError:
+        budget = 2000.0
+    auth_server = _first(env, "DS_AUTH_SERVER", default="account-d.docusign.com")
+    return Settings(
+        docusign=DocuSignSettings(
+            # DS_CLIENT_ID / DS_IMPERSONATED_USER_GUID are the names /docusign/jwt-test used.
+            integration_key=_first(env, "DS_INTEGRATION_KEY", "DS_CLIENT_ID"),
+            user_id=_first(env, "DS_USER_ID", "DS_IMPERSONATED_USER_GUID"),
+            auth_server=auth_server,
+            private_key_path=_first(env, "DS_PRIVATE_KEY_PATH"),
+            token_scopes=_first(env, "DS_TOKEN_SCOPES", default="signature impersonation"),
+            auth_base_url=_first(env, "DS_AUTH_BASE_URL", default=f"https://{auth_server}").rstrip("/"),
+        ),
+        startup_budget_ms=budget,
+    )
+
+
+_SETTINGS: Optional[Settings] = None
+
+
+def init_settings() -> Settings:
+    """
+    Resolve settings once; called at lifespan start.
+    """
+    global _SETTINGS
+    _SETTINGS = load_settings()
+    return _SETTINGS
+
+
+def get_settings() -> Settings:
+    """
+    Settings resolved at startup (resolved on first use outside the app,
+    e.g. scripts and the bench harness).
+    """
+    return _SETTINGS if _SETTINGS is not None else init_settings()
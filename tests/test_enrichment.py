@@ -0,0 +1,161 @@
+"""
+EnvelopeEnricher against a stub list-status backend; store_enrichment is
+patched so no DB is needed. Run from the repo root with: python -m unittest
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import unittest
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from unittest import mock
+
+from gateway.docusign_client import DocuSignHTTPError
+from gateway.services.enrichment import EnvelopeEnricher
+
+
+class StubListStatus:
+    """
+    Returns a summary for every id in `known`; `fail` (if set) is called
+    first with the 1-based call number and may raise.
+    """
+
+    def __init__(self, known: Sequence[str] = (), fail: Optional[Callable[[int], None]] = None) -> None:
+        self.known = set(known)
+        self.fail = fail
+        self.calls: List[Tuple[str, List[str], float]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, account_id: str, envelope_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.calls.append((account_id, list(envelope_ids), time.monotonic()))
+            n = len(self.calls)
+        if self.fail is not None:
+            self.fail(n)
+        return [
+            {"envelopeId": env.upper(), "status": "completed", "statusChangedDateTime": "2026-01-01T00:00:00Z"}
+            for env in envelope_ids
+            if env in self.known
+        ]
+
+
+def rate_limited(retry_after: Optional[float], times: int) -> Callable[[int], None]:
+    def fail(n: int) -> None:
+        if n <= times:
+            raise DocuSignHTTPError("list_status", 429, "", retry_after=retry_after)
+
+    return fail
+
+
+class EnricherTest(unittest.IsolatedAsyncioTestCase):
+    def make(self, stub: StubListStatus, **kw: Any) -> EnvelopeEnricher:
+        opts: Dict[str, Any] = dict(enabled=True, batch_size=50, linger_s=0.05, max_pending=100, concurrency=2)
+        opts.update(kw)
+        enricher = EnvelopeEnricher(list_status=stub, **opts)
+        enricher.start()
+        self.addAsyncCleanup(enricher.stop)
+        return enricher
+
+    async def asyncSetUp(self) -> None:
+        self.stored: List[Any] = []
+        patcher = mock.patch("gateway.services.enrichment.store_enrichment", side_effect=self.stored.extend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def until(self, cond: Callable[[], bool], timeout: float = 2.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not cond():
+            if time.monotonic() > deadline:
+                self.fail("condition not met in time")
+            await asyncio.sleep(0.005)
+
+    def results(self) -> Dict[str, str]:
+        return {r.event_id: r.result for r in self.stored}
+
+    async def test_flushes_when_batch_is_full(self) -> None:
+        stub = StubListStatus(known=["env-a", "env-b"])
+        enricher = self.make(stub, batch_size=2, linger_s=10.0)
+        enricher.submit("acc", "env-a", "ev1")
+        enricher.submit("acc", "env-b", "ev2")
+        await self.until(lambda: len(self.stored) == 2, timeout=1.0)
+        self.assertEqual([(a, ids) for a, ids, _ in stub.calls], [("acc", ["env-a", "env-b"])])
+        self.assertEqual(enricher.pending, 0)
+
+    async def test_flushes_after_linger(self) -> None:
+        stub = StubListStatus(known=["env-a"])
+        enricher = self.make(stub, linger_s=0.1)
+        t0 = time.monotonic()
+        enricher.submit("acc", "env-a", "ev1")
+        await asyncio.sleep(0.03)
+        self.assertEqual(stub.calls, [])
+        await self.until(lambda: len(self.stored) == 1)
+        self.assertGreaterEqual(stub.calls[0][2] - t0, 0.1)
+
+    async def test_fans_out_to_every_event_of_an_envelope(self) -> None:
+        stub = StubListStatus(known=["env-a"])
+        enricher = self.make(stub)
+        for ev in ("ev1", "ev2", "ev3"):
+            enricher.submit("acc", "env-a", ev)
+        await self.until(lambda: len(self.stored) == 3)
+        self.assertEqual(len(stub.calls), 1)
+        self.assertEqual(stub.calls[0][1], ["env-a"])
+        self.assertEqual(self.results(), {"ev1": "enriched", "ev2": "enriched", "ev3": "enriched"})
+        self.assertEqual({r.status for r in self.stored}, {"completed"})
+        self.assertEqual(enricher.counts["enriched"], 3)
+
+    async def test_unknown_envelopes_are_missing(self) -> None:
+        stub = StubListStatus(known=["env-a"])
+        enricher = self.make(stub)
+        enricher.submit("acc", "env-a", "ev1")
+        enricher.submit("acc", "env-b", "ev2")
+        enricher.submit("acc", "env-b", "ev3")
+        await self.until(lambda: len(self.stored) == 3)
+        self.assertEqual(self.results(), {"ev1": "enriched", "ev2": "missing", "ev3": "missing"})
+        missing = [r for r in self.stored if r.result == "missing"]
+        self.assertTrue(all(r.status is None and r.envelope_json is None for r in missing))
+        self.assertEqual(enricher.counts["missing"], 2)
+
+    async def test_429_pauses_account_and_requeues(self) -> None:
+        stub = StubListStatus(known=["env-a"], fail=rate_limited(retry_after=0.2, times=1))
+        enricher = self.make(stub, linger_s=0.01)
+        enricher.submit("acc", "env-a", "ev1")
+        await self.until(lambda: enricher.counts["rate_limited"] == 1)
+        self.assertEqual(enricher.status()["paused_accounts"], 1)
+        # Queued during the pause: goes out with the requeued batch.
+        enricher.submit("acc", "env-a", "ev2")
+        await self.until(lambda: len(self.stored) == 2)
+        self.assertEqual(len(stub.calls), 2)
+        self.assertGreaterEqual(stub.calls[1][2] - stub.calls[0][2], 0.2)
+        self.assertEqual(self.results(), {"ev1": "enriched", "ev2": "enriched"})
+        self.assertEqual(enricher.counts["dropped"], 0)
+        self.assertEqual(enricher.pending, 0)
+
+    async def test_drops_events_past_max_wait(self) -> None:
+        stub = StubListStatus(known=["env-a"], fail=rate_limited(retry_after=0.4, times=100))
+        enricher = self.make(stub, linger_s=0.01, max_wait_s=0.3)
+        enricher.submit("acc", "env-a", "ev1")
+        enricher.submit("acc", "env-a", "ev2")
+        await self.until(lambda: enricher.counts["dropped"] == 2)
+        # First 429 requeues (still young), the retry after the pause drops.
+        self.assertEqual(len(stub.calls), 2)
+        self.assertEqual(enricher.pending, 0)
+        self.assertEqual(self.stored, [])
+        await asyncio.sleep(0.15)
+        self.assertEqual(len(stub.calls), 2)
+
+    async def test_queue_full_drops(self) -> None:
+        stub = StubListStatus(known=["env-a", "env-b", "env-c"])
+        enricher = self.make(stub, max_pending=2)
+        enricher.submit("acc", "env-a", "ev1")
+        enricher.submit("acc", "env-b", "ev2")
+        enricher.submit("acc", "env-c", "ev3")
+        self.assertEqual(enricher.counts["dropped"], 1)
+        self.assertEqual(enricher.pending, 2)
+        await self.until(lambda: len(self.stored) == 2)
+        self.assertEqual(self.results(), {"ev1": "enriched", "ev2": "enriched"})
+        self.assertEqual(stub.calls[0][1], ["env-a", "env-b"])
+
+
+if __name__ == "__main__":
+    unittest.main()